@@ -1 +1 @@
-from netbox_api.api import new_api_client
+from netbox_api.api import new_api_client, new_async_api_client
@@ -1,3 +1,7 @@
+from .aio import AsyncNetboxClient
+from .cache import ResponseCache
 from .client import NetboxClient
-from .protocol import HTTPException
-from .util import new_api_client
+from .metrics import HistogramCollector, RequestEvent
+from .protocol import BulkResult, ConnectionSettings, HTTPException
+from .throttle import AdaptiveLimiter, Throttle, TokenBucket
+from .util import new_api_client, new_async_api_client
@@ -0,0 +1,828 @@
+"""
+Asyncio flavour of the Netbox client. The client parts mirror the blocking
+NetboxClient method for method but every call is a coroutine and paginated
+listings are exposed as async generators, so a single event loop can keep many
+lookups in flight at once.
+
+This module requires aiohttp which is installed with the 'async' extra.
+"""
+import asyncio
+import ssl
+import time
+from collections import deque
+from itertools import islice
+
+from netbox_api.api import payload
+from netbox_api.api.client import BULK_CHUNK_SIZE, FILTER_CHUNK_SIZE
+from netbox_api.api.common import PER_OBJECT_METHODS, project
+from netbox_api.api.decoder import get_decoder
+from netbox_api.api.metrics import DECODE, PAGINATE, REQUEST, WRAP, Hooks, RequestEvent
+from netbox_api.api.protocol import STREAM_DECODE_ERR_FMT, ConnectionSettings, HTTPException, NetboxResponse, \
+    endpoint_template, format_url, page_urls
+from netbox_api.api.stream import STREAM_CHUNK_SIZE, ResultStreamParser
+from netbox_api.model import *
+from netbox_api.model import IdentityMap, decode_scope
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+
+class AsyncResponseAdapter(object):
+    """
+    Exposes the parts of an aiohttp response that NetboxResponse reads.
+    """
+
+    def __init__(self, status_code, headers):
+        self.status_code = status_code
+        self.headers = headers
+
+
+def _query_items(params):
+    """
+    Flatten a query dict into key/value pairs the way requests would, repeating
+    keys for list values and dropping keys that are None.
+    """
+    items = list()
+
+    for key, value in (params or dict()).items():
+        values = value if isinstance(value, (list, tuple)) else [value]
+
+        for v in values:
+            if v is None:
+                continue
+
+            if isinstance(v, bool):
+                v = 'true' if v else 'false'
+
+            items.append((key, str(v)))
+
+    return items
+
+
+class AsyncRequestHandler(object):
+    def __init__(self, host, port, token, scheme, verify=None, page_workers=1, cache=None, identity_map=None,
+                 lazy_models=False, json_decoder=None, stream_pages=False, connection=None,
+                 connection_limit=100):
+        if aiohttp is None:
+            raise ImportError('The asyncio client requires aiohttp. Install it with: pip install netbox_api[async]')
+
+        self._host = host
+        self._port = port
+        self._scheme = scheme
+        self._token = token
+        self._verify_path = verify
+        self._page_workers = page_workers
+        self._cache = cache
+        self._identity_map = identity_map
+        self._lazy_models = lazy_models
+        self._decoder = get_decoder(json_decoder)
+        self._stream_pages = stream_pages
+        self._connection = connection if connection is not None else ConnectionSettings()
+        self._connection_limit = connection_limit
+        self._hooks = Hooks()
+        self._session_obj = None
+
+    @property
+    def _session(self):
+        if self._session_obj is None:
+            ssl_context = None
+            if self._verify_path is not None:
+                ssl_context = ssl.create_default_context(cafile=self._verify_path)
+
+            # Only the timeouts of the connection settings apply, aiohttp doesn't retry requests
+            self._session_obj = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self._connection_limit, ssl=ssl_context),
+                timeout=aiohttp.ClientTimeout(
+                    sock_connect=self._connection.connect_timeout,
+                    sock_read=self._connection.read_timeout),
+                headers={
+                    # Common auth
+                    'Authorization': 'Token {}'.format(self._token),
+
+                    # Common headers
+                    'Accept': 'application/json'
+                })
+
+        return self._session_obj
+
+    async def close(self):
+        if self._session_obj is not None:
+            await self._session_obj.close()
+            self._session_obj = None
+
+    def format_url(self, path_fmt, *parts):
+        return format_url(self._scheme, self._host, self._port, path_fmt, *parts)
+
+    @property
+    def hooks(self):
+        return self._hooks
+
+    def _event(self, method, url):
+        # Skip building events nobody listens to
+        if not self._hooks:
+            return None
+
+        return RequestEvent(self._hooks, method, endpoint_template(url))
+
+    async def request(self, method, url, **kwargs):
+        conditional_headers = dict()
+        event = self._event(method, url)
+
+        # Serve from the cache when we can, otherwise try to revalidate what it holds
+        if self._cache is not None:
+            cached = self._cache.lookup(method, url, kwargs.get('params'))
+            if cached is not None:
+                if event is not None:
+                    event.status = cached.status_code
+                    event.cached = True
+                    event.emit(REQUEST)
+
+                return cached
+
+            conditional_headers = self._cache.validators(method, url, kwargs.get('params'))
+
+        # Copy the kwargs dict to modify it
+        request_kwargs = kwargs.copy()
+
+        if 'params' in request_kwargs:
+            request_kwargs['params'] = _query_items(request_kwargs['params'])
+
+        if len(conditional_headers) > 0:
+            request_kwargs['headers'] = dict(request_kwargs.get('headers') or dict(), **conditional_headers)
+
+        # Make the request and read the entire body before releasing the connection
+        started_at = time.perf_counter()
+
+        async with self._session.request(method.upper(), url, **request_kwargs) as resp:
+            ttfb = time.perf_counter() - started_at
+            content = await resp.read()
+
+        response = NetboxResponse(
+            AsyncResponseAdapter(resp.status, resp.headers), content, self._identity_map, self._lazy_models,
+            self._decoder, event)
+
+        if event is not None:
+            event.status = resp.status
+            event.bytes_received = len(content)
+            event.ttfb = ttfb
+            event.latency = time.perf_counter() - started_at
+            event.emit(REQUEST)
+
+        # Cache reads and invalidate on writes
+        if self._cache is not None:
+            response = self._cache.store(method, url, kwargs.get('params'), response)
+
+            # The response we revalidated was evicted while we waited so ask again in full
+            if response is None:
+                return await self.request(method, url, **kwargs)
+
+        return response
+
+    async def paginate(self, cls, method, url, workers=None, stream=None, **kwargs):
+        """
+        Async generator counterpart of RequestHandler.paginate. Results are
+        yielded in server order regardless of how many pages are in flight.
+
+        :param cls:
+        :param method:
+        :param url:
+        :param workers: number of concurrent page fetches, defaults to the handler's page_workers
+        :param stream: whether to stream pages, defaults to the handler's stream_pages
+        :return:
+        """
+        if workers is None:
+            workers = self._page_workers
+
+        if stream is None:
+            stream = self._stream_pages
+
+        # Share repeated nested objects across every page of this listing
+        identity_map = self._identity_map if self._identity_map is not None else IdentityMap()
+
+        event = self._event(method, url)
+        if event is not None:
+            event.pages = 0
+            event.results = 0
+
+        started_at = time.perf_counter()
+
+        if stream:
+            results = self._stream_listing(cls, method, url, identity_map, event, **kwargs)
+        else:
+            results = self._wrapped_listing(cls, method, url, workers, identity_map, event, **kwargs)
+
+        try:
+            async for r in results:
+                yield r
+        finally:
+            # Close the listing now rather than whenever the loop gets to finalizing it so
+            # any page requests still in flight are cancelled before this returns
+            await results.aclose()
+
+        if event is not None:
+            # Any page that failed would have raised by now
+            event.status = 200
+            event.latency = time.perf_counter() - started_at
+            event.emit(PAGINATE)
+
+    async def _wrapped_listing(self, cls, method, url, workers, identity_map, event, **kwargs):
+        resp = await self.request(method, url=url, **kwargs)
+
+        # Raise on bad status
+        resp.raise_on_status()
+
+        if workers > 1 and resp.next_page is not None:
+            pages = self._prefetch_pages(resp, workers)
+        else:
+            pages = self._follow_pages(resp)
+
+        try:
+            async for page in pages:
+                wrapped = page.wrap_results(cls, identity_map)
+
+                if event is not None:
+                    event.pages += 1
+                    event.results += len(wrapped)
+
+                # Yield the next page of results
+                for r in wrapped:
+                    yield r
+        finally:
+            await pages.aclose()
+
+    async def _follow_pages(self, resp):
+        while True:
+            yield resp
+
+            # Exit this loop if there isn't a next page
+            if resp.next_page is None:
+                break
+
+            # Perform the next get
+            resp = await self.request('get', url=resp.next_page)
+
+            # Raise on bad status
+            resp.raise_on_status()
+
+    async def _stream_listing(self, cls, method, url, identity_map, listing_event, **kwargs):
+        # See RequestHandler._stream_listing
+        while url is not None:
+            fields = dict()
+            event = self._event(method, url)
+
+            if event is not None:
+                event.wrap_time = 0.0
+
+            async for contents in self._stream_results(method, url, fields, event, **kwargs):
+                started_at = time.perf_counter()
+
+                with decode_scope(identity_map, self._lazy_models):
+                    r = cls(**contents)
+
+                if event is not None:
+                    event.wrap_time += time.perf_counter() - started_at
+                    listing_event.results += 1
+
+                yield r
+
+            if event is not None:
+                listing_event.pages += 1
+                event.emit(REQUEST)
+                event.emit(DECODE)
+                event.emit(WRAP)
+
+            # Next links already carry the query
+            method, url, kwargs = 'get', fields.get('next'), dict()
+
+    async def _stream_results(self, method, url, fields, event, **kwargs):
+        # Copy the kwargs dict to modify it
+        request_kwargs = kwargs.copy()
+
+        if 'params' in request_kwargs:
+            request_kwargs['params'] = _query_items(request_kwargs['params'])
+
+        started_at = time.perf_counter()
+
+        async with self._session.request(method.upper(), url, **request_kwargs) as resp:
+            ttfb = time.perf_counter() - started_at
+
+            # Errors are small, read them in full to report them
+            if not 200 <= resp.status < 300:
+                content = await resp.read()
+                NetboxResponse(AsyncResponseAdapter(resp.status, resp.headers), content).raise_on_status()
+
+            parser = ResultStreamParser()
+            decode_time = 0.0
+            bytes_received = 0
+
+            try:
+                async for chunk in resp.content.iter_chunked(STREAM_CHUNK_SIZE):
+                    decode_started_at = time.perf_counter()
+                    parsed = parser.feed(chunk)
+                    decode_time += time.perf_counter() - decode_started_at
+                    bytes_received += len(chunk)
+
+                    for contents in parsed:
+                        yield contents
+
+                for contents in parser.close():
+                    yield contents
+            except ValueError as ve:
+                raise HTTPException(STREAM_DECODE_ERR_FMT.format(url, ve)) from ve
+
+            fields.update(parser.fields)
+
+            if event is not None:
+                event.status = resp.status
+                event.bytes_received = bytes_received
+                event.ttfb = ttfb
+                event.latency = time.perf_counter() - started_at
+                event.decode_time = decode_time
+
+    async def _prefetch_pages(self, first_page, workers):
+        yield first_page
+
+        remaining_urls = page_urls(first_page)
+        pending = deque()
+
+        try:
+            # Keep a bounded window of pages in flight
+            for page_url in islice(remaining_urls, workers):
+                pending.append(asyncio.ensure_future(self.request('get', url=page_url)))
+
+            while len(pending) > 0:
+                resp = await pending.popleft()
+
+                # Top the window back up before handing the page out
+                for page_url in islice(remaining_urls, 1):
+                    pending.append(asyncio.ensure_future(self.request('get', url=page_url)))
+
+                # Raise on bad status
+                resp.raise_on_status()
+
+                yield resp
+        finally:
+            # Don't bother fetching pages nobody is going to read
+            for task in pending:
+                task.cancel()
+
+            # Wait for the cancellations to land so no request outlives the listing
+            await asyncio.gather(*pending, return_exceptions=True)
+
+
+class AsyncNetboxClient(object):
+    def __init__(self, host, port, token, scheme, verify=None, page_workers=1, cache=None, identity_map=None,
+                 lazy_models=False, json_decoder=None, stream_pages=False, connection=None,
+                 connection_limit=100):
+        # Request handling
+        self._request_handler = AsyncRequestHandler(
+            host, port, token, scheme, verify, page_workers, cache, identity_map, lazy_models, json_decoder,
+            stream_pages, connection, connection_limit)
+
+        # Client parts
+        self.ipam = AsyncIPAMClient(self._request_handler)
+        self.dcim = AsyncDCIMClient(self._request_handler)
+        self.tenancy = AsyncTenancyClient(self._request_handler)
+
+    @property
+    def hooks(self):
+        return self._request_handler.hooks
+
+    async def close(self):
+        await self._request_handler.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+
+class AsyncNetboxClientPart(object):
+    def __init__(self, request_handler):
+        self._request_handler = request_handler
+
+    def _format_url(self, path_fmt, *parts):
+        return self._request_handler.format_url(path_fmt, *parts)
+
+    async def _request(self, method, url, **kwargs):
+        return await self._request_handler.request(
+            method=method,
+            url=url,
+            **kwargs)
+
+    def _paginate(self, cls, method, url, **kwargs):
+        return self._request_handler.paginate(
+            cls=cls,
+            method=method,
+            url=url,
+            **kwargs)
+
+    async def _list(self, cls, uri, query_params, fields=None):
+        # See NetboxClientPart._list for fields
+        cls, query_params = project(cls, query_params, fields)
+
+        itr = self._paginate(
+            cls=cls,
+            method='get',
+            url=self._format_url(uri),
+            params=query_params)
+
+        return [r async for r in itr]
+
+    def _iter(self, cls, uri, query_params, page_size=None, fields=None):
+        # Pages are requested one at a time as the caller consumes the async generator
+        cls, query_params = project(cls, query_params, fields)
+
+        if page_size is not None:
+            query_params = dict(query_params, limit=page_size)
+
+        return self._paginate(
+            cls=cls,
+            method='get',
+            url=self._format_url(uri),
+            params=query_params,
+            workers=1)
+
+    async def _get(self, cls, path_fmt, obj_id):
+        resp = await self._request(
+            method='get',
+            url=self._format_url(path_fmt, obj_id))
+
+        # Raise on bad status codes
+        resp.raise_on_status()
+
+        # If there are results, return them
+        return resp.wrap_results(cls)[0]
+
+    async def _create(self, uri, body):
+        resp = await self._request(
+            method='post',
+            url=self._format_url(uri),
+            json=body)
+
+        # Raise on bad status codes
+        resp.raise_on_status()
+
+        # Return the ID of the new object
+        return resp.results[0]['id']
+
+    async def _update(self, path_fmt, obj_id, fields):
+        resp = await self._request(
+            method='patch',
+            url=self._format_url(path_fmt, obj_id),
+            json=fields)
+
+        # Raise on bad status codes
+        resp.raise_on_status()
+
+    async def _delete(self, path_fmt, obj_id):
+        resp = await self._request(
+            method='delete',
+            url=self._format_url(path_fmt, obj_id))
+
+        # Raise on bad status codes
+        resp.raise_on_status()
+
+    async def _bulk(self, method, uri, bodies, chunk_size=None):
+        # See NetboxClientPart._bulk
+        if chunk_size is None:
+            chunk_size = BULK_CHUNK_SIZE
+
+        bodies = list(bodies)
+        results = list()
+
+        for offset in range(0, len(bodies), chunk_size):
+            chunk = bodies[offset:offset + chunk_size]
+
+            resp = await self._request(
+                method=method,
+                url=self._format_url(uri),
+                json=chunk)
+
+            if resp.status_code == 405 and method in PER_OBJECT_METHODS:
+                results.extend(await self._per_object(method, uri, bodies[offset:]))
+                break
+
+            results.extend(resp.bulk_results([b.get('id') for b in chunk]))
+
+        return results
+
+    async def _per_object(self, method, uri, bodies):
+        # See NetboxClientPart._per_object
+        results = list()
+
+        for body in bodies:
+            kwargs = dict()
+            if method == 'patch':
+                kwargs['json'] = dict((k, v) for k, v in body.items() if k != 'id')
+
+            resp = await self._request(
+                method=method,
+                url=self._format_url(uri + '/{}', body['id']),
+                **kwargs)
+
+            results.append(resp.item_result(body['id']))
+
+        return results
+
+    async def _bulk_delete(self, uri, ids, chunk_size=None):
+        return await self._bulk('delete', uri, [{'id': obj_id} for obj_id in ids], chunk_size)
+
+
+class AsyncDCIMClient(AsyncNetboxClientPart):
+    """
+    Asyncio counterpart of DCIMClient. Create methods accept the same arguments
+    as their blocking equivalents.
+    """
+
+    async def interface(self, interface_id):
+        return await self._get(Interface, '/dcim/interfaces/{}', interface_id)
+
+    async def list_interfaces(self, fields=None, **query):
+        return await self._list(Interface, '/dcim/interfaces', query, fields)
+
+    def iter_interfaces(self, page_size=None, fields=None, **query):
+        return self._iter(Interface, '/dcim/interfaces', query, page_size, fields)
+
+    async def list_interfaces_for_devices(self, device_ids, chunk_size=None, fields=None, **query):
+        # See DCIMClient.list_interfaces_for_devices, chunks are requested concurrently
+        if chunk_size is None:
+            chunk_size = FILTER_CHUNK_SIZE
+
+        device_ids = list(device_ids)
+
+        chunks = await asyncio.gather(*[
+            self._list(
+                Interface, '/dcim/interfaces', dict(query, device_id=device_ids[offset:offset + chunk_size]), fields)
+            for offset in range(0, len(device_ids), chunk_size)])
+
+        return [interface for chunk in chunks for interface in chunk]
+
+    async def create_interface(self, *args, **kwargs):
+        return await self._create('/dcim/interfaces', payload.interface(*args, **kwargs))
+
+    async def delete_interface(self, interface_id):
+        await self._delete('/dcim/interfaces/{}', interface_id)
+
+    async def bulk_create_interfaces(self, interfaces, chunk_size=None):
+        return await self._bulk('post', '/dcim/interfaces', [payload.interface(**i) for i in interfaces], chunk_size)
+
+    async def bulk_update_interfaces(self, updates, chunk_size=None):
+        return await self._bulk('patch', '/dcim/interfaces', updates, chunk_size)
+
+    async def bulk_delete_interfaces(self, interface_ids, chunk_size=None):
+        return await self._bulk_delete('/dcim/interfaces', interface_ids, chunk_size)
+
+    async def connect_interfaces(self, status, interface_a_id, interface_b_id):
+        await self._create(
+            '/dcim/interface-connections',
+            payload.interface_connection(status, interface_a_id, interface_b_id))
+
+    async def region(self, region_id):
+        return await self._get(Region, '/dcim/regions/{}', region_id)
+
+    async def list_regions(self, fields=None, **query):
+        return await self._list(Region, '/dcim/regions', query, fields)
+
+    def iter_regions(self, page_size=None, fields=None, **query):
+        return self._iter(Region, '/dcim/regions', query, page_size, fields)
+
+    async def create_region(self, *args, **kwargs):
+        return await self._create('/dcim/regions', payload.region(*args, **kwargs))
+
+    async def delete_region(self, region_id):
+        await self._delete('/dcim/regions/{}', region_id)
+
+    async def site(self, site_id):
+        return await self._get(Site, '/dcim/sites/{}', site_id)
+
+    async def list_sites(self, fields=None, **query):
+        return await self._list(Site, '/dcim/sites', query, fields)
+
+    def iter_sites(self, page_size=None, fields=None, **query):
+        return self._iter(Site, '/dcim/sites', query, page_size, fields)
+
+    async def create_site(self, *args, **kwargs):
+        return await self._create('/dcim/sites', payload.site(*args, **kwargs))
+
+    async def delete_site(self, site_id):
+        await self._delete('/dcim/sites/{}', site_id)
+
+    async def rack_group(self, rack_group_id):
+        return await self._get(RackGroup, '/dcim/rack-groups/{}', rack_group_id)
+
+    async def list_rack_groups(self, fields=None, **query):
+        return await self._list(RackGroup, '/dcim/rack-groups', query, fields)
+
+    def iter_rack_groups(self, page_size=None, fields=None, **query):
+        return self._iter(RackGroup, '/dcim/rack-groups', query, page_size, fields)
+
+    async def create_rack_group(self, *args, **kwargs):
+        return await self._create('/dcim/rack-groups', payload.rack_group(*args, **kwargs))
+
+    async def delete_rack_group(self, rack_group_id):
+        await self._delete('/dcim/rack-groups/{}', rack_group_id)
+
+    async def rack_role(self, rack_role_id):
+        return await self._get(RackRole, '/dcim/rack-roles/{}', rack_role_id)
+
+    async def list_rack_roles(self, fields=None, **query):
+        return await self._list(RackRole, '/dcim/rack-roles', query, fields)
+
+    def iter_rack_roles(self, page_size=None, fields=None, **query):
+        return self._iter(RackRole, '/dcim/rack-roles', query, page_size, fields)
+
+    async def create_rack_role(self, *args, **kwargs):
+        return await self._create('/dcim/rack-roles', payload.rack_role(*args, **kwargs))
+
+    async def delete_rack_role(self, rack_role_id):
+        await self._delete('/dcim/rack-roles/{}', rack_role_id)
+
+    async def rack(self, rack_id):
+        return await self._get(Rack, '/dcim/racks/{}', rack_id)
+
+    async def list_racks(self, fields=None, **query):
+        return await self._list(Rack, '/dcim/racks', query, fields)
+
+    def iter_racks(self, page_size=None, fields=None, **query):
+        return self._iter(Rack, '/dcim/racks', query, page_size, fields)
+
+    async def create_rack(self, *args, **kwargs):
+        return await self._create('/dcim/racks', payload.rack(*args, **kwargs))
+
+    async def delete_rack(self, rack_id):
+        await self._delete('/dcim/racks/{}', rack_id)
+
+    async def platform(self, platform_id):
+        return await self._get(Platform, '/dcim/platforms/{}', platform_id)
+
+    async def create_platform(self, *args, **kwargs):
+        return await self._create('/dcim/platforms', payload.platform(*args, **kwargs))
+
+    async def delete_platform(self, platform_id):
+        await self._delete('/dcim/platforms/{}', platform_id)
+
+    async def manufacturer(self, manufacturer_id):
+        return await self._get(Manufacturer, '/dcim/manufacturers/{}', manufacturer_id)
+
+    async def create_manufacturer(self, *args, **kwargs):
+        return await self._create('/dcim/manufacturers', payload.manufacturer(*args, **kwargs))
+
+    async def delete_manufacturer(self, manufacturer_id):
+        await self._delete('/dcim/manufacturers/{}', manufacturer_id)
+
+    async def device_type(self, device_type_id):
+        return await self._get(DeviceType, '/dcim/device-types/{}', device_type_id)
+
+    async def create_device_type(self, *args, **kwargs):
+        return await self._create('/dcim/device-types', payload.device_type(*args, **kwargs))
+
+    async def delete_device_type(self, device_type_id):
+        await self._delete('/dcim/device-types/{}', device_type_id)
+
+    async def device_role(self, device_role_id):
+        return await self._get(DeviceRole, '/dcim/device-roles/{}', device_role_id)
+
+    async def create_device_role(self, *args, **kwargs):
+        return await self._create('/dcim/device-roles', payload.device_role(*args, **kwargs))
+
+    async def delete_device_role(self, device_role_id):
+        await self._delete('/dcim/device-roles/{}', device_role_id)
+
+    async def device(self, device_id):
+        return await self._get(Device, '/dcim/devices/{}', device_id)
+
+    async def list_devices(self, fields=None, **query):
+        return await self._list(Device, '/dcim/devices', query, fields)
+
+    def iter_devices(self, page_size=None, fields=None, **query):
+        return self._iter(Device, '/dcim/devices', query, page_size, fields)
+
+    async def create_device(self, *args, **kwargs):
+        return await self._create('/dcim/devices', payload.device(*args, **kwargs))
+
+    async def update_device(self, device_id, **fields):
+        await self._update('/dcim/devices/{}', device_id, fields)
+
+    async def delete_device(self, device_id):
+        await self._delete('/dcim/devices/{}', device_id)
+
+    async def bulk_create_devices(self, devices, chunk_size=None):
+        return await self._bulk('post', '/dcim/devices', [payload.device(**d) for d in devices], chunk_size)
+
+    async def bulk_update_devices(self, updates, chunk_size=None):
+        return await self._bulk('patch', '/dcim/devices', updates, chunk_size)
+
+    async def bulk_delete_devices(self, device_ids, chunk_size=None):
+        return await self._bulk_delete('/dcim/devices', device_ids, chunk_size)
+
+
+class AsyncIPAMClient(AsyncNetboxClientPart):
+    """
+    Asyncio counterpart of IPAMClient. Create methods accept the same arguments
+    as their blocking equivalents.
+    """
+
+    async def vrf(self, vrf_id):
+        return await self._get(VRF, '/ipam/vrfs/{}', vrf_id)
+
+    async def list_vrfs(self, fields=None, **query):
+        return await self._list(VRF, '/ipam/vrfs', query, fields)
+
+    def iter_vrfs(self, page_size=None, fields=None, **query):
+        return self._iter(VRF, '/ipam/vrfs', query, page_size, fields)
+
+    async def create_vrf(self, *args, **kwargs):
+        return await self._create('/ipam/vrfs', payload.vrf(*args, **kwargs))
+
+    async def delete_vrf(self, vrf_id):
+        await self._delete('/ipam/vrfs/{}', vrf_id)
+
+    async def prefix_role(self, prefix_role_id):
+        return await self._get(PrefixRole, '/ipam/roles/{}', prefix_role_id)
+
+    async def list_prefix_roles(self, fields=None, **query):
+        return await self._list(PrefixRole, '/ipam/roles', query, fields)
+
+    def iter_prefix_roles(self, page_size=None, fields=None, **query):
+        return self._iter(PrefixRole, '/ipam/roles', query, page_size, fields)
+
+    async def create_prefix_role(self, *args, **kwargs):
+        return await self._create('/ipam/roles', payload.prefix_role(*args, **kwargs))
+
+    async def delete_prefix_role(self, ipam_role_id):
+        await self._delete('/ipam/roles/{}', ipam_role_id)
+
+    async def ip_address(self, ip_address_id):
+        return await self._get(IPAddress, '/ipam/ip-addresses/{}', ip_address_id)
+
+    async def list_ip_addresses(self, fields=None, **query):
+        return await self._list(IPAddress, '/ipam/ip-addresses', query, fields)
+
+    def iter_ip_addresses(self, page_size=None, fields=None, **query):
+        return self._iter(IPAddress, '/ipam/ip-addresses', query, page_size, fields)
+
+    async def create_ip_address(self, *args, **kwargs):
+        return await self._create('/ipam/ip-addresses', payload.ip_address(*args, **kwargs))
+
+    async def delete_ip_address(self, ip_address_id):
+        await self._delete('/ipam/ip-addresses/{}', ip_address_id)
+
+    async def bulk_create_ip_addresses(self, ip_addresses, chunk_size=None):
+        return await self._bulk(
+            'post', '/ipam/ip-addresses', [payload.ip_address(**a) for a in ip_addresses], chunk_size)
+
+    async def bulk_update_ip_addresses(self, updates, chunk_size=None):
+        return await self._bulk('patch', '/ipam/ip-addresses', updates, chunk_size)
+
+    async def bulk_delete_ip_addresses(self, ip_address_ids, chunk_size=None):
+        return await self._bulk_delete('/ipam/ip-addresses', ip_address_ids, chunk_size)
+
+    async def assign_ip(self, address, interface_id, tenant_id, is_primary=False):
+        await self._create(
+            '/ipam/ip-addresses',
+            payload.ip_assignment(address, interface_id, tenant_id, is_primary))
+
+    async def bulk_assign_ips(self, assignments, chunk_size=None):
+        return await self._bulk(
+            'post', '/ipam/ip-addresses', [payload.ip_assignment(**a) for a in assignments], chunk_size)
+
+
+class AsyncTenancyClient(AsyncNetboxClientPart):
+    """
+    Asyncio counterpart of TenancyClient. Create methods accept the same
+    arguments as their blocking equivalents.
+    """
+
+    async def tenant_group(self, tenant_group_id):
+        return await self._get(TenantGroup, '/tenancy/tenant-groups/{}', tenant_group_id)
+
+    async def list_tenant_groups(self, fields=None, **query):
+        return await self._list(TenantGroup, '/tenancy/tenant-groups', query, fields)
+
+    def iter_tenant_groups(self, page_size=None, fields=None, **query):
+        return self._iter(TenantGroup, '/tenancy/tenant-groups', query, page_size, fields)
+
+    async def create_tenant_group(self, *args, **kwargs):
+        return await self._create('/tenancy/tenant-groups', payload.tenant_group(*args, **kwargs))
+
+    async def delete_tenant_group(self, tenant_group_id):
+        await self._delete('/tenancy/tenant-groups/{}', tenant_group_id)
+
+    async def tenant(self, tenant_id):
+        return await self._get(Tenant, '/tenancy/tenants/{}', tenant_id)
+
+    async def list_tenants(self, fields=None, **query):
+        return await self._list(Tenant, '/tenancy/tenants', query, fields)
+
+    def iter_tenants(self, page_size=None, fields=None, **query):
+        return self._iter(Tenant, '/tenancy/tenants', query, page_size, fields)
+
+    async def create_tenant(self, *args, **kwargs):
+        return await self._create('/tenancy/tenants', payload.tenant(*args, **kwargs))
+
+    async def delete_tenant(self, tenant_id):
+        await self._delete('/tenancy/tenants/{}', tenant_id)
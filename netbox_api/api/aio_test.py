@@ -0,0 +1,70 @@
+import asyncio
+import time
+import unittest
+
+from netbox_api.api.aio import aiohttp
+from netbox_api.api.testing import NUM_DEVICES, AsyncServerTestCase, FakeNetbox
+from netbox_api.model import Device
+
+
+class _SlowNetbox(FakeNetbox):
+    def do_GET(self):
+        # Hold back every page after the first so that some are still in flight
+        if 'offset=0' not in self.path and 'offset=' in self.path:
+            time.sleep(0.5)
+
+        super(_SlowNetbox, self).do_GET()
+
+
+@unittest.skipIf(aiohttp is None, 'aiohttp is not installed')
+class WhenUsingTheAsyncClient(AsyncServerTestCase):
+    async def test_get(self):
+        async with self.client() as netbox:
+            device = await netbox.dcim.device(7)
+
+        self.assertEqual(7, device.id)
+        self.assertEqual('DC1', device.site.name)
+
+    async def test_list_follows_next_links(self):
+        async with self.client() as netbox:
+            devices = await netbox.dcim.list_devices(limit=25)
+
+        self.assertEqual(list(range(1, NUM_DEVICES + 1)), [d.id for d in devices])
+
+    async def test_list_prefetches_pages_in_order(self):
+        async with self.client(page_workers=4) as netbox:
+            devices = await netbox.dcim.list_devices(limit=10, offset=50)
+
+        self.assertEqual(list(range(51, NUM_DEVICES + 1)), [d.id for d in devices])
+
+    async def test_concurrent_gets(self):
+        async with self.client() as netbox:
+            devices = await asyncio.gather(*[netbox.dcim.device(i) for i in range(1, 21)])
+
+        self.assertEqual(list(range(1, 21)), [d.id for d in devices])
+
+    async def test_leaving_a_prefetched_listing_early(self):
+        self.server.RequestHandlerClass = _SlowNetbox
+
+        async with self.client(page_workers=4) as netbox:
+            # Listings only prefetch when read in full so page through the handler directly
+            devices = netbox._request_handler.paginate(
+                cls=Device, method='get', url=netbox.dcim._format_url('/dcim/devices'), params={'limit': 10})
+
+            seen = list()
+            async for device in devices:
+                seen.append(device.id)
+                if len(seen) == 15:
+                    break
+
+            await devices.aclose()
+
+            # The pages still in flight were cancelled and waited for
+            others = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+            self.assertEqual([], others)
+
+        self.assertEqual(list(range(1, 16)), seen)
+
+
+if __name__ == '__main__':
+    unittest.main()
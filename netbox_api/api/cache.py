@@ -0,0 +1,180 @@
+"""
+Read-through cache for Netbox GET responses. Entries are keyed by URL and query
+parameters, expire after a per-endpoint TTL and are evicted least recently used
+first once the cache is full. Any create, update or delete sent through the same
+request handler drops every entry for the endpoint it touched.
+
+Expired entries are kept until they are evicted so that they can be revalidated
+with a conditional GET. When the server answers 304 Not Modified the cached
+response is handed back again without a body being transferred or parsed.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from netbox_api.api.protocol import endpoint_template
+
+
+def collection_endpoint(url):
+    """
+    Reduce a request URL to the collection it belongs to, for example both
+    .../api/dcim/sites/ and .../api/dcim/sites/5/ belong to /dcim/sites.
+    """
+    template = endpoint_template(url)
+
+    # Anything past the first ID placeholder belongs to the same collection
+    if '/{}' in template:
+        template = template[:template.index('/{}')]
+
+    return template
+
+
+def _freeze_params(params):
+    if params is None:
+        return tuple()
+
+    return tuple(sorted(
+        ((k, tuple(v) if isinstance(v, (list, tuple)) else v) for k, v in params.items()),
+        key=lambda kv: kv[0]))
+
+
+class CacheEntry(object):
+    def __init__(self, endpoint, response, expires_at):
+        self.endpoint = endpoint
+        self.response = response
+        self.expires_at = expires_at
+
+
+class ResponseCache(object):
+    def __init__(self, max_entries=1024, default_ttl=60, endpoint_ttls=None, clock=time.monotonic):
+        """
+        :param max_entries: number of responses kept before the least recently used is evicted
+        :param default_ttl: seconds a response stays fresh unless its endpoint says otherwise
+        :param endpoint_ttls: dict of collection endpoint, e.g. '/dcim/sites', to TTL in seconds.
+                              A TTL of 0 disables caching for that endpoint.
+        :param clock:
+        """
+        self._max_entries = max_entries
+        self._default_ttl = default_ttl
+        self._endpoint_ttls = dict()
+        self._clock = clock
+        self._lock = threading.Lock()
+
+        # Cache key -> CacheEntry in least to most recently used order
+        self._entries = OrderedDict()
+
+        # Endpoint -> cache keys so invalidation doesn't scan every entry
+        self._endpoint_keys = dict()
+
+        for endpoint, ttl in (endpoint_ttls or dict()).items():
+            self.set_ttl(endpoint, ttl)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def set_ttl(self, endpoint, ttl):
+        # Normalize the endpoint the same way format_url does
+        self._endpoint_ttls['/' + endpoint.strip('/')] = ttl
+
+    def ttl(self, endpoint):
+        return self._endpoint_ttls.get(endpoint, self._default_ttl)
+
+    def lookup(self, method, url, params=None):
+        """
+        Return the cached response for a GET request if there is a fresh one,
+        otherwise None.
+        """
+        if method != 'get':
+            return None
+
+        key = (url, _freeze_params(params))
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.expires_at <= self._clock():
+                return None
+
+            self._entries.move_to_end(key)
+            return entry.response
+
+    def validators(self, method, url, params=None):
+        """
+        Return the conditional request headers that revalidate the cached
+        response for a GET request. The dict is empty when there is nothing
+        cached or the cached response carried no validators.
+        """
+        headers = dict()
+
+        if method != 'get':
+            return headers
+
+        with self._lock:
+            entry = self._entries.get((url, _freeze_params(params)))
+
+        if entry is None:
+            return headers
+
+        etag = entry.response.headers.get('ETag')
+        if etag is not None:
+            headers['If-None-Match'] = etag
+
+        last_modified = entry.response.headers.get('Last-Modified')
+        if last_modified is not None:
+            headers['If-Modified-Since'] = last_modified
+
+        return headers
+
+    def store(self, method, url, params, response):
+        """
+        Record the response to a request and return the response the caller
+        should use. Successful GETs are cached, a 304 Not Modified refreshes
+        and returns the cached response while any other method invalidates the
+        endpoint it was sent to.
+
+        None is returned for a 304 whose cached response has been evicted in
+        the meantime.
+        """
+        endpoint = collection_endpoint(url)
+
+        if method != 'get':
+            self.invalidate(endpoint)
+            return response
+
+        key = (url, _freeze_params(params))
+        ttl = self.ttl(endpoint)
+
+        if response.status_code == 304:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is None:
+                    return None
+
+                entry.expires_at = self._clock() + ttl
+                self._entries.move_to_end(key)
+
+                return entry.response
+
+        if ttl <= 0 or not response.ok:
+            return response
+
+        with self._lock:
+            self._entries[key] = CacheEntry(endpoint, response, self._clock() + ttl)
+            self._entries.move_to_end(key)
+            self._endpoint_keys.setdefault(endpoint, set()).add(key)
+
+            # Evict least recently used entries
+            while len(self._entries) > self._max_entries:
+                evicted_key, evicted = self._entries.popitem(last=False)
+                self._endpoint_keys[evicted.endpoint].discard(evicted_key)
+
+        return response
+
+    def invalidate(self, endpoint):
+        with self._lock:
+            for key in self._endpoint_keys.pop('/' + endpoint.strip('/'), set()):
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._endpoint_keys.clear()
@@ -0,0 +1,94 @@
+import unittest
+
+from netbox_api.api.cache import ResponseCache, collection_endpoint
+
+_SITES = 'http://netbox/api/dcim/sites/'
+_DEVICES = 'http://netbox/api/dcim/devices/'
+
+
+class _Clock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class _Response(object):
+    def __init__(self, status_code=200, headers=None):
+        self.status_code = status_code
+        self.ok = status_code < 400
+        self.headers = headers or dict()
+
+
+class WhenCachingResponses(unittest.TestCase):
+    def setUp(self):
+        self.clock = _Clock()
+        self.cache = ResponseCache(max_entries=2, default_ttl=10, endpoint_ttls={'dcim/devices': 0}, clock=self.clock)
+
+    def test_collection_endpoint(self):
+        self.assertEqual('/dcim/sites', collection_endpoint(_SITES))
+        self.assertEqual('/dcim/sites', collection_endpoint(_SITES + '5/'))
+
+    def test_entries_expire_after_their_ttl(self):
+        response = _Response()
+        self.assertIs(response, self.cache.store('get', _SITES, {'limit': 50}, response))
+
+        self.clock.now = 9.9
+        self.assertIs(response, self.cache.lookup('get', _SITES, {'limit': 50}))
+        self.assertIsNone(self.cache.lookup('get', _SITES, {'limit': 10}))
+
+        self.clock.now = 10.0
+        self.assertIsNone(self.cache.lookup('get', _SITES, {'limit': 50}))
+
+    def test_endpoints_with_no_ttl_are_not_cached(self):
+        self.cache.store('get', _DEVICES, None, _Response())
+        self.assertEqual(0, len(self.cache))
+
+    def test_failed_responses_are_not_cached(self):
+        self.cache.store('get', _SITES, None, _Response(404))
+        self.assertEqual(0, len(self.cache))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        first, second, third = _Response(), _Response(), _Response()
+
+        self.cache.store('get', _SITES + '1/', None, first)
+        self.cache.store('get', _SITES + '2/', None, second)
+
+        # Reading the first entry makes the second the least recently used
+        self.cache.lookup('get', _SITES + '1/')
+        self.cache.store('get', _SITES + '3/', None, third)
+
+        self.assertEqual(2, len(self.cache))
+        self.assertIs(first, self.cache.lookup('get', _SITES + '1/'))
+        self.assertIsNone(self.cache.lookup('get', _SITES + '2/'))
+        self.assertIs(third, self.cache.lookup('get', _SITES + '3/'))
+
+    def test_writes_invalidate_their_endpoint(self):
+        self.cache.store('get', _SITES, None, _Response())
+        self.cache.store('get', _SITES + '1/', None, _Response())
+
+        self.cache.store('patch', _SITES + '1/', None, _Response())
+        self.assertEqual(0, len(self.cache))
+
+    def test_not_modified_refreshes_the_cached_response(self):
+        response = _Response(headers={'ETag': '"v1"'})
+        self.cache.store('get', _SITES, None, response)
+
+        self.clock.now = 15
+        self.assertIsNone(self.cache.lookup('get', _SITES))
+        self.assertEqual({'If-None-Match': '"v1"'}, self.cache.validators('get', _SITES))
+
+        self.assertIs(response, self.cache.store('get', _SITES, None, _Response(304)))
+        self.assertIs(response, self.cache.lookup('get', _SITES))
+
+    def test_not_modified_after_eviction_returns_none(self):
+        self.cache.store('get', _SITES, None, _Response(headers={'ETag': '"v1"'}))
+        self.cache.store('get', _SITES + '1/', None, _Response())
+        self.cache.store('get', _SITES + '2/', None, _Response())
+
+        self.assertIsNone(self.cache.store('get', _SITES, None, _Response(304)))
+
+
+if __name__ == '__main__':
+    unittest.main()
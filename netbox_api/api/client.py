@@ -1,17 +1,45 @@
+from netbox_api.api import payload
+from netbox_api.api.common import PER_OBJECT_METHODS, project
 from netbox_api.api.protocol import RequestHandler
 from netbox_api.model import *
 
+# Number of items sent per request by the bulk_* methods
+BULK_CHUNK_SIZE = 100
+
+# Number of IDs sent per request by multi-valued filters, keeps URLs well within common length limits
+FILTER_CHUNK_SIZE = 100
+
 
 class NetboxClient(object):
-    def __init__(self, host, port, token, scheme, verify=None):
+    def __init__(self, host, port, token, scheme, verify=None, page_workers=1, cache=None, identity_map=None,
+                 lazy_models=False, json_decoder=None, stream_pages=False, connection=None, throttle=None):
         # Request handling
-        self._request_handler = RequestHandler(host, port, token, scheme, verify)
+        self._request_handler = RequestHandler(
+            host, port, token, scheme, verify, page_workers, cache, identity_map, lazy_models, json_decoder,
+            stream_pages, connection, throttle)
 
         # Client parts
         self.ipam = IPAMClient(self._request_handler)
         self.dcim = DCIMClient(self._request_handler)
         self.tenancy = TenancyClient(self._request_handler)
 
+    @property
+    def throttle(self):
+        """
+        The throttle shared by every client part, see Throttle.metrics for the current limits.
+        """
+        return self._request_handler.throttle
+
+    @property
+    def hooks(self):
+        """
+        Hooks called with every request event, see netbox_api.api.metrics.
+        """
+        return self._request_handler.hooks
+
+    def close(self):
+        self._request_handler.close()
+
 
 class NetboxClientPart(object):
     def __init__(self, request_handler):
@@ -33,16 +61,128 @@ class NetboxClientPart(object):
             url=url,
             **kwargs)
 
-    def _list(self, cls, uri, query_params):
+    def _list(self, cls, uri, query_params, fields=None):
+        """
+        List every result of a listing.
+
+        When fields are given the server is asked for only those fields and
+        lightweight records holding just them are returned instead of models,
+        see netbox_api.model.projection. Servers that don't support sparse
+        fieldsets send everything, which is then dropped without being built.
+
+        :param cls:
+        :param uri:
+        :param query_params:
+        :param fields: names of the fields to return, None for full models
+        :return:
+        """
+        cls, query_params = project(cls, query_params, fields)
+
         itr = self._paginate(
             cls=cls,
             method='get',
             url=self._format_url(uri),
             params=query_params)
 
-        # TODO: Expose this as an optimization for other components later
         return [r for r in itr]
 
+    def _iter(self, cls, uri, query_params, page_size=None, fields=None):
+        """
+        Lazily iterate over a listing. Pages are requested one at a time as
+        the caller consumes results so that only a single page of models is
+        held in memory and abandoning the iterator skips the remaining pages.
+
+        :param cls:
+        :param uri:
+        :param query_params:
+        :param page_size: number of results to request per page
+        :param fields: names of the fields to return, None for full models. See _list.
+        :return:
+        """
+        cls, query_params = project(cls, query_params, fields)
+
+        if page_size is not None:
+            query_params = dict(query_params, limit=page_size)
+
+        return self._paginate(
+            cls=cls,
+            method='get',
+            url=self._format_url(uri),
+            params=query_params,
+            workers=1)
+
+    def _count(self, uri, query_params):
+        # Only the count is wanted so keep the page as small as possible
+        resp = self._request(
+            method='get',
+            url=self._format_url(uri),
+            params=dict(query_params, limit=1))
+
+        # Raise on bad status codes
+        resp.raise_on_status()
+
+        return resp.count
+
+    def _bulk(self, method, uri, bodies, chunk_size=None):
+        """
+        Send a list of bodies to a bulk endpoint, splitting it into chunks of
+        at most chunk_size items. One BulkResult is returned per body in the
+        order the bodies were given. A rejected chunk doesn't stop the chunks
+        after it from being sent.
+
+        Netbox accepts bulk updates and deletes from 2.10 on. Older servers
+        answer them with a 405, in which case every remaining item is sent to
+        its own object instead.
+
+        :param method:
+        :param uri:
+        :param bodies:
+        :param chunk_size:
+        :return:
+        """
+        if chunk_size is None:
+            chunk_size = BULK_CHUNK_SIZE
+
+        bodies = list(bodies)
+        results = list()
+
+        for offset in range(0, len(bodies), chunk_size):
+            chunk = bodies[offset:offset + chunk_size]
+
+            resp = self._request(
+                method=method,
+                url=self._format_url(uri),
+                json=chunk)
+
+            if resp.status_code == 405 and method in PER_OBJECT_METHODS:
+                results.extend(self._per_object(method, uri, bodies[offset:]))
+                break
+
+            results.extend(resp.bulk_results([b.get('id') for b in chunk]))
+
+        return results
+
+    def _per_object(self, method, uri, bodies):
+        # Fallback for servers without bulk updates and deletes, see _bulk
+        results = list()
+
+        for body in bodies:
+            kwargs = dict()
+            if method == 'patch':
+                kwargs['json'] = dict((k, v) for k, v in body.items() if k != 'id')
+
+            resp = self._request(
+                method=method,
+                url=self._format_url(uri + '/{}', body['id']),
+                **kwargs)
+
+            results.append(resp.item_result(body['id']))
+
+        return results
+
+    def _bulk_delete(self, uri, ids, chunk_size=None):
+        return self._bulk('delete', uri, [{'id': obj_id} for obj_id in ids], chunk_size)
+
 
 class DCIMClient(NetboxClientPart):
     def interface(self, interface_id):
@@ -62,8 +202,36 @@ class DCIMClient(NetboxClientPart):
         # If there are results, return them
         return resp.wrap_results(Interface)[0]
 
-    def list_interfaces(self, **query):
-        return self._list(Interface, '/dcim/interfaces', query)
+    def list_interfaces(self, fields=None, **query):
+        return self._list(Interface, '/dcim/interfaces', query, fields)
+
+    def iter_interfaces(self, page_size=None, fields=None, **query):
+        return self._iter(Interface, '/dcim/interfaces', query, page_size, fields)
+
+    def list_interfaces_for_devices(self, device_ids, chunk_size=None, fields=None, **query):
+        """
+        List the interfaces of many devices with as few requests as possible. The device IDs are
+        sent as a multi-valued device_id filter, chunk_size IDs per request.
+
+        :param device_ids:
+        :param chunk_size:
+        :param fields: names of the fields to return, None for full models
+        :param query: additional filters applied to every request
+        :return:
+        """
+        return [i for i in self.iter_interfaces_for_devices(device_ids, chunk_size, fields, **query)]
+
+    def iter_interfaces_for_devices(self, device_ids, chunk_size=None, fields=None, **query):
+        if chunk_size is None:
+            chunk_size = FILTER_CHUNK_SIZE
+
+        device_ids = list(device_ids)
+
+        for offset in range(0, len(device_ids), chunk_size):
+            chunk_query = dict(query, device_id=device_ids[offset:offset + chunk_size])
+
+            for interface in self._list(Interface, '/dcim/interfaces', chunk_query, fields):
+                yield interface
 
     def create_interface(self, name, form_factor, device_id, mac_address=None, management_only=False, parent_lag=None):
         """
@@ -77,21 +245,10 @@ class DCIMClient(NetboxClientPart):
         :param parent_lag:
         :return:
         """
-        # Map constants
-        if isinstance(form_factor, FormFactorConstant):
-            form_factor = form_factor.value
-
         resp = self._request(
             method='post',
             url=self._format_url('/dcim/interfaces'),
-            json={
-                'name': name,
-                'form_factor': form_factor,
-                'mac_address': mac_address,
-                'lag': parent_lag,
-                'device': device_id,
-                'mgmt_only': management_only
-            })
+            json=payload.interface(name, form_factor, device_id, mac_address, management_only, parent_lag))
 
         # Raise on bad status codes
         resp.raise_on_status()
@@ -113,6 +270,32 @@ class DCIMClient(NetboxClientPart):
         # Raise on bad status codes
         resp.raise_on_status()
 
+    def bulk_create_interfaces(self, interfaces, chunk_size=None):
+        """
+        Create many device interfaces in as few requests as possible. Each entry is a dict of
+        create_interface keyword arguments. A BulkResult holding the new interface's ID or the
+        error that rejected it is returned for each entry, in order.
+
+        :param interfaces:
+        :param chunk_size:
+        :return:
+        """
+        return self._bulk('post', '/dcim/interfaces', [payload.interface(**i) for i in interfaces], chunk_size)
+
+    def bulk_update_interfaces(self, updates, chunk_size=None):
+        """
+        Patch many device interfaces at once. Each entry is a dict of the fields to change and
+        must include the interface's 'id'.
+
+        :param updates:
+        :param chunk_size:
+        :return:
+        """
+        return self._bulk('patch', '/dcim/interfaces', updates, chunk_size)
+
+    def bulk_delete_interfaces(self, interface_ids, chunk_size=None):
+        return self._bulk_delete('/dcim/interfaces', interface_ids, chunk_size)
+
     def connect_interfaces(self, status, interface_a_id, interface_b_id):
         """
         Connect two device interfaces and assign the connection a status.
@@ -125,11 +308,7 @@ class DCIMClient(NetboxClientPart):
         resp = self._request(
             method='post',
             url=self._format_url('/dcim/interface-connections'),
-            json={
-                'connection_status': status,
-                'interface_a': interface_a_id,
-                'interface_b': interface_b_id
-            })
+            json=payload.interface_connection(status, interface_a_id, interface_b_id))
 
         # Raise on bad status codes
         resp.raise_on_status()
@@ -145,18 +324,17 @@ class DCIMClient(NetboxClientPart):
         # If there are results, return them
         return resp.wrap_results(Region)[0]
 
-    def list_interfaces(self, **query):
-        return self._list(Region, '/dcim/regions', query)
+    def list_regions(self, fields=None, **query):
+        return self._list(Region, '/dcim/regions', query, fields)
+
+    def iter_regions(self, page_size=None, fields=None, **query):
+        return self._iter(Region, '/dcim/regions', query, page_size, fields)
 
     def create_region(self, name, slug, parent_region_id=None):
         resp = self._request(
             method='post',
             url=self._format_url('/dcim/regions'),
-            json={
-                'name': name,
-                'slug': slug,
-                'parent': parent_region_id
-            })
+            json=payload.region(name, slug, parent_region_id))
 
         # Raise on bad status codes
         resp.raise_on_status()
@@ -189,8 +367,11 @@ class DCIMClient(NetboxClientPart):
         # If there are results, return them
         return resp.wrap_results(Site)[0]
 
-    def list_sites(self, **query):
-        return self._list(Site, '/dcim/sites', query)
+    def list_sites(self, fields=None, **query):
+        return self._list(Site, '/dcim/sites', query, fields)
+
+    def iter_sites(self, page_size=None, fields=None, **query):
+        return self._iter(Site, '/dcim/sites', query, page_size, fields)
 
     def create_site(self, name, slug, tenant_id, region_id, contact_email=None, physical_address=None,
                     shipping_address=None, contact_name=None, contact_phone=None, asn=None, comments=None,
@@ -198,21 +379,9 @@ class DCIMClient(NetboxClientPart):
         resp = self._request(
             method='post',
             url=self._format_url('/dcim/sites'),
-            json={
-                'name': name,
-                'slug': slug,
-                'facility': facility,
-                'tenant': tenant_id,
-                'region': region_id,
-                'contact_name': contact_name,
-                'contact_phone': contact_phone,
-                'contact_email': contact_email,
-                'physical_address': physical_address,
-                'shipping_address': shipping_address,
-                'comments': comments,
-                'asn': asn,
-                'custom_fields': custom_fields if custom_fields is not None else dict()
-            })
+            json=payload.site(
+                name, slug, tenant_id, region_id, contact_email, physical_address, shipping_address, contact_name,
+                contact_phone, asn, comments, facility, custom_fields))
 
         # Raise on bad status codes
         resp.raise_on_status()
@@ -239,18 +408,17 @@ class DCIMClient(NetboxClientPart):
         # If there are results, return them
         return resp.wrap_results(RackGroup)[0]
 
-    def list_rack_groups(self, **query):
-        return self._list(RackGroup, '/dcim/rack-groups', query)
+    def list_rack_groups(self, fields=None, **query):
+        return self._list(RackGroup, '/dcim/rack-groups', query, fields)
+
+    def iter_rack_groups(self, page_size=None, fields=None, **query):
+        return self._iter(RackGroup, '/dcim/rack-groups', query, page_size, fields)
 
     def create_rack_group(self, name, slug, site_id):
         resp = self._request(
             method='post',
             url=self._format_url('/dcim/rack-groups'),
-            json={
-                'name': name,
-                'slug': slug,
-                'site': site_id
-            })
+            json=payload.rack_group(name, slug, site_id))
 
         # Raise on bad status codes
         resp.raise_on_status()
@@ -277,18 +445,17 @@ class DCIMClient(NetboxClientPart):
         # If there are results, return them
         return resp.wrap_results(RackRole)[0]
 
-    def list_rack_roles(self, **query):
-        return self._list(RackRole, '/dcim/rack-roles', query)
+    def list_rack_roles(self, fields=None, **query):
+        return self._list(RackRole, '/dcim/rack-roles', query, fields)
+
+    def iter_rack_roles(self, page_size=None, fields=None, **query):
+        return self._iter(RackRole, '/dcim/rack-roles', query, page_size, fields)
 
     def create_rack_role(self, name, slug, color='000000'):
         resp = self._request(
             method='post',
             url=self._format_url('/dcim/rack-roles'),
-            json={
-                'name': name,
-                'slug': slug,
-                'color': color
-            })
+            json=payload.rack_role(name, slug, color))
 
         # Raise on bad status codes
         resp.raise_on_status()
@@ -315,34 +482,20 @@ class DCIMClient(NetboxClientPart):
         # If there are results, return them
         return resp.wrap_results(Rack)[0]
 
-    def list_racks(self, **query):
-        return self._list(Rack, '/dcim/racks', query)
+    def list_racks(self, fields=None, **query):
+        return self._list(Rack, '/dcim/racks', query, fields)
+
+    def iter_racks(self, page_size=None, fields=None, **query):
+        return self._iter(Rack, '/dcim/racks', query, page_size, fields)
 
     def create_rack(self, name, rack_group_id, site_id, tenant_id, u_height, width, descending_units, rack_type,
                     rack_role_id=None, facility=None, comments='', custom_fields=None):
-        # Map constants to their values for the API
-        if isinstance(rack_type, RackTypeConstant):
-            rack_type = rack_type.value
-        if isinstance(width, RackWidthConstant):
-            width = width.value
-
         resp = self._request(
             method='post',
             url=self._format_url('/dcim/racks'),
-            json={
-                'name': name,
-                'u_height': u_height,
-                'width': width,
-                'group': rack_group_id,
-                'site': site_id,
-                'facility_id': facility,
-                'role': rack_role_id,
-                'desc_units': descending_units,
-                'type': rack_type,
-                'tenant': tenant_id,
-                'comments': comments,
-                'custom_fields': custom_fields if custom_fields is not None else dict()
-            })
+            json=payload.rack(
+                name, rack_group_id, site_id, tenant_id, u_height, width, descending_units, rack_type, rack_role_id,
+                facility, comments, custom_fields))
 
         # Raise on bad status codes
         resp.raise_on_status()
@@ -373,11 +526,7 @@ class DCIMClient(NetboxClientPart):
         resp = self._request(
             method='post',
             url=self._format_url('/dcim/platforms'),
-            json={
-                'name': name,
-                'slug': slug,
-                'rpc_client': rpc_client
-            })
+            json=payload.platform(name, slug, rpc_client))
 
         # Raise on bad status codes
         resp.raise_on_status()
@@ -408,10 +557,7 @@ class DCIMClient(NetboxClientPart):
         resp = self._request(
             method='post',
             url=self._format_url('/dcim/manufacturers'),
-            json={
-                'name': name,
-                'slug': slug,
-            })
+            json=payload.manufacturer(name, slug))
 
         # Raise on bad status codes
         resp.raise_on_status()
@@ -442,30 +588,12 @@ class DCIMClient(NetboxClientPart):
                            interface_ordering=InterfaceOrderConstant.BY_RACK_POSITION, is_console_server=False,
                            is_network_device=False, subdevice_role=SubdeviceTypeConstant.NONE, is_full_depth=False,
                            is_pdu=False, comments='', custom_fields=None):
-        # Map constants
-        if isinstance(subdevice_role, SubdeviceTypeConstant):
-            subdevice_role = subdevice_role.value
-        if isinstance(interface_ordering, InterfaceOrderConstant):
-            interface_ordering = interface_ordering.value
-
         resp = self._request(
             method='post',
             url=self._format_url('/dcim/device-types'),
-            json={
-                'model': model,
-                'slug': slug,
-                'u_height': u_height,
-                'is_pdu': is_pdu,
-                'is_full_depth': is_full_depth,
-                'subdevice_role': subdevice_role,
-                'is_console_server': is_console_server,
-                'is_network_device': is_network_device,
-                'part_number': part_number,
-                'interface_ordering': interface_ordering,
-                'manufacturer': manufacturer_id,
-                'comments': comments,
-                'custom_fields': custom_fields if custom_fields is not None else dict()
-            })
+            json=payload.device_type(
+                model, slug, u_height, manufacturer_id, part_number, interface_ordering, is_console_server,
+                is_network_device, subdevice_role, is_full_depth, is_pdu, comments, custom_fields))
 
         # Raise on bad status codes
         resp.raise_on_status()
@@ -496,11 +624,7 @@ class DCIMClient(NetboxClientPart):
         resp = self._request(
             method='post',
             url=self._format_url('/dcim/device-roles'),
-            json={
-                'name': name,
-                'slug': slug,
-                'color': color
-            })
+            json=payload.device_role(name, slug, color))
 
         # Raise on bad status codes
         resp.raise_on_status()
@@ -533,40 +657,66 @@ class DCIMClient(NetboxClientPart):
         # If there are results, return them
         return resp.wrap_results(Device)[0]
 
-    def list_devices(self, **query):
-        return self._list(Device, '/dcim/devices', query)
+    def list_devices(self, fields=None, **query):
+        return self._list(Device, '/dcim/devices', query, fields)
+
+    def iter_devices(self, page_size=None, fields=None, **query):
+        return self._iter(Device, '/dcim/devices', query, page_size, fields)
+
+    def count_devices(self, **query):
+        return self._count('/dcim/devices', query)
+
+    def list_devices_tagged(self, tags, fields=None, **query):
+        return [d for d in self.iter_devices_tagged(tags, fields=fields, **query)]
+
+    def iter_devices_tagged(self, tags, page_size=None, fields=None, **query):
+        """
+        Iterate over the devices that carry every one of the given tags in their Tags custom field.
+
+        Netbox can only filter a custom field by a single value, so when several tags are given the
+        number of devices matching each one is asked for first and only the devices matching the
+        rarest tag are downloaded. The remaining tags are then checked against each device's parsed
+        tag set.
+
+        :param tags:
+        :param page_size:
+        :param fields: names of the fields to return, None for full models. custom_fields is always
+                       included since the tags are checked against it.
+        :param query: additional filters
+        :return:
+        """
+        tags = parse_tags(','.join(tags))
+        if len(tags) == 0:
+            return self.iter_devices(page_size, fields, **query)
+
+        if fields is not None and 'custom_fields' not in fields:
+            fields = list(fields) + ['custom_fields']
+
+        server_tag = next(iter(tags))
+
+        if len(tags) > 1:
+            counts = dict((tag, self.count_devices(**dict(query, cf_Tags=tag))) for tag in tags)
+            server_tag = min(tags, key=lambda tag: counts[tag])
+
+            # Nothing can match if any one tag matches nothing
+            if counts[server_tag] == 0:
+                return iter(list())
+
+        devices = self.iter_devices(page_size, fields, **dict(query, cf_Tags=server_tag))
+
+        # The server side match is a substring match on the raw field so check the parsed tags
+        return (d for d in devices if d.custom_fields.has_tags(tags))
 
     def create_device(self, name, device_role_id, site_id, status=DeviceStatusConstant.ACTIVE, custom_fields=None,
                       comments='', rack_face=RackFaceConstant.FRONT, asset_tag=None, platform_id=None,
                       primary_ip4_id=None, primary_ip6_id=None, position=0, device_type_id=None, serial=None,
                       rack_id=None, tenant_id=None):
-        # Map constants
-        if isinstance(status, DeviceStatusConstant):
-            status = status.value
-        if isinstance(rack_face, RackFaceConstant):
-            rack_face = rack_face.value
-
         resp = self._request(
             method='post',
             url=self._format_url('/dcim/devices'),
-            json={
-                'status': status,
-                'device_role': device_role_id,
-                'name': name,
-                'site': site_id,
-                'comments': comments,
-                'face': rack_face,
-                'asset_tag': asset_tag,
-                'platform': platform_id,
-                'device_type': device_type_id,
-                'primary_ip4': primary_ip4_id,
-                'primary_ip6': primary_ip6_id,
-                'position': position,
-                'serial': serial,
-                'rack': rack_id,
-                'tenant': tenant_id,
-                'custom_fields': custom_fields if custom_fields is not None else dict()
-            })
+            json=payload.device(
+                name, device_role_id, site_id, status, custom_fields, comments, rack_face, asset_tag, platform_id,
+                primary_ip4_id, primary_ip6_id, position, device_type_id, serial, rack_id, tenant_id))
 
         # Raise on bad status codes
         resp.raise_on_status()
@@ -591,6 +741,31 @@ class DCIMClient(NetboxClientPart):
         # Raise on bad status codes
         resp.raise_on_status()
 
+    def bulk_create_devices(self, devices, chunk_size=None):
+        """
+        Create many devices in as few requests as possible. Each entry is a dict of create_device
+        keyword arguments. A BulkResult is returned for each entry, in order.
+
+        :param devices:
+        :param chunk_size:
+        :return:
+        """
+        return self._bulk('post', '/dcim/devices', [payload.device(**d) for d in devices], chunk_size)
+
+    def bulk_update_devices(self, updates, chunk_size=None):
+        """
+        Patch many devices at once. Each entry is a dict of the fields to change and must include
+        the device's 'id'.
+
+        :param updates:
+        :param chunk_size:
+        :return:
+        """
+        return self._bulk('patch', '/dcim/devices', updates, chunk_size)
+
+    def bulk_delete_devices(self, device_ids, chunk_size=None):
+        return self._bulk_delete('/dcim/devices', device_ids, chunk_size)
+
 
 class IPAMClient(NetboxClientPart):
     def vrf(self, vrf_id):
@@ -604,8 +779,11 @@ class IPAMClient(NetboxClientPart):
         # If there are results, return them
         return resp.wrap_results(VRF)[0]
 
-    def list_vrfs(self, **query):
-        return self._list(VRF, '/ipam/vrfs', query)
+    def list_vrfs(self, fields=None, **query):
+        return self._list(VRF, '/ipam/vrfs', query, fields)
+
+    def iter_vrfs(self, page_size=None, fields=None, **query):
+        return self._iter(VRF, '/ipam/vrfs', query, page_size, fields)
 
     def create_vrf(self, name, route_distinguisher, tenant_id, enforce_unique=False, description=None,
                    custom_fields=None):
@@ -615,14 +793,7 @@ class IPAMClient(NetboxClientPart):
         resp = self._request(
             method='post',
             url=self._format_url('/ipam/vrfs'),
-            json={
-                'name': name,
-                'rd': route_distinguisher,
-                'tenant': tenant_id,
-                'enforce_unique': enforce_unique,
-                'description': description,
-                'custom_fields': custom_fields if custom_fields is not None else dict(),
-            })
+            json=payload.vrf(name, route_distinguisher, tenant_id, enforce_unique, description, custom_fields))
 
         # Raise on bad status codes
         resp.raise_on_status()
@@ -649,8 +820,11 @@ class IPAMClient(NetboxClientPart):
         # If there are results, return them
         return resp.wrap_results(PrefixRole)[0]
 
-    def list_prefix_roles(self, **query):
-        return self._list(PrefixRole, '/ipam/roles', query)
+    def list_prefix_roles(self, fields=None, **query):
+        return self._list(PrefixRole, '/ipam/roles', query, fields)
+
+    def iter_prefix_roles(self, page_size=None, fields=None, **query):
+        return self._iter(PrefixRole, '/ipam/roles', query, page_size, fields)
 
     def create_prefix_role(self, name, slug, weight=0):
         """
@@ -662,11 +836,7 @@ class IPAMClient(NetboxClientPart):
         resp = self._request(
             method='post',
             url=self._format_url('/ipam/roles'),
-            json={
-                'name': name,
-                'slug': slug,
-                'weight': weight
-            })
+            json=payload.prefix_role(name, slug, weight))
 
         # Raise on bad status codes
         resp.raise_on_status()
@@ -693,31 +863,19 @@ class IPAMClient(NetboxClientPart):
         # If there are results, return them
         return resp.wrap_results(IPAddress)[0]
 
-    def list_ip_addresses(self, **query):
-        return self._list(IPAddress, '/ipam/ip-addresses', query)
+    def list_ip_addresses(self, fields=None, **query):
+        return self._list(IPAddress, '/ipam/ip-addresses', query, fields)
+
+    def iter_ip_addresses(self, page_size=None, fields=None, **query):
+        return self._iter(IPAddress, '/ipam/ip-addresses', query, page_size, fields)
 
     def create_ip_address(self, address, status, tenant_id, role=None, interface_id=None, vrf_id=None,
                           nat_inside=None, description=None, custom_fields=None):
-        # Map constants
-        if isinstance(status, IPAddressStatusConstant):
-            status = status.value
-        if isinstance(role, IPAddressRoleConstant):
-            role = role.value
-
         resp = self._request(
             method='post',
             url=self._format_url('/ipam/ip-addresses'),
-            json={
-                'description': description,
-                'tenant': tenant_id,
-                'interface': interface_id,
-                'vrf': vrf_id,
-                'role': role,
-                'status': status,
-                'address': address,
-                'nat_inside': nat_inside,
-                'custom_fields': custom_fields if custom_fields is not None else dict()
-            })
+            json=payload.ip_address(
+                address, status, tenant_id, role, interface_id, vrf_id, nat_inside, description, custom_fields))
 
         # Raise on bad status codes
         resp.raise_on_status()
@@ -733,6 +891,31 @@ class IPAMClient(NetboxClientPart):
         # Raise on bad status codes
         resp.raise_on_status()
 
+    def bulk_create_ip_addresses(self, ip_addresses, chunk_size=None):
+        """
+        Create many IP addresses in as few requests as possible. Each entry is a dict of
+        create_ip_address keyword arguments. A BulkResult is returned for each entry, in order.
+
+        :param ip_addresses:
+        :param chunk_size:
+        :return:
+        """
+        return self._bulk('post', '/ipam/ip-addresses', [payload.ip_address(**a) for a in ip_addresses], chunk_size)
+
+    def bulk_update_ip_addresses(self, updates, chunk_size=None):
+        """
+        Patch many IP addresses at once. Each entry is a dict of the fields to change and must
+        include the IP address' 'id'.
+
+        :param updates:
+        :param chunk_size:
+        :return:
+        """
+        return self._bulk('patch', '/ipam/ip-addresses', updates, chunk_size)
+
+    def bulk_delete_ip_addresses(self, ip_address_ids, chunk_size=None):
+        return self._bulk_delete('/ipam/ip-addresses', ip_address_ids, chunk_size)
+
     def assign_ip(self, address, interface_id, tenant_id, is_primary=False):
         """
         Assign an IP address to an interface.
@@ -746,16 +929,22 @@ class IPAMClient(NetboxClientPart):
         resp = self._request(
             method='post',
             url=self._format_url('/ipam/ip-addresses'),
-            json={
-                'is_primary': is_primary,
-                'address': address,
-                'interface': interface_id,
-                'tenant': tenant_id
-            })
+            json=payload.ip_assignment(address, interface_id, tenant_id, is_primary))
 
         # Raise on bad status codes
         resp.raise_on_status()
 
+    def bulk_assign_ips(self, assignments, chunk_size=None):
+        """
+        Assign many IP addresses to interfaces at once. Each entry is a dict of assign_ip keyword
+        arguments. A BulkResult holding the new IP address' ID is returned for each entry, in order.
+
+        :param assignments:
+        :param chunk_size:
+        :return:
+        """
+        return self._bulk('post', '/ipam/ip-addresses', [payload.ip_assignment(**a) for a in assignments], chunk_size)
+
 
 class TenancyClient(NetboxClientPart):
     def tenant_group(self, tenant_group_id):
@@ -769,17 +958,17 @@ class TenancyClient(NetboxClientPart):
         # If there are results, return them
         return resp.wrap_results(TenantGroup)[0]
 
-    def list_tenant_groups(self, **query):
-        return self._list(TenantGroup, '/tenancy/tenant-groups', query)
+    def list_tenant_groups(self, fields=None, **query):
+        return self._list(TenantGroup, '/tenancy/tenant-groups', query, fields)
+
+    def iter_tenant_groups(self, page_size=None, fields=None, **query):
+        return self._iter(TenantGroup, '/tenancy/tenant-groups', query, page_size, fields)
 
     def create_tenant_group(self, name, slug):
         resp = self._request(
             method='post',
             url=self._format_url('/tenancy/tenant-groups'),
-            json={
-                'name': name,
-                'slug': slug
-            })
+            json=payload.tenant_group(name, slug))
 
         # Raise on bad status codes
         resp.raise_on_status()
@@ -812,21 +1001,17 @@ class TenancyClient(NetboxClientPart):
         # If there are results, return them
         return resp.wrap_results(Tenant)[0]
 
-    def list_tenants(self, **query):
-        return self._list(Tenant, '/tenancy/tenants', query)
+    def list_tenants(self, fields=None, **query):
+        return self._list(Tenant, '/tenancy/tenants', query, fields)
+
+    def iter_tenants(self, page_size=None, fields=None, **query):
+        return self._iter(Tenant, '/tenancy/tenants', query, page_size, fields)
 
     def create_tenant(self, name, slug, tenant_group_id, description=None, comments=None, custom_fields=None):
         resp = self._request(
             method='post',
             url=self._format_url('/tenancy/tenants'),
-            json={
-                'name': name,
-                'slug': slug,
-                'group': tenant_group_id,
-                'description': description,
-                'comments': comments,
-                'custom_fields': custom_fields if custom_fields is not None else dict()
-            })
+            json=payload.tenant(name, slug, tenant_group_id, description, comments, custom_fields))
 
         # Raise on bad status codes
         resp.raise_on_status()
@@ -0,0 +1,25 @@
+"""
+Helpers shared by the blocking and asyncio clients for shaping listing queries
+and bulk writes the same way on both.
+"""
+from netbox_api.model import projection
+
+# Bulk methods that fall back to one request per object on servers older than Netbox 2.10
+PER_OBJECT_METHODS = ('patch', 'delete')
+
+
+def project(cls, query_params, fields):
+    """
+    Swap the model for a record builder and ask the server for a sparse
+    fieldset, see netbox_api.model.projection.
+
+    :param cls: model class the listing builds
+    :param query_params: query of the listing
+    :param fields: names of the fields to keep, None to keep every field
+    :return: (class to build results with, query to send)
+    """
+    if fields is None:
+        return cls, query_params
+
+    fields = list(fields)
+    return projection(cls, fields), dict(query_params, fields=','.join(fields))
@@ -0,0 +1,48 @@
+"""
+JSON decoders for response bodies. Every decoder takes the raw body bytes and
+raises ValueError when they aren't valid JSON. The fastest installed backend is
+used unless one is asked for by name, falling back to the standard library.
+"""
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+# Backends in order of preference
+DECODERS = dict()
+
+if orjson is not None:
+    DECODERS['orjson'] = orjson.loads
+
+if ujson is not None:
+    DECODERS['ujson'] = ujson.loads
+
+DECODERS['json'] = json.loads
+
+
+def get_decoder(decoder=None):
+    """
+    Resolve a decoder. Callables are handed back as they are, names pick an
+    installed backend and None picks the fastest one installed.
+
+    :param decoder: None, a backend name from DECODERS or a callable taking the body bytes
+    :return:
+    """
+    if decoder is None:
+        return next(iter(DECODERS.values()))
+
+    if callable(decoder):
+        return decoder
+
+    if decoder not in DECODERS:
+        raise ValueError('JSON decoder {} is not installed, available decoders are: {}'.format(
+            decoder, ', '.join(DECODERS)))
+
+    return DECODERS[decoder]
@@ -0,0 +1,55 @@
+import json
+import unittest
+
+from netbox_api.api.decoder import DECODERS, get_decoder
+from netbox_api.api.testing import ServerTestCase
+
+
+class WhenResolvingDecoders(unittest.TestCase):
+    def test_fastest_installed_decoder_is_the_default(self):
+        self.assertIs(next(iter(DECODERS.values())), get_decoder())
+
+    def test_decoders_are_picked_by_name(self):
+        self.assertIs(json.loads, get_decoder('json'))
+
+    def test_callables_are_used_as_they_are(self):
+        decoder = lambda content: {}
+        self.assertIs(decoder, get_decoder(decoder))
+
+    def test_unknown_names_are_rejected(self):
+        with self.assertRaises(ValueError):
+            get_decoder('simplejson-but-faster')
+
+    def test_installed_decoders_agree(self):
+        content = b'{"count": 1, "results": [{"id": 1, "name": "h\\u00f6st", "serial": null, "weight": 1.5}]}'
+
+        for name, decoder in DECODERS.items():
+            self.assertEqual(json.loads(content), decoder(content), name)
+
+    def test_installed_decoders_raise_value_error_on_bad_content(self):
+        for name, decoder in DECODERS.items():
+            with self.assertRaises(ValueError, msg=name):
+                decoder(b'{"count": ')
+
+
+class WhenUsingACustomDecoder(ServerTestCase):
+    def setUp(self):
+        super(WhenUsingACustomDecoder, self).setUp()
+        self.decoded = list()
+
+        def decoder(content):
+            self.decoded.append(len(content))
+            return json.loads(content)
+
+        self.netbox = self.client(json_decoder=decoder)
+
+    def test_responses_are_decoded_with_it(self):
+        self.assertEqual(7, self.netbox.dcim.device(7).id)
+        self.assertEqual(1, len(self.decoded))
+
+        self.assertEqual(120, len(self.netbox.dcim.list_devices(limit=50)))
+        self.assertEqual(4, len(self.decoded))
+
+
+if __name__ == '__main__':
+    unittest.main()
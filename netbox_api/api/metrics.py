@@ -0,0 +1,221 @@
+"""
+Instrumentation of the requests sent to Netbox. Hooks registered on a client
+are called with the name of the event and a RequestEvent describing the request
+it belongs to:
+
+- request: the response arrived, or was served from the cache
+- decode: the response body was decoded from JSON
+- wrap: the decoded results were built into models
+- paginate: a listing was read to the end
+
+Latencies of listings, and of streamed pages, include the time the caller spent
+on the results before asking for more.
+
+HistogramCollector is a hook that keeps latency, size and timing histograms per
+method, endpoint template and status, and renders them in the Prometheus text
+exposition format.
+"""
+import logging
+import threading
+from bisect import bisect_left
+
+_LOG = logging.getLogger(__name__)
+
+REQUEST = 'request'
+DECODE = 'decode'
+WRAP = 'wrap'
+PAGINATE = 'paginate'
+
+# Upper bounds of the histogram buckets
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+BYTES_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+RESULTS_BUCKETS = (1, 10, 50, 100, 250, 500, 1000, 5000, 10000, 50000, 100000)
+
+# Throttle metrics that only ever go up, the rest are exported as gauges
+_THROTTLE_COUNTERS = ('requests', 'wait_seconds', 'pauses', 'limit_decreases')
+
+
+class Hooks(object):
+    """
+    The hooks registered on a request handler. Every hook is called with the
+    name of the event and the RequestEvent it is about. A hook that raises is
+    logged and doesn't stop the request or the hooks after it.
+    """
+
+    def __init__(self):
+        self._hooks = tuple()
+        self._lock = threading.Lock()
+
+    def __bool__(self):
+        return len(self._hooks) > 0
+
+    def add(self, hook):
+        with self._lock:
+            self._hooks = self._hooks + (hook,)
+
+        return hook
+
+    def remove(self, hook):
+        with self._lock:
+            self._hooks = tuple(h for h in self._hooks if h is not hook)
+
+    def __call__(self, name, event):
+        for hook in self._hooks:
+            try:
+                hook(name, event)
+            except Exception:
+                _LOG.exception('Hook %r failed on %s event for %s %s', hook, name, event.method, event.endpoint)
+
+
+class RequestEvent(object):
+    """
+    What is known about a request. Timings are in seconds and are None until
+    the step they time has happened.
+    """
+
+    def __init__(self, hooks, method, endpoint):
+        self._hooks = hooks
+        self.method = method
+        self.endpoint = endpoint
+        self.status = None
+        self.cached = False
+        self.bytes_received = 0
+        self.ttfb = None
+        self.latency = None
+        self.decode_time = None
+        self.wrap_time = None
+
+        # Only set for paginate events
+        self.pages = None
+        self.results = None
+
+    def emit(self, name):
+        self._hooks(name, self)
+
+
+class Histogram(object):
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+# Metric name -> (help, buckets, event, event attribute)
+_HISTOGRAMS = {
+    'netbox_api_request_latency_seconds': (
+        'Time from sending a request until its response was read', SECONDS_BUCKETS, REQUEST, 'latency'),
+    'netbox_api_request_ttfb_seconds': (
+        'Time from sending a request until the response headers arrived', SECONDS_BUCKETS, REQUEST, 'ttfb'),
+    'netbox_api_response_bytes': (
+        'Size of response bodies', BYTES_BUCKETS, REQUEST, 'bytes_received'),
+    'netbox_api_decode_seconds': (
+        'Time spent decoding response bodies from JSON', SECONDS_BUCKETS, DECODE, 'decode_time'),
+    'netbox_api_wrap_seconds': (
+        'Time spent building models from decoded results', SECONDS_BUCKETS, WRAP, 'wrap_time'),
+    'netbox_api_listing_seconds': (
+        'Time taken to read a listing to the end', SECONDS_BUCKETS, PAGINATE, 'latency'),
+    'netbox_api_listing_results': (
+        'Number of results per listing', RESULTS_BUCKETS, PAGINATE, 'results')
+}
+
+
+def _labels(label_names, label_values, extra=None):
+    pairs = list(zip(label_names, label_values))
+    if extra is not None:
+        pairs.append(extra)
+
+    return '{' + ','.join('{}="{}"'.format(k, _escape(v)) for k, v in pairs) + '}'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class HistogramCollector(object):
+    """
+    Hook that aggregates events into histograms labelled by method, endpoint
+    template and status.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+        # Metric name -> (method, endpoint, status) -> Histogram
+        self._histograms = dict((name, dict()) for name in _HISTOGRAMS)
+
+        # (method, endpoint) -> number of responses served from the cache
+        self._cache_hits = dict()
+
+    def __call__(self, name, event):
+        with self._lock:
+            if name == REQUEST and event.cached:
+                key = (event.method, event.endpoint)
+                self._cache_hits[key] = self._cache_hits.get(key, 0) + 1
+                return
+
+            for metric, (_, buckets, metric_event, attribute) in _HISTOGRAMS.items():
+                value = getattr(event, attribute)
+                if metric_event != name or value is None:
+                    continue
+
+                key = (event.method, event.endpoint, event.status)
+
+                histogram = self._histograms[metric].get(key)
+                if histogram is None:
+                    histogram = self._histograms[metric][key] = Histogram(buckets)
+
+                histogram.observe(value)
+
+    def histogram(self, metric, method, endpoint, status):
+        with self._lock:
+            return self._histograms[metric].get((method, endpoint, status))
+
+    def export(self, throttle=None):
+        """
+        Render every metric in the Prometheus text exposition format.
+
+        :param throttle: optional Throttle whose totals are exported as counters and current state as gauges
+        :return:
+        """
+        lines = list()
+
+        with self._lock:
+            for metric, (description, _, _, _) in sorted(_HISTOGRAMS.items()):
+                lines.append('# HELP {} {}'.format(metric, description))
+                lines.append('# TYPE {} histogram'.format(metric))
+
+                for key, histogram in sorted(self._histograms[metric].items(), key=lambda kv: str(kv[0])):
+                    label_names = ('method', 'endpoint', 'status')
+
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets + ('+Inf',), histogram.counts):
+                        cumulative += count
+                        lines.append('{}_bucket{} {}'.format(
+                            metric, _labels(label_names, key, ('le', bound)), cumulative))
+
+                    lines.append('{}_sum{} {}'.format(metric, _labels(label_names, key), histogram.sum))
+                    lines.append('{}_count{} {}'.format(metric, _labels(label_names, key), histogram.count))
+
+            lines.append('# HELP netbox_api_cache_hits_total Responses served from the response cache')
+            lines.append('# TYPE netbox_api_cache_hits_total counter')
+            for key, hits in sorted(self._cache_hits.items()):
+                lines.append('netbox_api_cache_hits_total{} {}'.format(_labels(('method', 'endpoint'), key), hits))
+
+        if throttle is not None:
+            for name, value in sorted(throttle.metrics().items()):
+                if name in _THROTTLE_COUNTERS:
+                    metric = 'netbox_api_throttle_{}_total'.format(name)
+                    lines.append('# TYPE {} counter'.format(metric))
+                else:
+                    metric = 'netbox_api_throttle_{}'.format(name)
+                    lines.append('# TYPE {} gauge'.format(metric))
+
+                lines.append('{} {}'.format(metric, value))
+
+        return '\n'.join(lines) + '\n'
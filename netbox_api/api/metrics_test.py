@@ -0,0 +1,122 @@
+import unittest
+
+from netbox_api.api.cache import ResponseCache
+from netbox_api.api.metrics import DECODE, PAGINATE, REQUEST, WRAP, HistogramCollector, Hooks, RequestEvent
+from netbox_api.api.testing import NUM_DEVICES, ServerTestCase
+from netbox_api.api.throttle import AdaptiveLimiter, Throttle
+
+
+class _Recorder(object):
+    def __init__(self):
+        self.events = list()
+
+    def __call__(self, name, event):
+        self.events.append((name, event.method, event.endpoint, event.status))
+
+
+class WhenEmittingRequestEvents(ServerTestCase):
+    def setUp(self):
+        super(WhenEmittingRequestEvents, self).setUp()
+        self.recorder = _Recorder()
+        self.collector = HistogramCollector()
+
+        self.netbox = self.client(cache=ResponseCache(), throttle=Throttle(limiter=AdaptiveLimiter()))
+        self.netbox.hooks.add(self.recorder)
+        self.netbox.hooks.add(self.collector)
+
+    def test_single_objects(self):
+        self.netbox.dcim.device(1)
+
+        self.assertEqual(
+            [(REQUEST, 'get', '/dcim/devices/{}', 200),
+             (DECODE, 'get', '/dcim/devices/{}', 200),
+             (WRAP, 'get', '/dcim/devices/{}', 200)],
+            self.recorder.events)
+
+    def test_listings(self):
+        self.netbox.dcim.list_devices(limit=50)
+
+        names = [name for name, _, _, _ in self.recorder.events]
+        self.assertEqual([REQUEST, DECODE, WRAP] * 3 + [PAGINATE], names)
+
+        listing = self.collector.histogram('netbox_api_listing_results', 'get', '/dcim/devices', 200)
+        self.assertEqual(1, listing.count)
+        self.assertEqual(NUM_DEVICES, listing.sum)
+
+    def test_cache_hits(self):
+        self.netbox.dcim.device(1)
+        self.netbox.dcim.device(1)
+
+        latency = self.collector.histogram('netbox_api_request_latency_seconds', 'get', '/dcim/devices/{}', 200)
+        self.assertEqual(1, latency.count)
+        self.assertIn('netbox_api_cache_hits_total{method="get",endpoint="/dcim/devices/{}"} 1',
+                      self.collector.export())
+
+    def test_failing_hooks_are_logged_and_skipped(self):
+        def broken(name, event):
+            raise RuntimeError('broken hook')
+
+        self.netbox.hooks.remove(self.recorder)
+        self.netbox.hooks.add(broken)
+        self.netbox.hooks.add(self.recorder)
+
+        with self.assertLogs('netbox_api.api.metrics', level='ERROR') as logs:
+            self.assertEqual(1, self.netbox.dcim.device(1).id)
+
+        self.assertEqual(3, len(logs.records))
+        self.assertEqual(3, len(self.recorder.events))
+
+
+class WhenExportingMetrics(unittest.TestCase):
+    def setUp(self):
+        self.hooks = Hooks()
+        self.collector = self.hooks.add(HistogramCollector())
+
+    def _request(self, latency, status=200):
+        event = RequestEvent(self.hooks, 'get', '/dcim/sites/{}')
+        event.status = status
+        event.latency = latency
+        event.ttfb = latency
+        event.bytes_received = 100
+        event.emit(REQUEST)
+
+    def test_histogram_buckets_are_cumulative(self):
+        self._request(0.003)
+        self._request(0.2)
+        self._request(60)
+
+        lines = self.collector.export().splitlines()
+        prefix = 'netbox_api_request_latency_seconds'
+        labels = 'method="get",endpoint="/dcim/sites/{}",status="200"'
+
+        self.assertIn('# TYPE {} histogram'.format(prefix), lines)
+        self.assertIn('{}_bucket{{{},le="0.005"}} 1'.format(prefix, labels), lines)
+        self.assertIn('{}_bucket{{{},le="0.25"}} 2'.format(prefix, labels), lines)
+        self.assertIn('{}_bucket{{{},le="30.0"}} 2'.format(prefix, labels), lines)
+        self.assertIn('{}_bucket{{{},le="+Inf"}} 3'.format(prefix, labels), lines)
+        self.assertIn('{}_sum{{{}}} 60.203'.format(prefix, labels), lines)
+        self.assertIn('{}_count{{{}}} 3'.format(prefix, labels), lines)
+
+    def test_statuses_are_kept_apart(self):
+        self._request(0.1)
+        self._request(0.1, status=404)
+
+        self.assertEqual(1, self.collector.histogram('netbox_api_response_bytes', 'get', '/dcim/sites/{}', 404).count)
+
+    def test_throttle_totals_are_counters(self):
+        throttle = Throttle(limiter=AdaptiveLimiter())
+        with throttle.admit() as outcome:
+            outcome['status_code'] = 200
+
+        lines = self.collector.export(throttle).splitlines()
+
+        self.assertIn('# TYPE netbox_api_throttle_requests_total counter', lines)
+        self.assertIn('netbox_api_throttle_requests_total 1', lines)
+        self.assertIn('# TYPE netbox_api_throttle_wait_seconds_total counter', lines)
+        self.assertIn('# TYPE netbox_api_throttle_limit_decreases_total counter', lines)
+        self.assertIn('# TYPE netbox_api_throttle_limit gauge', lines)
+        self.assertIn('# TYPE netbox_api_throttle_in_flight gauge', lines)
+
+
+if __name__ == '__main__':
+    unittest.main()
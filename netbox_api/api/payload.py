@@ -0,0 +1,246 @@
+"""
+Request body builders shared by the blocking and asyncio clients. Each function
+maps the client's keyword arguments and model constants onto the JSON document
+that Netbox expects for the matching create call.
+"""
+from netbox_api.model import *
+
+
+def _custom_fields(custom_fields):
+    return custom_fields if custom_fields is not None else dict()
+
+
+def interface(name, form_factor, device_id, mac_address=None, management_only=False, parent_lag=None):
+    # Map constants
+    if isinstance(form_factor, FormFactorConstant):
+        form_factor = form_factor.value
+
+    return {
+        'name': name,
+        'form_factor': form_factor,
+        'mac_address': mac_address,
+        'lag': parent_lag,
+        'device': device_id,
+        'mgmt_only': management_only
+    }
+
+
+def interface_connection(status, interface_a_id, interface_b_id):
+    return {
+        'connection_status': status,
+        'interface_a': interface_a_id,
+        'interface_b': interface_b_id
+    }
+
+
+def region(name, slug, parent_region_id=None):
+    return {
+        'name': name,
+        'slug': slug,
+        'parent': parent_region_id
+    }
+
+
+def site(name, slug, tenant_id, region_id, contact_email=None, physical_address=None, shipping_address=None,
+         contact_name=None, contact_phone=None, asn=None, comments=None, facility=None, custom_fields=None):
+    return {
+        'name': name,
+        'slug': slug,
+        'facility': facility,
+        'tenant': tenant_id,
+        'region': region_id,
+        'contact_name': contact_name,
+        'contact_phone': contact_phone,
+        'contact_email': contact_email,
+        'physical_address': physical_address,
+        'shipping_address': shipping_address,
+        'comments': comments,
+        'asn': asn,
+        'custom_fields': _custom_fields(custom_fields)
+    }
+
+
+def rack_group(name, slug, site_id):
+    return {
+        'name': name,
+        'slug': slug,
+        'site': site_id
+    }
+
+
+def rack_role(name, slug, color='000000'):
+    return {
+        'name': name,
+        'slug': slug,
+        'color': color
+    }
+
+
+def rack(name, rack_group_id, site_id, tenant_id, u_height, width, descending_units, rack_type, rack_role_id=None,
+         facility=None, comments='', custom_fields=None):
+    # Map constants to their values for the API
+    if isinstance(rack_type, RackTypeConstant):
+        rack_type = rack_type.value
+    if isinstance(width, RackWidthConstant):
+        width = width.value
+
+    return {
+        'name': name,
+        'u_height': u_height,
+        'width': width,
+        'group': rack_group_id,
+        'site': site_id,
+        'facility_id': facility,
+        'role': rack_role_id,
+        'desc_units': descending_units,
+        'type': rack_type,
+        'tenant': tenant_id,
+        'comments': comments,
+        'custom_fields': _custom_fields(custom_fields)
+    }
+
+
+def platform(name, slug, rpc_client=''):
+    return {
+        'name': name,
+        'slug': slug,
+        'rpc_client': rpc_client
+    }
+
+
+def manufacturer(name, slug):
+    return {
+        'name': name,
+        'slug': slug,
+    }
+
+
+def device_type(model, slug, u_height, manufacturer_id, part_number=None,
+                interface_ordering=InterfaceOrderConstant.BY_RACK_POSITION, is_console_server=False,
+                is_network_device=False, subdevice_role=SubdeviceTypeConstant.NONE, is_full_depth=False, is_pdu=False,
+                comments='', custom_fields=None):
+    # Map constants
+    if isinstance(subdevice_role, SubdeviceTypeConstant):
+        subdevice_role = subdevice_role.value
+    if isinstance(interface_ordering, InterfaceOrderConstant):
+        interface_ordering = interface_ordering.value
+
+    return {
+        'model': model,
+        'slug': slug,
+        'u_height': u_height,
+        'is_pdu': is_pdu,
+        'is_full_depth': is_full_depth,
+        'subdevice_role': subdevice_role,
+        'is_console_server': is_console_server,
+        'is_network_device': is_network_device,
+        'part_number': part_number,
+        'interface_ordering': interface_ordering,
+        'manufacturer': manufacturer_id,
+        'comments': comments,
+        'custom_fields': _custom_fields(custom_fields)
+    }
+
+
+def device_role(name, slug, color='000000'):
+    return {
+        'name': name,
+        'slug': slug,
+        'color': color
+    }
+
+
+def device(name, device_role_id, site_id, status=DeviceStatusConstant.ACTIVE, custom_fields=None, comments='',
+           rack_face=RackFaceConstant.FRONT, asset_tag=None, platform_id=None, primary_ip4_id=None,
+           primary_ip6_id=None, position=0, device_type_id=None, serial=None, rack_id=None, tenant_id=None):
+    # Map constants
+    if isinstance(status, DeviceStatusConstant):
+        status = status.value
+    if isinstance(rack_face, RackFaceConstant):
+        rack_face = rack_face.value
+
+    return {
+        'status': status,
+        'device_role': device_role_id,
+        'name': name,
+        'site': site_id,
+        'comments': comments,
+        'face': rack_face,
+        'asset_tag': asset_tag,
+        'platform': platform_id,
+        'device_type': device_type_id,
+        'primary_ip4': primary_ip4_id,
+        'primary_ip6': primary_ip6_id,
+        'position': position,
+        'serial': serial,
+        'rack': rack_id,
+        'tenant': tenant_id,
+        'custom_fields': _custom_fields(custom_fields)
+    }
+
+
+def vrf(name, route_distinguisher, tenant_id, enforce_unique=False, description=None, custom_fields=None):
+    return {
+        'name': name,
+        'rd': route_distinguisher,
+        'tenant': tenant_id,
+        'enforce_unique': enforce_unique,
+        'description': description,
+        'custom_fields': _custom_fields(custom_fields),
+    }
+
+
+def prefix_role(name, slug, weight=0):
+    return {
+        'name': name,
+        'slug': slug,
+        'weight': weight
+    }
+
+
+def ip_address(address, status, tenant_id, role=None, interface_id=None, vrf_id=None, nat_inside=None,
+               description=None, custom_fields=None):
+    # Map constants
+    if isinstance(status, IPAddressStatusConstant):
+        status = status.value
+    if isinstance(role, IPAddressRoleConstant):
+        role = role.value
+
+    return {
+        'description': description,
+        'tenant': tenant_id,
+        'interface': interface_id,
+        'vrf': vrf_id,
+        'role': role,
+        'status': status,
+        'address': address,
+        'nat_inside': nat_inside,
+        'custom_fields': _custom_fields(custom_fields)
+    }
+
+
+def ip_assignment(address, interface_id, tenant_id, is_primary=False):
+    return {
+        'is_primary': is_primary,
+        'address': address,
+        'interface': interface_id,
+        'tenant': tenant_id
+    }
+
+
+def tenant_group(name, slug):
+    return {
+        'name': name,
+        'slug': slug
+    }
+
+
+def tenant(name, slug, tenant_group_id, description=None, comments=None, custom_fields=None):
+    return {
+        'name': name,
+        'slug': slug,
+        'group': tenant_group_id,
+        'description': description,
+        'comments': comments,
+        'custom_fields': _custom_fields(custom_fields)
+    }
@@ -1,9 +1,24 @@
-import json
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
 
 import requests
 import requests.auth
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from netbox_api.api.decoder import get_decoder
+from netbox_api.api.metrics import DECODE, PAGINATE, REQUEST, WRAP, Hooks, RequestEvent
+from netbox_api.api.stream import STREAM_CHUNK_SIZE, ResultStreamParser
+from netbox_api.model import IdentityMap, decode_scope
 
 JSON_DECODE_ERR_FMT = 'Unable to decode result for request. Content body:\n{}'
+STREAM_DECODE_ERR_FMT = 'Unable to decode streamed page {}: {}'
+BULK_ITEM_ERR_FMT = 'Bulk item rejected with status code: {}'
+BULK_ROLLBACK_ERR = 'Bulk item not saved because another item in the same request was rejected'
 
 
 class NetboxTokenAuth(requests.auth.AuthBase):
@@ -27,45 +42,210 @@ class NetboxTokenAuth(requests.auth.AuthBase):
         return r
 
 
+class ConnectionSettings(object):
+    """
+    Connection pooling, timeout and retry settings shared by every request a
+    handler sends.
+
+    Idempotent requests that fail to connect, lose their connection or are
+    answered with one of the retry statuses are retried with an exponential
+    backoff of backoff_factor * 2 ** (retry - 1) seconds, honouring any
+    Retry-After header the server sends. Creates and updates are never
+    retried once they have reached the server.
+    """
+
+    def __init__(self, pool_connections=10, pool_maxsize=10, retries=3, backoff_factor=0.5,
+                 retry_statuses=(429, 502, 503, 504), connect_timeout=5, read_timeout=60):
+        """
+        :param pool_connections: number of hosts to keep connection pools for
+        :param pool_maxsize: connections kept alive per host, this should be at least the number of
+                             threads sharing the handler
+        :param retries: times a failed request is retried, 0 disables retries
+        :param backoff_factor:
+        :param retry_statuses: status codes that are retried
+        :param connect_timeout: seconds to wait for a connection, None waits forever
+        :param read_timeout: seconds to wait between bytes of the response, None waits forever
+        """
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.retry_statuses = tuple(retry_statuses)
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+
+    @property
+    def timeout(self):
+        return self.connect_timeout, self.read_timeout
+
+    def retry(self):
+        return Retry(
+            total=self.retries,
+            connect=self.retries,
+            read=self.retries,
+            status=self.retries,
+            backoff_factor=self.backoff_factor,
+            status_forcelist=self.retry_statuses,
+            # Hand the last response back rather than raising so it is reported like any other
+            raise_on_status=False)
+
+    def adapter(self):
+        return HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            max_retries=self.retry())
+
+
 class HTTPException(Exception):
     def __init__(self, msg, failures=None):
         self.msg = msg
         self.failures = failures
 
 
+class BulkResult(object):
+    """
+    Outcome of a single item within a bulk request. Successful items carry the
+    ID of the object they created, updated or deleted while failed items carry
+    the HTTPException describing why.
+    """
+
+    def __init__(self, id=None, error=None):
+        self.id = id
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
 class NetboxResponse(object):
-    def __init__(self, resp, content):
+    def __init__(self, resp, content, identity_map=None, lazy_models=False, decoder=None, event=None):
+        """
+        :param resp:
+        :param content: raw body bytes of the response
+        :param identity_map:
+        :param lazy_models:
+        :param decoder: callable decoding the body bytes, defaults to the fastest installed JSON decoder
+        :param event: RequestEvent that decode and wrap timings are reported on
+        """
         self._response = resp
         self._content = content
+        self._identity_map = identity_map
+        self._lazy_models = lazy_models
+        self._decoder = decoder if decoder is not None else get_decoder()
+        self._event = event
         self._json = None
 
     def _parse_content(self):
+        started_at = time.perf_counter()
+
         try:
-            payload = json.loads(self._content)
-
-            # Single entity requests don't have the result wrapper JSON so we
-            # choose to emulate it - DRY
-            if 'results' not in payload:
-                return {
-                    'count': 1,
-                    'next': None,
-                    'previous': None,
-                    'results': [payload]
-                }
+            payload = self._decoder(self._content)
+        except ValueError as ve:
+            raise HTTPException(JSON_DECODE_ERR_FMT.format(self.text)) from ve
 
-            return payload
+        if self._event is not None:
+            self._event.decode_time = time.perf_counter() - started_at
+            self._event.emit(DECODE)
+
+        return payload
 
-        except json.decoder.JSONDecodeError as jde:
-            raise HTTPException(JSON_DECODE_ERR_FMT.format(self._content)) from jde
+    def _is_listing(self):
+        # Bulk requests answer with a bare list of entities and single entity
+        # requests with the entity itself, neither has the listing wrapper
+        payload = self.json
+        return isinstance(payload, dict) and 'results' in payload
 
     def raise_on_status(self):
         if self.ok is False:
             raise HTTPException('Unexpected status code: {}\n{}'.format(
                 self._response.status_code,
-                self._content))
+                self.text))
+
+    def wrap_results(self, cls, identity_map=None):
+        """
+        Build an instance of cls for every result. Nested objects are interned
+        into the given identity map, or the one this response was created with,
+        and are left unbuilt until first read when the response was created for
+        lazy models.
+
+        :param cls:
+        :param identity_map:
+        :return:
+        """
+        if identity_map is None:
+            identity_map = self._identity_map
+
+        # Decode ahead of timing the wrap
+        results = self.results
+        started_at = time.perf_counter()
+
+        with decode_scope(identity_map, self._lazy_models):
+            wrapped = [cls(**v) for v in results]
+
+        if self._event is not None:
+            self._event.wrap_time = time.perf_counter() - started_at
+            self._event.emit(WRAP)
+
+        return wrapped
+
+    def bulk_results(self, ids):
+        """
+        Map the response to a bulk request onto one BulkResult per submitted
+        item, in submission order.
+
+        :param ids: IDs of the submitted items, None for items being created
+        :return:
+        """
+        if self.ok:
+            # Deletes have no body to report so we echo the submitted IDs back
+            if len(self._content) == 0:
+                return [BulkResult(id=obj_id) for obj_id in ids]
+
+            return [BulkResult(id=r['id']) for r in self.results]
+
+        failures = self._bulk_failures(len(ids))
+        if failures is None:
+            # The failure can't be attributed to any one item
+            error = HTTPException(BULK_ITEM_ERR_FMT.format(self.status_code), failures=self.text)
+            return [BulkResult(id=obj_id, error=error) for obj_id in ids]
+
+        results = list()
+        for obj_id, item_failures in zip(ids, failures):
+            if item_failures:
+                error = HTTPException(BULK_ITEM_ERR_FMT.format(self.status_code), failures=item_failures)
+            else:
+                error = HTTPException(BULK_ROLLBACK_ERR)
+
+            results.append(BulkResult(id=obj_id, error=error))
+
+        return results
+
+    def item_result(self, obj_id):
+        """
+        Map the response to a request made for a single item of a bulk
+        operation onto its BulkResult.
+
+        :param obj_id: ID of the item the request was made for
+        :return:
+        """
+        if self.ok:
+            return BulkResult(id=obj_id)
+
+        error = HTTPException(BULK_ITEM_ERR_FMT.format(self.status_code), failures=self.text)
+        return BulkResult(id=obj_id, error=error)
+
+    def _bulk_failures(self, num_items):
+        # Validation failures come back as a list with an entry per item
+        try:
+            failures = self._decoder(self._content)
+        except ValueError:
+            return None
+
+        if not isinstance(failures, list) or len(failures) != num_items:
+            return None
 
-    def wrap_results(self, cls):
-        return [cls(**v) for v in self.results]
+        return failures
 
     @property
     def json(self):
@@ -74,106 +254,474 @@ class NetboxResponse(object):
 
         return self._json
 
+    @property
+    def text(self):
+        return self._content.decode('utf-8', errors='replace')
+
     @property
     def status_code(self):
         return self._response.status_code
 
+    @property
+    def headers(self):
+        return self._response.headers
+
     @property
     def ok(self):
         return 200 <= self._response.status_code < 300
 
     @property
     def count(self):
-        return self.json['count']
+        if self._is_listing():
+            return self.json['count']
+
+        return len(self.results)
 
     @property
     def next_page(self):
-        return self.json['next']
+        return self.json['next'] if self._is_listing() else None
 
     @property
     def previous_page(self):
-        return self.json['previous']
+        return self.json['previous'] if self._is_listing() else None
 
     @property
     def results(self):
-        return self.json['results']
+        payload = self.json
+
+        if isinstance(payload, list):
+            return payload
+
+        if 'results' in payload:
+            return payload['results']
+
+        return [payload]
+
+
+def format_url(scheme, host, port, path_fmt, *parts):
+    # Strip leading slashes
+    if path_fmt.startswith('/'):
+        path_fmt = path_fmt[1:]
+
+    # Strip trailing slashes
+    if path_fmt.endswith('/'):
+        path_fmt = path_fmt[:len(path_fmt) - 1]
+
+    # Format the path
+    path = path_fmt.format(*parts)
+
+    return '{}://{}:{}/api/{}/'.format(
+        scheme,
+        host,
+        port,
+        path)
+
+
+def endpoint_template(url):
+    """
+    Reduce a request URL to the path template it was formatted from with IDs
+    replaced by placeholders, for example .../api/dcim/devices/5/ becomes
+    /dcim/devices/{}.
+    """
+    path = urlsplit(url).path.strip('/')
+
+    # Drop the API root
+    if path.startswith('api/') or path == 'api':
+        path = path[4:]
+
+    parts = ['{}' if part.isdigit() else part for part in path.split('/') if len(part) > 0]
+    return '/' + '/'.join(parts)
 
 
 class RequestHandler(object):
-    def __init__(self, host, port, token, scheme, verify=None):
+    """
+    Sends requests to Netbox. A handler, and the client built on it, is safe
+    to share between threads: every thread gets its own session while all of
+    them draw connections from one shared, thread-safe connection pool.
+    """
+
+    def __init__(self, host, port, token, scheme, verify=None, page_workers=1, cache=None, identity_map=None,
+                 lazy_models=False, json_decoder=None, stream_pages=False, connection=None,
+                 throttle=None):
         self._host = host
         self._port = port
         self._scheme = scheme
         self._auth = NetboxTokenAuth(token)
         self._verify_path = verify
-        self._session_obj = None
+        self._page_workers = page_workers
+        self._cache = cache
+        self._identity_map = identity_map
+        self._lazy_models = lazy_models
+        self._decoder = get_decoder(json_decoder)
+        self._stream_pages = stream_pages
+        self._throttle = throttle
+        self._hooks = Hooks()
+        self._adapter = None
+        self._adapter_lock = threading.Lock()
+        self._local = threading.local()
+
+        # Keep enough connections alive for every concurrent page fetch
+        if connection is None:
+            connection = ConnectionSettings(pool_maxsize=max(10, page_workers))
+
+        self._connection = connection
 
     @property
     def _session(self):
-        if self._session_obj is None:
-            self._session_obj = requests.Session()
+        # Sessions aren't thread-safe so each thread gets its own
+        session = getattr(self._local, 'session', None)
+
+        if session is None:
+            session = self._local.session = requests.Session()
 
             # Common auth
-            self._session_obj.auth = self._auth
+            session.auth = self._auth
 
             # Common headers
-            self._session_obj.headers['Accept'] = 'application/json'
+            session.headers['Accept'] = 'application/json'
 
-        return self._session_obj
+            # Pooling and retries are shared by every thread's session
+            adapter = self._shared_adapter()
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
 
-    def format_url(self, path_fmt, *parts):
-        # Strip leading slashes
-        if path_fmt.startswith('/'):
-            path_fmt = path_fmt[1:]
+        return session
 
-        # Strip trailing slashes
-        if path_fmt.endswith('/'):
-            path_fmt = path_fmt[:len(path_fmt) - 1]
+    @property
+    def throttle(self):
+        return self._throttle
 
-        # Format the path
-        path = path_fmt.format(*parts)
+    @property
+    def hooks(self):
+        """
+        Hooks called with every request event, see netbox_api.api.metrics.
+        """
+        return self._hooks
+
+    def _event(self, method, url):
+        # Skip building events nobody listens to
+        if not self._hooks:
+            return None
+
+        return RequestEvent(self._hooks, method, endpoint_template(url))
+
+    def _shared_adapter(self):
+        if self._adapter is None:
+            with self._adapter_lock:
+                # Another thread may have won the race for the lock
+                if self._adapter is None:
+                    self._adapter = self._connection.adapter()
+
+        return self._adapter
+
+    def close(self):
+        """
+        Close every pooled connection. The handler can still be used afterwards
+        and will open new connections as needed.
+        """
+        with self._adapter_lock:
+            if self._adapter is not None:
+                self._adapter.close()
+
+    def _send(self, method, url, **request_kwargs):
+        request_func = getattr(self._session, method)
 
-        return '{}://{}:{}/api/{}/'.format(
-            self._scheme,
-            self._host,
-            self._port,
-            path)
+        if self._throttle is None:
+            return request_func(url=url, **request_kwargs)
 
-    def request(self, method, url, **kwargs):
-        request_func = getattr(self._session, method)
+        # Wait our turn and let the throttle know how the server coped
+        with self._throttle.admit() as outcome:
+            resp = request_func(url=url, **request_kwargs)
+            outcome['status_code'] = resp.status_code
+            outcome['retry_after'] = resp.headers.get('Retry-After')
 
+        return resp
+
+    def _request_kwargs(self, kwargs):
         # Copy the kwargs dict to modify it
         request_kwargs = kwargs.copy()
 
         if self._verify_path is not None:
             request_kwargs['verify'] = self._verify_path
 
+        request_kwargs.setdefault('timeout', self._connection.timeout)
+        return request_kwargs
+
+    def format_url(self, path_fmt, *parts):
+        return format_url(self._scheme, self._host, self._port, path_fmt, *parts)
+
+    def request(self, method, url, **kwargs):
+        conditional_headers = dict()
+        event = self._event(method, url)
+
+        # Serve from the cache when we can, otherwise try to revalidate what it holds
+        if self._cache is not None:
+            cached = self._cache.lookup(method, url, kwargs.get('params'))
+            if cached is not None:
+                if event is not None:
+                    event.status = cached.status_code
+                    event.cached = True
+                    event.emit(REQUEST)
+
+                return cached
+
+            conditional_headers = self._cache.validators(method, url, kwargs.get('params'))
+
+        request_kwargs = self._request_kwargs(kwargs)
+
+        if len(conditional_headers) > 0:
+            request_kwargs['headers'] = dict(request_kwargs.get('headers') or dict(), **conditional_headers)
+
         # Make the request
-        resp = request_func(
-            url=url,
-            **request_kwargs)
+        started_at = time.perf_counter()
+        resp = self._send(method, url, **request_kwargs)
 
         try:
-            # Wrap the request which should read the entire body
-            return NetboxResponse(resp, resp.text)
+            # Wrap the request which should read the entire body, decoding is
+            # left to the JSON decoder which works on the raw bytes
+            response = NetboxResponse(
+                resp, resp.content, self._identity_map, self._lazy_models, self._decoder, event)
         finally:
             # Eagerly close the response
             resp.close()
 
-    def paginate(self, cls, method, url, **kwargs):
+        if event is not None:
+            event.status = resp.status_code
+            event.bytes_received = len(resp.content)
+            event.ttfb = resp.elapsed.total_seconds()
+            event.latency = time.perf_counter() - started_at
+            event.emit(REQUEST)
+
+        # Cache reads and invalidate on writes
+        if self._cache is not None:
+            response = self._cache.store(method, url, kwargs.get('params'), response)
+
+            # The response we revalidated was evicted while we waited so ask again in full
+            if response is None:
+                return self.request(method, url, **kwargs)
+
+        return response
+
+    def paginate(self, cls, method, url, workers=None, stream=None, **kwargs):
+        """
+        Yield every result of a paginated listing wrapped as instances of cls.
+
+        When more than one worker is requested, the remaining pages are worked
+        out from the count of the first page and fetched concurrently. Results
+        are always yielded in the order the server returned them.
+
+        When streaming, each page is parsed as it is read off the socket and
+        results are yielded as soon as they arrive. Pages are then fetched one
+        at a time and never go through the response cache.
+
+        Nested objects are interned for the length of the listing, or for the
+        life of the handler when it was given an identity map.
+
+        :param cls:
+        :param method:
+        :param url:
+        :param workers: number of concurrent page fetches, defaults to the handler's page_workers
+        :param stream: whether to stream pages, defaults to the handler's stream_pages
+        :return:
+        """
+        if workers is None:
+            workers = self._page_workers
+
+        if stream is None:
+            stream = self._stream_pages
+
+        # Share repeated nested objects across every page of this listing
+        identity_map = self._identity_map if self._identity_map is not None else IdentityMap()
+
+        event = self._event(method, url)
+        if event is not None:
+            event.pages = 0
+            event.results = 0
+
+        started_at = time.perf_counter()
+
+        if stream:
+            results = self._stream_listing(cls, method, url, identity_map, event, **kwargs)
+        else:
+            results = self._wrapped_listing(cls, method, url, workers, identity_map, event, **kwargs)
+
+        for r in results:
+            yield r
+
+        if event is not None:
+            # Any page that failed would have raised by now
+            event.status = 200
+            event.latency = time.perf_counter() - started_at
+            event.emit(PAGINATE)
+
+    def _wrapped_listing(self, cls, method, url, workers, identity_map, event, **kwargs):
         resp = self.request(method, url=url, **kwargs)
 
-        while True:
-            # Raise on bad status
-            resp.raise_on_status()
+        # Raise on bad status
+        resp.raise_on_status()
+
+        if workers > 1 and resp.next_page is not None:
+            pages = self._prefetch_pages(resp, workers)
+        else:
+            pages = self._follow_pages(resp)
+
+        for page in pages:
+            wrapped = page.wrap_results(cls, identity_map)
+
+            if event is not None:
+                event.pages += 1
+                event.results += len(wrapped)
 
             # Yield the next page of results
-            for r in resp.wrap_results(cls):
+            for r in wrapped:
                 yield r
 
+    def _follow_pages(self, resp):
+        while True:
+            yield resp
+
             # Exit this loop if there isn't a next page
             if resp.next_page is None:
                 break
 
             # Perform the next get
             resp = self.request('get', url=resp.next_page)
+
+            # Raise on bad status
+            resp.raise_on_status()
+
+    def _stream_listing(self, cls, method, url, identity_map, listing_event, **kwargs):
+        while url is not None:
+            fields = dict()
+            event = self._event(method, url)
+
+            if event is not None:
+                event.wrap_time = 0.0
+
+            for contents in self._stream_results(method, url, fields, event, **kwargs):
+                started_at = time.perf_counter()
+
+                with decode_scope(identity_map, self._lazy_models):
+                    r = cls(**contents)
+
+                if event is not None:
+                    event.wrap_time += time.perf_counter() - started_at
+                    listing_event.results += 1
+
+                yield r
+
+            # Streamed pages are decoded and wrapped as they are read so the
+            # timings are reported once the page is done
+            if event is not None:
+                listing_event.pages += 1
+                event.emit(REQUEST)
+                event.emit(DECODE)
+                event.emit(WRAP)
+
+            # Next links already carry the query
+            method, url, kwargs = 'get', fields.get('next'), dict()
+
+    def _stream_results(self, method, url, fields, event, **kwargs):
+        """
+        Yield the raw results of a single page as they are parsed off the
+        socket. The remaining fields of the page, such as next, are copied into
+        the fields dict once the page has been read and the timings of reading
+        it are recorded on the event.
+        """
+        started_at = time.perf_counter()
+        resp = self._send(method, url, stream=True, **self._request_kwargs(kwargs))
+
+        try:
+            # Errors are small, read them in full to report them
+            if not 200 <= resp.status_code < 300:
+                NetboxResponse(resp, resp.content, decoder=self._decoder).raise_on_status()
+
+            parser = ResultStreamParser()
+            decode_time = 0.0
+            bytes_received = 0
+
+            try:
+                for chunk in resp.iter_content(STREAM_CHUNK_SIZE):
+                    decode_started_at = time.perf_counter()
+                    parsed = parser.feed(chunk)
+                    decode_time += time.perf_counter() - decode_started_at
+                    bytes_received += len(chunk)
+
+                    for contents in parsed:
+                        yield contents
+
+                for contents in parser.close():
+                    yield contents
+            except ValueError as ve:
+                raise HTTPException(STREAM_DECODE_ERR_FMT.format(url, ve)) from ve
+
+            fields.update(parser.fields)
+
+            if event is not None:
+                event.status = resp.status_code
+                event.bytes_received = bytes_received
+                event.ttfb = resp.elapsed.total_seconds()
+                event.latency = time.perf_counter() - started_at
+                event.decode_time = decode_time
+        finally:
+            # Abandoned streams are closed instead of being read to the end
+            resp.close()
+
+    def _prefetch_pages(self, first_page, workers):
+        yield first_page
+
+        remaining_urls = page_urls(first_page)
+
+        executor = ThreadPoolExecutor(max_workers=workers)
+        pending = deque()
+
+        try:
+            # Keep a bounded window of pages in flight so that a slow consumer
+            # doesn't end up holding the entire listing in memory
+            for page_url in islice(remaining_urls, workers * 2):
+                pending.append(executor.submit(self.request, 'get', url=page_url))
+
+            while len(pending) > 0:
+                resp = pending.popleft().result()
+
+                # Top the window back up before handing the page out
+                for page_url in islice(remaining_urls, 1):
+                    pending.append(executor.submit(self.request, 'get', url=page_url))
+
+                # Raise on bad status
+                resp.raise_on_status()
+
+                yield resp
+        finally:
+            # Don't bother fetching pages nobody is going to read
+            for future in pending:
+                future.cancel()
+
+            executor.shutdown(wait=True)
+
+
+def page_urls(first_page):
+    """
+    Generate the URLs of every page after the first using the offset and limit
+    the server handed back in the first page's next link. Listings that were
+    asked to start at an offset carry on from where the first page ended.
+    """
+    scheme, netloc, path, query, fragment = urlsplit(first_page.next_page)
+    params = parse_qsl(query, keep_blank_values=True)
+
+    limit = len(first_page.results)
+    offset = len(first_page.results)
+    for key, value in params:
+        if key == 'limit':
+            limit = int(value)
+        elif key == 'offset':
+            offset = int(value)
+
+    # Nothing sensible can be done with an empty first page
+    if limit <= 0:
+        return
+
+    base_params = [(k, v) for k, v in params if k not in ('limit', 'offset')]
+    for page_offset in range(offset, first_page.count, limit):
+        page_query = urlencode(base_params + [('limit', limit), ('offset', page_offset)])
+        yield urlunsplit((scheme, netloc, path, page_query, fragment))
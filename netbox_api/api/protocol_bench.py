@@ -0,0 +1,131 @@
+"""
+Decode benchmarks for listing pages.
+
+The decoders suite times parsing 1k-record pages of devices, interfaces and IP
+addresses with every installed JSON decoder, straight from the body bytes, next
+to the previous path of decoding the body to a str before handing it to the
+standard library.
+
+The lazy suite times turning a page of results into models with nested objects
+built eagerly against building them lazily, both on their own and followed by a
+pass that reads one nested field per result. Pass the path of a page recorded
+from a Netbox listing, e.g. the output of
+curl -H 'Authorization: Token ...' 'https://netbox/api/dcim/devices/?limit=10000',
+together with the model it holds. Without one a synthetic page of 10k devices
+is used instead.
+
+Run with: python -m netbox_api.api.protocol_bench decoders [num_records]
+          python -m netbox_api.api.protocol_bench lazy [page.json [Device|Interface|IPAddress]]
+"""
+import json
+import sys
+import time
+
+from netbox_api import model
+from netbox_api.api.decoder import DECODERS
+from netbox_api.api.protocol import NetboxResponse
+from netbox_api.model.model_bench import _device_record, _interface_record, _ip_record
+
+# Nested field read by the access pass for each model
+_ACCESSED_FIELD = {
+    'Device': 'site',
+    'Interface': 'device',
+    'IPAddress': 'interface'
+}
+
+
+class RecordedResponse(object):
+    status_code = 200
+    headers = dict()
+
+
+def synthetic_page(record, num_records):
+    return json.dumps({
+        'count': num_records,
+        'next': None,
+        'previous': None,
+        'results': [record(i) for i in range(num_records)]
+    }).encode('utf-8')
+
+
+def _time(func, rounds):
+    best = None
+
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+
+        if best is None or elapsed < best:
+            best = elapsed
+
+    return best
+
+
+def _parse(content, decoder):
+    def parse():
+        NetboxResponse(RecordedResponse(), content, decoder=decoder).results
+
+    return parse
+
+
+def _parse_text(content):
+    def parse():
+        json.loads(content.decode('utf-8'))
+
+    return parse
+
+
+def run_decoders(num_records=1000, rounds=20):
+    pages = (('devices', _device_record), ('interfaces', _interface_record), ('ip addresses', _ip_record))
+
+    for name, record in pages:
+        content = synthetic_page(record, num_records)
+        print('{} {} ({:,} bytes)'.format(num_records, name, len(content)))
+
+        baseline = _time(_parse_text(content), rounds)
+        print('  {:<22} {:>8.2f} ms'.format('json from str', baseline * 1000))
+
+        for decoder_name, decoder in DECODERS.items():
+            elapsed = _time(_parse(content, decoder), rounds)
+            print('  {:<22} {:>8.2f} ms  {:>5.1f}x'.format(
+                decoder_name + ' from bytes', elapsed * 1000, baseline / elapsed))
+
+
+def _decode(content, cls, lazy, field=None):
+    def decode():
+        response = NetboxResponse(RecordedResponse(), content, lazy_models=lazy)
+        models = response.wrap_results(cls)
+
+        if field is not None:
+            for m in models:
+                getattr(m, field)
+
+    return decode
+
+
+def run_lazy(content, cls, rounds=5):
+    field = _ACCESSED_FIELD.get(cls.__name__)
+    num_records = len(NetboxResponse(RecordedResponse(), content).results)
+
+    print('records: {} {}'.format(num_records, cls.__name__))
+
+    for label, lazy, accessed in (('eager', False, None), ('lazy', True, None),
+                                  ('eager + read .{}'.format(field), False, field),
+                                  ('lazy + read .{}'.format(field), True, field)):
+        elapsed = _time(_decode(content, cls, lazy, accessed), rounds)
+        print('{:<24} {:>8.1f} ms'.format(label, elapsed * 1000))
+
+
+if __name__ == '__main__':
+    suite = sys.argv[1] if len(sys.argv) > 1 else 'decoders'
+
+    if suite == 'decoders':
+        run_decoders(int(sys.argv[2]) if len(sys.argv) > 2 else 1000)
+    elif len(sys.argv) > 2:
+        with open(sys.argv[2], 'rb') as page:
+            recorded = page.read()
+
+        run_lazy(recorded, getattr(model, sys.argv[3] if len(sys.argv) > 3 else 'Device'))
+    else:
+        run_lazy(synthetic_page(_device_record, 10000), model.Device)
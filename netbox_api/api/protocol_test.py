@@ -0,0 +1,340 @@
+import unittest
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+from netbox_api.api import ConnectionSettings
+from netbox_api.api.cache import ResponseCache
+from netbox_api.api.protocol import BULK_ROLLBACK_ERR
+from netbox_api.api.testing import NUM_DEVICES, FakeBulkNetbox, FakeFilteringNetbox, FakeVersionedNetbox, \
+    ServerTestCase
+from netbox_api.model import IdentityMap
+
+_NUM_THREADS = 64
+_CALLS_PER_THREAD = 25
+
+
+class WhenSharingAClientAcrossThreads(ServerTestCase):
+    def setUp(self):
+        super(WhenSharingAClientAcrossThreads, self).setUp()
+        self.netbox = self.client(connection=ConnectionSettings(pool_maxsize=_NUM_THREADS))
+
+    def _worker(self, worker_id):
+        adapters = set()
+
+        for call in range(_CALLS_PER_THREAD):
+            if (worker_id + call) % 3 == 0:
+                devices = self.netbox.dcim.list_devices(limit=50)
+                self.assertEqual(['host-{}'.format(i) for i in range(1, NUM_DEVICES + 1)], [d.name for d in devices])
+            else:
+                device_id = (worker_id * _CALLS_PER_THREAD + call) % NUM_DEVICES + 1
+                device = self.netbox.dcim.device(device_id)
+
+                self.assertEqual(device_id, device.id)
+                self.assertEqual('DC1', device.site.name)
+
+            adapters.add(self.netbox._request_handler._session.get_adapter('http://'))
+
+        return adapters
+
+    def test_mixed_calls_from_many_threads(self):
+        with ThreadPoolExecutor(max_workers=_NUM_THREADS) as executor:
+            results = list(executor.map(self._worker, range(_NUM_THREADS)))
+
+        # Every thread's session draws from the one shared pool
+        adapters = set.union(*results)
+        self.assertEqual(1, len(adapters))
+
+
+class WhenPrefetchingPages(ServerTestCase):
+    def setUp(self):
+        super(WhenPrefetchingPages, self).setUp()
+        self.netbox = self.client(page_workers=4)
+
+    def test_every_page_is_returned_in_order(self):
+        devices = self.netbox.dcim.list_devices(limit=10)
+        self.assertEqual(list(range(1, NUM_DEVICES + 1)), [d.id for d in devices])
+
+    def test_listing_starting_at_an_offset(self):
+        devices = self.netbox.dcim.list_devices(limit=10, offset=50)
+        self.assertEqual(list(range(51, NUM_DEVICES + 1)), [d.id for d in devices])
+
+    def test_listing_with_a_page_size_that_does_not_divide_the_count(self):
+        devices = self.netbox.dcim.list_devices(limit=7, offset=3)
+        self.assertEqual(list(range(4, NUM_DEVICES + 1)), [d.id for d in devices])
+
+
+class WhenKeepingAnIdentityMapForTheClientsLifetime(ServerTestCase):
+    def setUp(self):
+        super(WhenKeepingAnIdentityMapForTheClientsLifetime, self).setUp()
+        self.netbox = self.client(identity_map=IdentityMap())
+
+    def test_nested_objects_are_shared_between_requests(self):
+        self.assertIs(self.netbox.dcim.device(1).site, self.netbox.dcim.device(2).site)
+
+    def test_changed_objects_are_picked_up(self):
+        before = self.netbox.dcim.device(1)
+
+        self.server.site_name = 'DC2'
+        after = self.netbox.dcim.device(1)
+
+        self.assertEqual('DC2', after.site.name)
+        self.assertEqual('DC1', before.site.name)
+
+
+class WhenDecodingLazilyIntoAnIdentityMap(ServerTestCase):
+    def setUp(self):
+        super(WhenDecodingLazilyIntoAnIdentityMap, self).setUp()
+        self.netbox = self.client(identity_map=IdentityMap(), lazy_models=True)
+
+    def test_nested_objects_read_later_are_shared(self):
+        devices = self.netbox.dcim.list_devices(limit=50)
+        sites = set(id(d.site) for d in devices)
+
+        self.assertEqual(1, len(sites))
+        self.assertIs(devices[0].site, self.netbox.dcim.device(7).site)
+
+
+class WhenProjectingListings(ServerTestCase):
+    def setUp(self):
+        super(WhenProjectingListings, self).setUp()
+        self.netbox = self.client()
+
+    def _check_records(self, devices):
+        self.assertEqual(list(range(1, NUM_DEVICES + 1)), [d.id for d in devices])
+        self.assertEqual(('id', 'rack', 'device_type', 'custom_fields'), devices[0]._fields)
+
+        # Nested fields are still built into models, every other field is dropped
+        self.assertEqual('R3', devices[0].rack.name)
+        self.assertEqual('Acme', devices[0].device_type.manufacturer.name)
+        self.assertEqual({'prod'}, devices[0].custom_fields.tags)
+        self.assertFalse(hasattr(devices[0], 'site'))
+
+        queries = [parse_qs(urlsplit(p).query) for p in self.server.paths]
+        self.assertEqual([['id,rack,device_type,custom_fields']] * 3, [q.get('fields') for q in queries])
+
+    def test_lists(self):
+        self._check_records(self.netbox.dcim.list_devices(
+            limit=50, fields=['id', 'rack', 'device_type', 'custom_fields']))
+
+    def test_iterators(self):
+        self._check_records(list(self.netbox.dcim.iter_devices(
+            page_size=50, fields=['id', 'rack', 'device_type', 'custom_fields'])))
+
+    def test_unknown_fields_are_refused_before_sending(self):
+        with self.assertRaises(ValueError):
+            self.netbox.dcim.list_devices(fields=['id', 'nonexistent'])
+
+        self.assertEqual([], self.server.paths)
+
+
+class WhenIteratingLazily(ServerTestCase):
+    def setUp(self):
+        super(WhenIteratingLazily, self).setUp()
+        self.netbox = self.client()
+
+    def test_pages_are_requested_as_results_are_consumed(self):
+        devices = self.netbox.dcim.iter_devices(page_size=10)
+        self.assertEqual([], self.server.paths)
+
+        first = [next(devices) for _ in range(10)]
+        self.assertEqual(list(range(1, 11)), [d.id for d in first])
+        self.assertEqual(1, len(self.server.paths))
+
+        next(devices)
+        self.assertEqual(2, len(self.server.paths))
+
+    def test_abandoning_the_iterator_skips_the_remaining_pages(self):
+        for device in self.netbox.dcim.iter_devices(page_size=10):
+            if device.id == 15:
+                break
+
+        self.assertEqual(2, len(self.server.paths))
+
+    def test_every_result_is_returned(self):
+        devices = self.netbox.dcim.iter_devices(page_size=50)
+        self.assertEqual(list(range(1, NUM_DEVICES + 1)), [d.id for d in devices])
+
+    def test_streamed_pages_return_the_same_results(self):
+        devices = list(self.client(stream_pages=True).dcim.iter_devices(page_size=50))
+
+        self.assertEqual(list(range(1, NUM_DEVICES + 1)), [d.id for d in devices])
+        self.assertEqual('DC1', devices[-1].site.name)
+        self.assertEqual(3, len(self.server.paths))
+
+
+class WhenWritingInBulk(ServerTestCase):
+    handler = FakeBulkNetbox
+
+    def setUp(self):
+        super(WhenWritingInBulk, self).setUp()
+        self.server.objects = defaultdict(dict)
+        self.server.bulk = True
+
+        self.interfaces = self.server.objects['interfaces']
+        self.netbox = self.client()
+
+    def _create(self, *names, chunk_size=2):
+        interfaces = [dict(name=name, form_factor=1000, device_id=5) for name in names]
+        return self.netbox.dcim.bulk_create_interfaces(interfaces, chunk_size=chunk_size)
+
+    def test_items_are_sent_in_chunks(self):
+        results = self._create('eth0', 'eth1', 'eth2', 'eth3', 'eth4')
+
+        self.assertEqual([('POST', 2), ('POST', 2), ('POST', 1)], [(m, n) for m, _, n in self.server.paths])
+        self.assertTrue(all(r.ok for r in results))
+        self.assertEqual([1, 2, 3, 4, 5], [r.id for r in results])
+
+    def test_rejected_items_roll_back_their_chunk_only(self):
+        results = self._create('eth0', 'bad', 'eth2', 'eth3')
+
+        self.assertEqual([False, False, True, True], [r.ok for r in results])
+        self.assertEqual(BULK_ROLLBACK_ERR, results[0].error.msg)
+        self.assertEqual({'name': ['bad']}, results[1].error.failures)
+        self.assertEqual(['eth2', 'eth3'], sorted(i['name'] for i in self.interfaces.values()))
+
+    def test_deletes_without_a_body_report_the_submitted_ids(self):
+        self._create('eth0', 'eth1', 'eth2')
+        results = self.netbox.dcim.bulk_delete_interfaces([3, 1], chunk_size=2)
+
+        self.assertEqual([(3, True), (1, True)], [(r.id, r.ok) for r in results])
+        self.assertEqual([2], list(self.interfaces))
+
+    def test_updates_fall_back_to_one_request_per_object_before_2_10(self):
+        self._create('eth0', 'eth1', 'eth2')
+        self.server.bulk = False
+        del self.server.paths[:]
+
+        results = self.netbox.dcim.bulk_update_interfaces(
+            [{'id': 1, 'name': 'lan0'}, {'id': 9, 'name': 'lan9'}, {'id': 3, 'name': 'lan2'}], chunk_size=2)
+
+        self.assertEqual([(1, True), (9, False), (3, True)], [(r.id, r.ok) for r in results])
+        self.assertEqual(['lan0', 'eth1', 'lan2'], [i['name'] for i in self.interfaces.values()])
+
+        # Only the first chunk is sent to the bulk endpoint
+        self.assertEqual(
+            [('PATCH', 2), ('PATCH', None), ('PATCH', None), ('PATCH', None)],
+            [(m, n) for m, _, n in self.server.paths])
+
+    def test_deletes_fall_back_to_one_request_per_object_before_2_10(self):
+        self._create('eth0', 'eth1', 'eth2')
+        self.server.bulk = False
+
+        results = self.netbox.dcim.bulk_delete_interfaces([1, 3])
+
+        self.assertEqual([(1, True), (3, True)], [(r.id, r.ok) for r in results])
+        self.assertEqual([2], list(self.interfaces))
+
+
+class WhenRevalidatingCachedResponses(ServerTestCase):
+    handler = FakeVersionedNetbox
+
+    def setUp(self):
+        super(WhenRevalidatingCachedResponses, self).setUp()
+        self.server.version = 1
+
+        self.now = 0.0
+        self.netbox = self.client(cache=ResponseCache(default_ttl=10, clock=lambda: self.now))
+
+    def test_fresh_responses_are_served_from_the_cache(self):
+        self.netbox.dcim.device(1)
+        self.now = 5
+        self.netbox.dcim.device(1)
+
+        self.assertEqual(1, len(self.server.paths))
+
+    def test_stale_responses_are_revalidated(self):
+        first = self.netbox.dcim.device(1)
+
+        self.now = 15
+        second = self.netbox.dcim.device(1)
+
+        self.assertEqual([None, '"v1"'], [etag for _, etag in self.server.paths])
+        self.assertEqual('"v1"', second.serial)
+        self.assertEqual(first.name, second.name)
+
+        # The 304 made the cached response fresh again
+        self.now = 20
+        self.netbox.dcim.device(1)
+        self.assertEqual(2, len(self.server.paths))
+
+    def test_changed_objects_are_downloaded_again(self):
+        self.netbox.dcim.device(1)
+
+        self.server.version = 2
+        self.now = 15
+
+        self.assertEqual('"v2"', self.netbox.dcim.device(1).serial)
+        self.assertEqual([None, '"v1"'], [etag for _, etag in self.server.paths])
+
+
+class WhenListingInterfacesForManyDevices(ServerTestCase):
+    handler = FakeFilteringNetbox
+
+    def setUp(self):
+        super(WhenListingInterfacesForManyDevices, self).setUp()
+        self.server.collections = {
+            'interfaces': [
+                {'id': i, 'name': 'eth{}'.format(i % 2), 'device': {'id': i // 2, 'name': 'host-{}'.format(i // 2)}}
+                for i in range(2, 22)]
+        }
+
+        self.netbox = self.client()
+
+    def test_device_ids_are_sent_in_chunks(self):
+        interfaces = self.netbox.dcim.list_interfaces_for_devices([1, 3, 5, 7, 9], chunk_size=2)
+
+        self.assertEqual([['1', '3'], ['5', '7'], ['9']], [q['device_id'] for _, q in self.server.paths])
+        self.assertEqual([2, 3, 6, 7, 10, 11, 14, 15, 18, 19], [i.id for i in interfaces])
+
+    def test_every_page_of_a_chunk_is_read(self):
+        interfaces = self.netbox.dcim.list_interfaces_for_devices(range(1, 11), chunk_size=10, limit=4)
+
+        self.assertEqual(list(range(2, 22)), [i.id for i in interfaces])
+        self.assertEqual(5, len(self.server.paths))
+
+
+class WhenListingTaggedDevices(ServerTestCase):
+    handler = FakeFilteringNetbox
+
+    def setUp(self):
+        super(WhenListingTaggedDevices, self).setUp()
+        self.server.collections = {
+            'devices': [
+                {'id': 1, 'name': 'host-1', 'custom_fields': {'Tags': 'prod,web'}},
+                {'id': 2, 'name': 'host-2', 'custom_fields': {'Tags': 'preprod,web'}},
+                {'id': 3, 'name': 'host-3', 'custom_fields': {'Tags': 'prod,db'}},
+                {'id': 4, 'name': 'host-4', 'custom_fields': {'Tags': 'prod,web,canary'}},
+                {'id': 5, 'name': 'host-5', 'custom_fields': {'Tags': None}}]
+        }
+
+        self.netbox = self.client()
+
+    def _listings(self):
+        # Requests other than the count lookups
+        return [q for _, q in self.server.paths if q.get('limit') != ['1']]
+
+    def test_single_tag_is_matched_exactly(self):
+        devices = self.netbox.dcim.list_devices_tagged(['prod'])
+
+        # preprod matches on the server but not against the parsed tags
+        self.assertEqual([1, 3, 4], [d.id for d in devices])
+        self.assertEqual([['prod']], [q['cf_Tags'] for q in self._listings()])
+
+    def test_only_the_rarest_tag_is_downloaded(self):
+        devices = self.netbox.dcim.list_devices_tagged(['web', 'canary', 'prod'])
+
+        self.assertEqual([4], [d.id for d in devices])
+        self.assertEqual([['canary']], [q['cf_Tags'] for q in self._listings()])
+
+    def test_nothing_is_downloaded_when_a_tag_matches_nothing(self):
+        self.assertEqual([], self.netbox.dcim.list_devices_tagged(['web', 'missing']))
+        self.assertEqual([], self._listings())
+
+    def test_no_tags_lists_every_device(self):
+        devices = self.netbox.dcim.list_devices_tagged([])
+        self.assertEqual([1, 2, 3, 4, 5], [d.id for d in devices])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,204 @@
+"""
+Incremental parsing of listing pages. The body of a page is fed to the parser in
+chunks as it comes off the socket and every entry of its results array is handed
+back as soon as it is complete, so that a page never has to be held in memory as
+a whole - neither as text nor as decoded JSON.
+"""
+import codecs
+import json
+import re
+
+# Bytes read off the socket at a time when streaming a page
+STREAM_CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+# Characters that can carry on a number, the empty string being the end of the buffer
+_NUMBER_CONTINUATION = frozenset(['', '.', 'e', 'E', '+', '-'] + list('0123456789'))
+
+# Marks a value that isn't complete yet
+_INCOMPLETE = object()
+
+# Parser states
+_START = 'start'
+_FIRST_KEY = 'first key'
+_KEY = 'key'
+_COLON = 'colon'
+_VALUE = 'value'
+_AFTER_VALUE = 'after value'
+_RESULTS = 'results'
+_FIRST_ITEM = 'first item'
+_ITEM = 'item'
+_AFTER_ITEM = 'after item'
+_DONE = 'done'
+
+
+class ResultStreamParser(object):
+    """
+    Push parser for a listing page. Entries of the results array are returned
+    from feed as they complete while every other field of the page, such as
+    count and next, is collected into the fields dict. A bare JSON array, as
+    returned by bulk requests, is streamed the same way.
+
+    Invalid JSON raises a ValueError, though a truncated body is only noticed
+    when the parser is closed.
+    """
+
+    def __init__(self, results_key='results'):
+        self.fields = dict()
+        self._results_key = results_key
+        self._text_decoder = codecs.getincrementaldecoder('utf-8')()
+        self._json_decoder = json.JSONDecoder()
+        self._buffer = ''
+        self._pos = 0
+        self._state = _START
+        self._key = None
+        self._bare_list = False
+
+    @property
+    def done(self):
+        return self._state == _DONE
+
+    def feed(self, chunk, final=False):
+        """
+        Feed the next chunk of the body and return the list of results it
+        completed.
+
+        :param chunk: bytes
+        :param final: whether this is the last chunk of the body
+        :return:
+        """
+        # Drop everything already parsed so the buffer only ever holds the
+        # result being read
+        self._buffer = self._buffer[self._pos:] + self._text_decoder.decode(chunk, final)
+        self._pos = 0
+
+        results = list()
+        while self._step(results, final):
+            pass
+
+        return results
+
+    def close(self):
+        """
+        Signal the end of the body and return any results still pending.
+        """
+        results = self.feed(b'', final=True)
+
+        if self._state != _DONE:
+            raise ValueError('Listing ended before it was complete')
+
+        return results
+
+    def _next_char(self):
+        self._pos = _WHITESPACE.match(self._buffer, self._pos).end()
+
+        if self._pos >= len(self._buffer):
+            return None
+
+        return self._buffer[self._pos]
+
+    def _value(self, final):
+        try:
+            value, end = self._json_decoder.raw_decode(self._buffer, self._pos)
+        except ValueError:
+            # Most likely the value continues in the next chunk
+            if final:
+                raise
+
+            return _INCOMPLETE
+
+        # A number is only complete once whatever follows it has arrived, up to
+        # then the next chunk may carry more of its digits, fraction or exponent
+        if not final and type(value) in (int, float) and self._buffer[end:end + 1] in _NUMBER_CONTINUATION:
+            return _INCOMPLETE
+
+        self._pos = end
+        return value
+
+    def _expect(self, char, expected):
+        if char not in expected:
+            raise ValueError('Expected one of {} at position {} but found {}'.format(
+                ', '.join(repr(e) for e in expected), self._pos, repr(char)))
+
+        self._pos += 1
+
+    def _step(self, results, final):
+        char = self._next_char()
+        if char is None:
+            return False
+
+        if self._state == _START:
+            self._expect(char, '{[')
+
+            if char == '[':
+                self._bare_list = True
+                self._state = _FIRST_ITEM
+            else:
+                self._state = _FIRST_KEY
+
+        elif self._state == _FIRST_KEY:
+            if char == '}':
+                self._pos += 1
+                self._state = _DONE
+            else:
+                self._state = _KEY
+
+        elif self._state == _KEY:
+            key = self._value(final)
+            if key is _INCOMPLETE:
+                return False
+
+            if not isinstance(key, str):
+                raise ValueError('Expected a key at position {}'.format(self._pos))
+
+            self._key = key
+            self._state = _COLON
+
+        elif self._state == _COLON:
+            self._expect(char, ':')
+            self._state = _RESULTS if self._key == self._results_key else _VALUE
+
+        elif self._state == _VALUE:
+            value = self._value(final)
+            if value is _INCOMPLETE:
+                return False
+
+            self.fields[self._key] = value
+            self._state = _AFTER_VALUE
+
+        elif self._state == _AFTER_VALUE:
+            self._expect(char, ',}')
+            self._state = _KEY if char == ',' else _DONE
+
+        elif self._state == _RESULTS:
+            self._expect(char, '[')
+            self._state = _FIRST_ITEM
+
+        elif self._state == _FIRST_ITEM:
+            if char == ']':
+                self._pos += 1
+                self._state = _DONE if self._bare_list else _AFTER_VALUE
+            else:
+                self._state = _ITEM
+
+        elif self._state == _ITEM:
+            value = self._value(final)
+            if value is _INCOMPLETE:
+                return False
+
+            results.append(value)
+            self._state = _AFTER_ITEM
+
+        elif self._state == _AFTER_ITEM:
+            self._expect(char, ',]')
+
+            if char == ',':
+                self._state = _ITEM
+            else:
+                self._state = _DONE if self._bare_list else _AFTER_VALUE
+
+        else:
+            raise ValueError('Unexpected data after the end of the listing at position {}'.format(self._pos))
+
+        return True
@@ -0,0 +1,67 @@
+import json
+import unittest
+
+from netbox_api.api.stream import ResultStreamParser
+
+_PAGE = {
+    'count': 3,
+    'next': 'http://localhost/api/dcim/devices/?limit=3&offset=3',
+    'previous': None,
+    'results': [
+        {'id': 1, 'name': 'host-1', 'position': 12.5e-1, 'custom_fields': {'Tags': 'prod'}},
+        {'id': 2, 'name': 'höst-2 ☃ "quoted"', 'position': -42, 'custom_fields': {}},
+        {'id': 3, 'name': None, 'position': 1000000, 'custom_fields': None}
+    ]
+}
+
+
+def _parse(body, chunk_size):
+    parser = ResultStreamParser()
+    results = list()
+
+    for offset in range(0, len(body), chunk_size):
+        results.extend(parser.feed(body[offset:offset + chunk_size]))
+
+    results.extend(parser.close())
+    return parser, results
+
+
+class WhenStreamingPages(unittest.TestCase):
+    def test_results_and_fields_survive_any_chunking(self):
+        body = json.dumps(_PAGE, indent=2).encode('utf-8')
+
+        for chunk_size in (1, 2, 3, 7, 64, len(body)):
+            parser, results = _parse(body, chunk_size)
+
+            self.assertEqual(_PAGE['results'], results)
+            self.assertEqual(_PAGE['next'], parser.fields['next'])
+            self.assertEqual(_PAGE['count'], parser.fields['count'])
+            self.assertNotIn('results', parser.fields)
+
+    def test_results_are_handed_back_as_they_complete(self):
+        body = json.dumps(_PAGE).encode('utf-8')
+        second_result = body.index(b'{"id": 2')
+
+        parser = ResultStreamParser()
+
+        self.assertEqual(_PAGE['results'][:1], parser.feed(body[:second_result]))
+        self.assertEqual(_PAGE['results'][1:], parser.feed(body[second_result:]))
+        self.assertTrue(parser.done)
+
+    def test_bare_lists_are_streamed(self):
+        _, results = _parse(b'[1, 22, {"a": [333]}]', 1)
+        self.assertEqual([1, 22, {'a': [333]}], results)
+
+    def test_truncated_pages_are_rejected(self):
+        parser = ResultStreamParser()
+        parser.feed(json.dumps(_PAGE).encode('utf-8')[:-10])
+
+        self.assertRaises(ValueError, parser.close)
+
+    def test_invalid_pages_are_rejected(self):
+        self.assertRaises(ValueError, _parse, b'{"results" [1]}', 4)
+        self.assertRaises(ValueError, _parse, b'{"results": [1]} trailing', 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,365 @@
+"""
+Fake Netbox servers and a TestCase base for testing the clients against them.
+Every fake is a request handler class run by start_server on a free local port,
+tests set up the objects a fake serves as attributes of the server.
+"""
+import json
+import threading
+import unittest
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+from netbox_api.api.aio import AsyncNetboxClient
+from netbox_api.api.client import NetboxClient
+
+# Number of devices FakeNetbox serves
+NUM_DEVICES = 120
+
+
+def device_contents(device_id, site_name='DC1'):
+    return {
+        'id': device_id,
+        'name': 'host-{}'.format(device_id),
+        'site': {'id': 1, 'url': None, 'name': site_name, 'slug': 'dc1'},
+        'rack': {'id': 3, 'url': None, 'name': 'R3', 'display_name': 'R3'},
+        'device_type': {'id': 2, 'url': None, 'model': 'X1', 'slug': 'x1', 'manufacturer': {'id': 4, 'name': 'Acme'}},
+        'position': device_id % 42,
+        'custom_fields': {'Tags': 'prod'}
+    }
+
+
+class FakeNetbox(BaseHTTPRequestHandler):
+    """
+    Serves NUM_DEVICES devices, all in the site named server.site_name if set.
+    """
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.server.paths.append(self.path)
+
+        url = urlsplit(self.path)
+        parts = [p for p in url.path.split('/') if len(p) > 0]
+        site_name = getattr(self.server, 'site_name', 'DC1')
+
+        if parts[-1].isdigit():
+            body = device_contents(int(parts[-1]), site_name)
+        else:
+            query = parse_qs(url.query)
+            limit = int(query.get('limit', ['50'])[0])
+            offset = int(query.get('offset', ['0'])[0])
+
+            # Like Netbox, next links keep every other query parameter
+            next_page = None
+            if offset + limit < NUM_DEVICES:
+                next_query = dict(query, limit=[limit], offset=[offset + limit])
+                next_page = 'http://{}:{}{}?{}'.format(
+                    self.server.server_address[0], self.server.server_address[1], url.path,
+                    urlencode(next_query, doseq=True))
+
+            body = {
+                'count': NUM_DEVICES,
+                'next': next_page,
+                'previous': None,
+                'results': [
+                    device_contents(i, site_name) for i in range(offset + 1, min(offset + limit, NUM_DEVICES) + 1)]
+            }
+
+        content = json.dumps(body).encode('utf-8')
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+
+class FakeBulkNetbox(BaseHTTPRequestHandler):
+    """
+    Serves every endpoint from server.objects, keyed by the last part of the
+    endpoint path. Listings filter on fields equal to the query parameters,
+    or on the ID or name of the object a field refers to. Bulk writes are all
+    or nothing and items named 'bad' are rejected. Bulk updates and deletes
+    are answered with a 405, like Netbox before 2.10, unless server.bulk is
+    set.
+    """
+    protocol_version = 'HTTP/1.1'
+
+    # Field -> collection of the objects written bodies refer to by ID
+    references = {'device': 'devices', 'interface': 'interfaces', 'tenant': 'tenants'}
+
+    # Fields written bodies carry that Netbox doesn't store
+    ignored = ('is_primary',)
+
+    # Fields written as a value and answered with their label
+    choices = ('form_factor',)
+
+    def log_message(self, *args):
+        pass
+
+    def _read_body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return json.loads(self.rfile.read(length)) if length > 0 else None
+
+    def _send(self, status, body=None):
+        content = b'' if body is None else json.dumps(body).encode('utf-8')
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def _collection(self):
+        parts = [p for p in urlsplit(self.path).path.split('/') if len(p) > 0]
+
+        if parts[-1].isdigit():
+            return parts[-2], int(parts[-1])
+
+        return parts[-1], None
+
+    def do_GET(self):
+        self.server.paths.append(('GET', self.path, None))
+        collection, obj_id = self._collection()
+        objects = self.server.objects[collection]
+
+        if obj_id is not None:
+            if obj_id not in objects:
+                return self._send(404, {'detail': 'Not found.'})
+
+            return self._send(200, objects[obj_id])
+
+        query = dict((k, v[0]) for k, v in parse_qs(urlsplit(self.path).query).items() if k not in ('limit', 'offset'))
+        results = [o for o in objects.values() if all(self._matches(o, k, v) for k, v in query.items())]
+
+        self._send(200, {'count': len(results), 'next': None, 'previous': None, 'results': results})
+
+    def _matches(self, obj, key, value):
+        field = obj.get(key)
+
+        # IP addresses belong to a device through their interface
+        if key == 'device' and field is None and isinstance(obj.get('interface'), dict):
+            field = obj['interface'].get('device')
+
+        if isinstance(field, dict):
+            return value in (str(field.get('id')), str(field.get('name')))
+
+        return str(field) == value
+
+    def _nest(self, body):
+        # Replace IDs with the objects they refer to, the way Netbox answers
+        nested = dict((k, v) for k, v in body.items() if k not in self.ignored)
+
+        for field, collection in self.references.items():
+            if isinstance(nested.get(field), int):
+                nested[field] = dict(self.server.objects[collection].get(nested[field], {'id': nested[field]}))
+
+        for field in self.choices:
+            if isinstance(nested.get(field), int):
+                nested[field] = {'value': nested[field], 'label': str(nested[field])}
+
+        return nested
+
+    def _write(self, method):
+        body = self._read_body()
+        self.server.paths.append((method, self.path, len(body) if isinstance(body, list) else None))
+
+        collection, obj_id = self._collection()
+        objects = self.server.objects[collection]
+
+        if obj_id is not None:
+            if obj_id not in objects:
+                return self._send(404, {'detail': 'Not found.'})
+
+            if method == 'DELETE':
+                del objects[obj_id]
+                return self._send(204)
+
+            objects[obj_id].update(self._nest(body))
+            return self._send(200, objects[obj_id])
+
+        if method != 'POST' and not self.server.bulk:
+            return self._send(405, {'detail': 'Method "{}" not allowed.'.format(method)})
+
+        errors = list()
+        for item in body:
+            if item.get('name') == 'bad':
+                errors.append({'name': ['bad']})
+            elif method != 'POST' and item['id'] not in objects:
+                errors.append({'id': ['missing']})
+            else:
+                errors.append({})
+
+        if any(errors):
+            return self._send(400, errors)
+
+        results = list()
+        for item in body:
+            if method == 'POST':
+                # IDs aren't reused once their object is deleted
+                last_id = self.server.last_ids[collection] = max([self.server.last_ids[collection]] + list(objects)) + 1
+                item = dict(self._nest(item), id=last_id)
+                objects[item['id']] = item
+            elif method == 'PATCH':
+                objects[item['id']].update(self._nest(item))
+                item = objects[item['id']]
+            else:
+                del objects[item['id']]
+
+            results.append(item)
+
+        if method == 'DELETE':
+            return self._send(204)
+
+        self._send(201 if method == 'POST' else 200, results)
+
+    def do_POST(self):
+        self._write('POST')
+
+    def do_PATCH(self):
+        self._write('PATCH')
+
+    def do_DELETE(self):
+        self._write('DELETE')
+
+
+class FakeVersionedNetbox(BaseHTTPRequestHandler):
+    """
+    Serves single devices tagged with an ETag for server.version and answers
+    a matching If-None-Match with a bodiless 304.
+    """
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.server.paths.append((self.path, self.headers.get('If-None-Match')))
+
+        etag = '"v{}"'.format(self.server.version)
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        device = device_contents(int(urlsplit(self.path).path.strip('/').split('/')[-1]))
+        device['serial'] = etag
+        content = json.dumps(device).encode('utf-8')
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(content)
+
+
+class FakeFilteringNetbox(BaseHTTPRequestHandler):
+    """
+    Serves listings of the objects in server.collections, keyed by the last
+    part of the endpoint path, filtered by device_id and cf_* parameters.
+    """
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def _matches(self, obj, key, values):
+        if key == 'device_id':
+            return str(obj['device']['id']) in values
+
+        if key.startswith('cf_'):
+            # Netbox matches custom fields as a substring of the raw value
+            return values[0] in (obj['custom_fields'].get(key[3:]) or '')
+
+        return True
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        self.server.paths.append((url.path, dict(query)))
+
+        limit = int(query.pop('limit', ['50'])[0])
+        offset = int(query.pop('offset', ['0'])[0])
+
+        objects = self.server.collections[url.path.strip('/').split('/')[-1]]
+        objects = [o for o in objects if all(self._matches(o, k, v) for k, v in query.items())]
+
+        next_page = None
+        if offset + limit < len(objects):
+            next_page = 'http://{}:{}{}?{}'.format(
+                self.server.server_address[0], self.server.server_address[1], url.path,
+                urlencode(dict(query, limit=limit, offset=offset + limit), doseq=True))
+
+        content = json.dumps({
+            'count': len(objects),
+            'next': next_page,
+            'previous': None,
+            'results': objects[offset:offset + limit]
+        }).encode('utf-8')
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+
+def start_server(handler_cls):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler_cls)
+    server.daemon_threads = True
+
+    # Every path requested, in the order they arrived
+    server.paths = list()
+
+    # Collection -> last ID handed out by a fake that creates objects
+    server.last_ids = defaultdict(int)
+
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def stop_server(server):
+    server.shutdown()
+    server.server_close()
+
+
+def _client_kwargs(server, kwargs):
+    return dict(host='127.0.0.1', port=server.server_address[1], token='token', scheme='http', **kwargs)
+
+
+class ServerTestCase(unittest.TestCase):
+    """
+    Starts a fake Netbox answering with handler for every test. Clients made
+    with client() talk to it and are closed when the test ends.
+    """
+    handler = FakeNetbox
+
+    def setUp(self):
+        self.server = start_server(self.handler)
+        self.addCleanup(stop_server, self.server)
+
+    def client(self, **kwargs):
+        client = NetboxClient(**_client_kwargs(self.server, kwargs))
+        self.addCleanup(client.close)
+        return client
+
+
+class AsyncServerTestCase(unittest.IsolatedAsyncioTestCase):
+    """
+    ServerTestCase for the asyncio client. Clients made with client() are
+    closed by using them as async context managers.
+    """
+    handler = FakeNetbox
+
+    def setUp(self):
+        self.server = start_server(self.handler)
+        self.addCleanup(stop_server, self.server)
+
+    def client(self, **kwargs):
+        return AsyncNetboxClient(**_client_kwargs(self.server, kwargs))
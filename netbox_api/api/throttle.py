@@ -0,0 +1,287 @@
+"""
+Client side throttling of the requests sent to Netbox. A token bucket caps the
+request rate while an adaptive limiter caps the number of requests in flight,
+growing the limit by one per round of requests that come back quickly and
+successfully and halving it whenever the server answers slowly or with an
+error. Bulk jobs can then run as fast as the server keeps up with.
+
+When the server asks for a pause through a Retry-After header on a 429 or 503
+no further requests are let through until it is over.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+
+# Longest pause a Retry-After header is obeyed for, in seconds
+MAX_RETRY_AFTER = 60.0
+
+# Waits shorter than this are rounding errors in the clock arithmetic
+_EPSILON = 1e-9
+
+
+class TokenBucket(object):
+    def __init__(self, rate, burst=None, clock=time.monotonic, sleep=time.sleep):
+        """
+        :param rate: tokens added per second
+        :param burst: most tokens the bucket holds, defaults to one second worth of tokens
+        :param clock:
+        :param sleep:
+        """
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else max(1.0, rate))
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._tokens = self.burst
+        self._updated_at = clock()
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def acquire(self, tokens=1):
+        """
+        Take tokens from the bucket, waiting for them to be added if needed.
+        Returns the number of seconds spent waiting.
+        """
+        waited = 0.0
+
+        while True:
+            with self._lock:
+                self._refill(self._clock())
+
+                if self._tokens >= tokens - _EPSILON:
+                    self._tokens = max(0.0, self._tokens - tokens)
+                    return waited
+
+                wait = (tokens - self._tokens) / self.rate
+
+            self._sleep(wait)
+            waited += wait
+
+    @property
+    def tokens(self):
+        with self._lock:
+            self._refill(self._clock())
+            return self._tokens
+
+
+class AdaptiveLimiter(object):
+    def __init__(self, initial_limit=4, min_limit=1, max_limit=64, latency_target=1.0, decrease_factor=0.5,
+                 max_error_rate=0.1, window=20, clock=time.monotonic):
+        """
+        :param initial_limit: requests allowed in flight to begin with
+        :param min_limit:
+        :param max_limit:
+        :param latency_target: seconds a request may take before it counts as a sign of overload
+        :param decrease_factor: factor the limit is multiplied by when the server is overloaded
+        :param max_error_rate: share of failed requests over the window that counts as overload
+        :param window: number of recent requests the error rate is worked out over
+        :param clock:
+        """
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target = latency_target
+        self.decrease_factor = decrease_factor
+        self.max_error_rate = max_error_rate
+        self._window = window
+        self._clock = clock
+        self._condition = threading.Condition()
+        self._limit = float(initial_limit)
+        self._in_flight = 0
+        self._outcomes = list()
+        self._decreases = 0
+
+        # Requests completed since the limit was last cut and how many were in
+        # flight when it was, the first cut may happen straight away
+        self._since_decrease = 0
+        self._in_flight_at_decrease = 0
+
+    @property
+    def limit(self):
+        return int(self._limit)
+
+    @property
+    def in_flight(self):
+        return self._in_flight
+
+    @property
+    def decreases(self):
+        return self._decreases
+
+    def acquire(self):
+        """
+        Wait until another request may be sent. Returns the number of seconds
+        spent waiting.
+        """
+        started_at = self._clock()
+
+        with self._condition:
+            while self._in_flight >= int(self._limit):
+                self._condition.wait()
+
+            self._in_flight += 1
+
+        return self._clock() - started_at
+
+    def release(self, latency, failed):
+        """
+        Record the outcome of a request sent after acquire.
+
+        :param latency: seconds the request took
+        :param failed: whether the server failed the request or couldn't be reached
+        """
+        with self._condition:
+            self._in_flight -= 1
+
+            self._outcomes.append(failed)
+            if len(self._outcomes) > self._window:
+                del self._outcomes[0]
+
+            error_rate = sum(self._outcomes) / float(len(self._outcomes))
+            overloaded = (failed and error_rate > self.max_error_rate) or latency > self.latency_target
+
+            self._since_decrease += 1
+
+            if overloaded:
+                # Requests that were already in flight when the limit was cut
+                # report the same overload, only cut once per round
+                if self._since_decrease > self._in_flight_at_decrease:
+                    self._limit = max(float(self.min_limit), self._limit * self.decrease_factor)
+                    self._decreases += 1
+                    self._since_decrease = 0
+                    self._in_flight_at_decrease = self._in_flight
+                    self._outcomes = list()
+            else:
+                # Additive increase of one per limit's worth of good requests
+                self._limit = min(float(self.max_limit), self._limit + 1.0 / self._limit)
+
+            self._condition.notify_all()
+
+
+def _failed(status_code):
+    # No status means the request didn't get an answer at all
+    return status_code is None or status_code == 429 or status_code >= 500
+
+
+def parse_retry_after(value, now=None):
+    """
+    Parse a Retry-After header, given either in seconds or as an HTTP date,
+    into the number of seconds to wait. None is returned for missing or
+    malformed values.
+
+    :param value:
+    :param now: POSIX timestamp HTTP dates are measured from, defaults to the current time
+    :return:
+    """
+    if value is None:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+    return max(0.0, retry_at - (time.time() if now is None else now))
+
+
+class Throttle(object):
+    """
+    Combines an optional token bucket and an optional adaptive limiter in front
+    of every request sent through a handler. Cached responses don't count.
+    """
+
+    def __init__(self, bucket=None, limiter=None, clock=time.monotonic, sleep=time.sleep):
+        self.bucket = bucket
+        self.limiter = limiter
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._wait_seconds = 0.0
+        self._pauses = 0
+
+        # Clock reading before which no request is let through
+        self._resume_at = None
+
+    def _wait_for_pause(self):
+        waited = 0.0
+
+        while True:
+            with self._lock:
+                wait = 0.0 if self._resume_at is None else self._resume_at - self._clock()
+
+            if wait <= _EPSILON:
+                return waited
+
+            self._sleep(wait)
+            waited += wait
+
+    def pause(self, seconds):
+        """
+        Hold back every request for the given number of seconds, or until an
+        earlier pause ends if that is later.
+        """
+        resume_at = self._clock() + min(seconds, MAX_RETRY_AFTER)
+
+        with self._lock:
+            if self._resume_at is None or resume_at > self._resume_at:
+                self._resume_at = resume_at
+                self._pauses += 1
+
+    @contextmanager
+    def admit(self):
+        """
+        Wait for the request to be allowed through. The block is handed a dict
+        to record the status code and Retry-After header it got back in,
+        leaving the status code unset if it got no answer.
+        """
+        waited = self._wait_for_pause()
+
+        if self.bucket is not None:
+            waited += self.bucket.acquire()
+
+        if self.limiter is not None:
+            waited += self.limiter.acquire()
+
+        with self._lock:
+            self._requests += 1
+            self._wait_seconds += waited
+
+        outcome = dict(status_code=None, retry_after=None)
+        started_at = self._clock()
+
+        try:
+            yield outcome
+        finally:
+            if self.limiter is not None:
+                self.limiter.release(self._clock() - started_at, _failed(outcome['status_code']))
+
+            if outcome['status_code'] in (429, 503):
+                retry_after = parse_retry_after(outcome['retry_after'])
+                if retry_after is not None:
+                    self.pause(retry_after)
+
+    def metrics(self):
+        metrics = {
+            'requests': self._requests,
+            'wait_seconds': self._wait_seconds,
+            'pauses': self._pauses
+        }
+
+        if self.bucket is not None:
+            metrics['rate'] = self.bucket.rate
+            metrics['tokens'] = self.bucket.tokens
+
+        if self.limiter is not None:
+            metrics['limit'] = self.limiter.limit
+            metrics['in_flight'] = self.limiter.in_flight
+            metrics['limit_decreases'] = self.limiter.decreases
+
+        return metrics
@@ -0,0 +1,195 @@
+import unittest
+
+from netbox_api.api.throttle import MAX_RETRY_AFTER, AdaptiveLimiter, Throttle, TokenBucket, parse_retry_after
+
+
+class _Clock(object):
+    """
+    A clock that only moves when it is slept on or advanced by hand.
+    """
+
+    def __init__(self):
+        self.now = 100.0
+        self.sleeps = list()
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class WhenTakingTokens(unittest.TestCase):
+    def setUp(self):
+        self.clock = _Clock()
+        self.bucket = TokenBucket(rate=10, burst=5, clock=self.clock, sleep=self.clock.sleep)
+
+    def test_a_full_bucket_allows_a_burst(self):
+        waited = [self.bucket.acquire() for _ in range(5)]
+
+        self.assertEqual([0.0] * 5, waited)
+        self.assertEqual([], self.clock.sleeps)
+
+    def test_an_empty_bucket_waits_for_a_refill(self):
+        for _ in range(5):
+            self.bucket.acquire()
+
+        self.assertAlmostEqual(0.1, self.bucket.acquire())
+        self.assertAlmostEqual(0.1, self.bucket.acquire())
+        self.assertEqual(2, len(self.clock.sleeps))
+
+    def test_the_bucket_refills_at_the_rate_up_to_the_burst(self):
+        for _ in range(5):
+            self.bucket.acquire()
+
+        self.clock.now += 0.3
+        self.assertAlmostEqual(3.0, self.bucket.tokens)
+
+        self.clock.now += 60
+        self.assertAlmostEqual(5.0, self.bucket.tokens)
+
+    def test_burst_defaults_to_one_second_of_tokens(self):
+        self.assertEqual(10.0, TokenBucket(rate=10, clock=self.clock).burst)
+        self.assertEqual(1.0, TokenBucket(rate=0.5, clock=self.clock).burst)
+
+
+class WhenAdaptingTheLimit(unittest.TestCase):
+    def setUp(self):
+        self.limiter = AdaptiveLimiter(initial_limit=8, min_limit=1, max_limit=10, latency_target=1.0)
+
+    def _concurrent(self, count, latency=0.1, failed=False):
+        # Send count requests at once, there must be room for all of them
+        self.assertLessEqual(count, self.limiter.limit)
+
+        for _ in range(count):
+            self.limiter.acquire()
+
+        for _ in range(count):
+            self.limiter.release(latency, failed)
+
+    def _sequential(self, count, latency=0.1, failed=False):
+        for _ in range(count):
+            self.limiter.acquire()
+            self.limiter.release(latency, failed)
+
+    def test_fast_successful_requests_raise_the_limit_by_about_one_per_round(self):
+        self._concurrent(8)
+        self.assertEqual(8, self.limiter.limit)
+
+        self._sequential(1)
+        self.assertEqual(9, self.limiter.limit)
+
+        # Never past the maximum
+        self._sequential(50)
+        self.assertEqual(10, self.limiter.limit)
+
+    def test_a_round_of_failures_halves_the_limit_once(self):
+        self._concurrent(8, failed=True)
+
+        self.assertEqual(4, self.limiter.limit)
+        self.assertEqual(1, self.limiter.decreases)
+        self.assertEqual(0, self.limiter.in_flight)
+
+    def test_slow_requests_halve_the_limit(self):
+        self._sequential(1, latency=2.0)
+        self.assertEqual(4, self.limiter.limit)
+
+    def test_the_limit_recovers_additively(self):
+        self._concurrent(8, failed=True)
+
+        self._sequential(4)
+        self.assertEqual(4, self.limiter.limit)
+
+        self._sequential(1)
+        self.assertEqual(5, self.limiter.limit)
+
+    def test_the_limit_does_not_fall_below_the_minimum(self):
+        self._sequential(10, failed=True)
+        self.assertEqual(1, self.limiter.limit)
+
+    def test_occasional_failures_are_tolerated(self):
+        self._sequential(19)
+        self._sequential(1, failed=True)
+
+        self.assertEqual(0, self.limiter.decreases)
+
+
+class WhenThrottlingRequests(unittest.TestCase):
+    def setUp(self):
+        self.clock = _Clock()
+        self.limiter = AdaptiveLimiter(initial_limit=8, clock=self.clock)
+        self.throttle = Throttle(limiter=self.limiter, clock=self.clock, sleep=self.clock.sleep)
+
+    def _request(self, status_code, retry_after=None, latency=0.1):
+        with self.throttle.admit() as outcome:
+            self.clock.now += latency
+            outcome['status_code'] = status_code
+            outcome['retry_after'] = retry_after
+
+    def test_too_many_requests_halves_the_limit_and_pauses(self):
+        self._request(429, retry_after='2')
+
+        self.assertEqual(4, self.limiter.limit)
+        self.assertEqual([], self.clock.sleeps)
+
+        # The next request waits out the rest of the pause
+        self._request(200)
+        self.assertEqual([2.0], self.clock.sleeps)
+        self.assertEqual(2.0, self.throttle.metrics()['wait_seconds'])
+
+    def test_unavailable_with_a_date_pauses(self):
+        self._request(503, retry_after='Wed, 21 Oct 2026 07:28:00 GMT')
+        self._request(200)
+
+        # The date is long past or far ahead of this fake clock, either way the pause is capped
+        self.assertLessEqual(sum(self.clock.sleeps), MAX_RETRY_AFTER)
+        self.assertEqual(1, self.limiter.decreases)
+
+    def test_retry_after_is_ignored_on_other_statuses(self):
+        self._request(200, retry_after='30')
+        self._request(200)
+
+        self.assertEqual([], self.clock.sleeps)
+        self.assertEqual(0, self.throttle.metrics()['pauses'])
+
+    def test_slow_answers_count_against_the_limit(self):
+        self._request(200, latency=5.0)
+        self.assertEqual(4, self.limiter.limit)
+
+    def test_overlapping_pauses_keep_the_latest_end(self):
+        self.throttle.pause(5)
+        self.throttle.pause(1)
+        self._request(200)
+
+        self.assertEqual([5.0], self.clock.sleeps)
+        self.assertEqual(1, self.throttle.metrics()['pauses'])
+
+    def test_metrics(self):
+        self._request(200)
+        self._request(200)
+
+        metrics = self.throttle.metrics()
+        self.assertEqual(2, metrics['requests'])
+        self.assertEqual(8, metrics['limit'])
+        self.assertEqual(0, metrics['in_flight'])
+        self.assertNotIn('rate', metrics)
+
+
+class WhenParsingRetryAfter(unittest.TestCase):
+    def test_seconds(self):
+        self.assertEqual(120.0, parse_retry_after('120'))
+
+    def test_http_date(self):
+        self.assertEqual(30.0, parse_retry_after('Thu, 01 Jan 1970 00:01:00 GMT', now=30.0))
+
+    def test_dates_in_the_past_do_not_wait(self):
+        self.assertEqual(0.0, parse_retry_after('Thu, 01 Jan 1970 00:01:00 GMT', now=90.0))
+
+    def test_malformed_values(self):
+        self.assertIsNone(parse_retry_after(None))
+        self.assertIsNone(parse_retry_after('soon'))
+
+
+if __name__ == '__main__':
+    unittest.main()
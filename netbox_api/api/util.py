@@ -1,8 +1,83 @@
+from netbox_api.api.aio import AsyncNetboxClient
+from netbox_api.api.cache import ResponseCache
 from netbox_api.api.client import NetboxClient
+from netbox_api.api.protocol import ConnectionSettings
+from netbox_api.api.throttle import AdaptiveLimiter, Throttle, TokenBucket
 from netbox_api.config import load_config
 
 
-def new_api_client(host=None, port=80, scheme='http', token=None, ca_cert_path=None):
+def _load_cache(cfg):
+    # Caching is opt-in through a [cache] section
+    if not cfg.has_section('cache'):
+        return None
+
+    # Options that look like endpoints set that endpoint's TTL
+    endpoint_ttls = dict()
+    for option, value in cfg.items('cache'):
+        if option.startswith('/'):
+            endpoint_ttls[option] = float(value)
+
+    return ResponseCache(
+        max_entries=int(cfg.get('cache', 'max_entries', default=1024)),
+        default_ttl=float(cfg.get('cache', 'ttl', default=60)),
+        endpoint_ttls=endpoint_ttls)
+
+
+def _optional_float(value):
+    # Timeouts of none wait forever
+    if value is None or str(value).lower() == 'none':
+        return None
+
+    return float(value)
+
+
+def _load_connection(cfg):
+    # Connection tuning is optional, anything left out keeps its default
+    if not cfg.has_section('connection'):
+        return None
+
+    settings = ConnectionSettings()
+
+    for option in ('pool_connections', 'pool_maxsize', 'retries'):
+        setattr(settings, option, int(cfg.get('connection', option, default=getattr(settings, option))))
+
+    settings.backoff_factor = float(cfg.get('connection', 'backoff_factor', default=settings.backoff_factor))
+
+    for option in ('connect_timeout', 'read_timeout'):
+        setattr(settings, option, _optional_float(cfg.get('connection', option, default=getattr(settings, option))))
+
+    retry_statuses = cfg.get('connection', 'retry_statuses', default=None)
+    if retry_statuses is not None:
+        settings.retry_statuses = tuple(int(s) for s in retry_statuses.split(',') if len(s.strip()) > 0)
+
+    return settings
+
+
+def _load_throttle(cfg):
+    # Throttling is opt-in through a [throttle] section, rate enables the token
+    # bucket and max_limit the adaptive concurrency limit
+    if not cfg.has_section('throttle'):
+        return None
+
+    bucket = None
+    if cfg.get('throttle', 'rate', default=None) is not None:
+        bucket = TokenBucket(
+            rate=float(cfg.get('throttle', 'rate')),
+            burst=_optional_float(cfg.get('throttle', 'burst', default=None)))
+
+    limiter = None
+    if cfg.get('throttle', 'max_limit', default=None) is not None:
+        limiter = AdaptiveLimiter(
+            initial_limit=int(cfg.get('throttle', 'initial_limit', default=4)),
+            min_limit=int(cfg.get('throttle', 'min_limit', default=1)),
+            max_limit=int(cfg.get('throttle', 'max_limit')),
+            latency_target=float(cfg.get('throttle', 'latency_target', default=1.0)))
+
+    return Throttle(bucket, limiter)
+
+
+def _client_kwargs(host, port, scheme, token, ca_cert_path, page_workers, cache, identity_map, lazy_models,
+                   json_decoder, stream_pages, connection, throttle):
     if host is None and token is None:
         # If nothing was passed to us try to load the configuration as a last ditch
         cfg = load_config()
@@ -12,11 +87,55 @@ def new_api_client(host=None, port=80, scheme='http', token=None, ca_cert_path=N
         token = cfg.get('netbox', 'token')
         scheme = cfg.get('netbox', 'scheme', default='http')
         ca_cert_path = cfg.get('netbox', 'ca_cert', default=None)
+        page_workers = int(cfg.get('netbox', 'page_workers', default=page_workers))
+        json_decoder = cfg.get('netbox', 'json_decoder', default=json_decoder)
+        stream_pages = cfg.getboolean('netbox', 'stream_pages', default=stream_pages)
+
+        if cache is None:
+            cache = _load_cache(cfg)
+
+        if connection is None:
+            connection = _load_connection(cfg)
 
+        if throttle is None:
+            throttle = _load_throttle(cfg)
+
+    return {
+        'host': host,
+        'port': port,
+        'scheme': scheme,
+        'token': token,
+        'verify': ca_cert_path,
+        'page_workers': page_workers,
+        'cache': cache,
+        'identity_map': identity_map,
+        'lazy_models': lazy_models,
+        'json_decoder': json_decoder,
+        'stream_pages': stream_pages,
+        'connection': connection,
+        'throttle': throttle
+    }
+
+
+def new_api_client(host=None, port=80, scheme='http', token=None, ca_cert_path=None, page_workers=1, cache=None,
+                   identity_map=None, lazy_models=False, json_decoder=None, stream_pages=False, connection=None,
+                   throttle=None):
     # Create the API client
-    return NetboxClient(
-        host=host,
-        port=port,
-        scheme=scheme,
-        token=token,
-        verify=ca_cert_path)
+    return NetboxClient(**_client_kwargs(
+        host, port, scheme, token, ca_cert_path, page_workers, cache, identity_map, lazy_models, json_decoder,
+        stream_pages, connection, throttle))
+
+
+def new_async_api_client(host=None, port=80, scheme='http', token=None, ca_cert_path=None, page_workers=1,
+                         cache=None, identity_map=None, lazy_models=False, json_decoder=None, stream_pages=False,
+                         connection=None, connection_limit=100):
+    client_kwargs = _client_kwargs(
+        host, port, scheme, token, ca_cert_path, page_workers, cache, identity_map, lazy_models, json_decoder,
+        stream_pages, connection, None)
+
+    # The throttle blocks whole threads while waiting so it doesn't apply to the
+    # asyncio client, whose concurrency is capped by connection_limit instead
+    del client_kwargs['throttle']
+
+    # Create the asyncio API client, this requires aiohttp to be installed
+    return AsyncNetboxClient(connection_limit=connection_limit, **client_kwargs)
@@ -0,0 +1,132 @@
+import json
+import os
+import tempfile
+import unittest
+from http.server import BaseHTTPRequestHandler
+from unittest import mock
+
+import requests
+
+from netbox_api.api import ConnectionSettings
+from netbox_api.api.protocol import HTTPException
+from netbox_api.api.testing import ServerTestCase, device_contents
+from netbox_api.api.util import _load_connection
+from netbox_api.config import PynetboxConfig
+
+
+class _FlakyNetbox(BaseHTTPRequestHandler):
+    """
+    Answers the first request of every method with a 503 and the rest as a
+    healthy server would.
+    """
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def _answer(self, status, body):
+        self.server.paths.append((self.command, self.path))
+
+        if self.command not in self.server.failed:
+            self.server.failed.add(self.command)
+            status, body = 503, {'detail': 'Unavailable'}
+
+        content = json.dumps(body).encode('utf-8')
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def do_GET(self):
+        self._answer(200, device_contents(1))
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = json.loads(self.rfile.read(length))
+
+        self._answer(201, dict(body, id=1))
+
+
+class WhenLoadingConnectionSettings(unittest.TestCase):
+    def setUp(self):
+        self.configs = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.configs.cleanup()
+
+    def _config(self, contents):
+        path = os.path.join(self.configs.name, 'netbox_api')
+        with open(path, 'w') as fout:
+            fout.write(contents)
+
+        return PynetboxConfig(path)
+
+    def test_every_option(self):
+        settings = _load_connection(self._config(
+            '[connection]\n'
+            'pool_connections = 2\n'
+            'pool_maxsize = 32\n'
+            'retries = 5\n'
+            'backoff_factor = 0.1\n'
+            'retry_statuses = 502, 503,\n'
+            'connect_timeout = none\n'
+            'read_timeout = 30\n'))
+
+        self.assertEqual(2, settings.pool_connections)
+        self.assertEqual(32, settings.pool_maxsize)
+        self.assertEqual(5, settings.retries)
+        self.assertEqual(0.1, settings.backoff_factor)
+        self.assertEqual((502, 503), settings.retry_statuses)
+        self.assertEqual((None, 30.0), settings.timeout)
+
+    def test_options_left_out_keep_their_defaults(self):
+        settings = _load_connection(self._config('[connection]\npool_maxsize = 32\n'))
+        defaults = ConnectionSettings()
+
+        self.assertEqual(32, settings.pool_maxsize)
+        self.assertEqual(defaults.retry_statuses, settings.retry_statuses)
+        self.assertEqual(defaults.timeout, settings.timeout)
+
+    def test_no_connection_section(self):
+        self.assertIsNone(_load_connection(self._config('[netbox]\nhost = netbox\n')))
+
+
+class WhenConnecting(ServerTestCase):
+    handler = _FlakyNetbox
+
+    def setUp(self):
+        super(WhenConnecting, self).setUp()
+        self.server.failed = set()
+
+        self.netbox = self.client(connection=ConnectionSettings(
+            pool_maxsize=16, retries=2, backoff_factor=0, retry_statuses=(503,), connect_timeout=2, read_timeout=7))
+
+    def test_the_adapter_is_configured(self):
+        adapter = self.netbox._request_handler._session.get_adapter('http://')
+
+        self.assertEqual(16, adapter.poolmanager.connection_pool_kw['maxsize'])
+        self.assertEqual(2, adapter.max_retries.total)
+        self.assertEqual((503,), adapter.max_retries.status_forcelist)
+
+    def test_requests_carry_the_timeouts(self):
+        spy = mock.patch.object(requests.Session, 'request', autospec=True, side_effect=requests.Session.request)
+        with spy as request:
+            self.netbox.dcim.device(1)
+
+        self.assertEqual((2, 7), request.call_args[1]['timeout'])
+
+    def test_gets_are_retried(self):
+        self.assertEqual(1, self.netbox.dcim.device(1).id)
+        self.assertEqual([('GET', '/api/dcim/devices/1/')] * 2, self.server.paths)
+
+    def test_posts_are_not_retried(self):
+        with self.assertRaises(HTTPException):
+            self.netbox.tenancy.create_tenant_group('Infrastructure', 'infrastructure')
+
+        self.assertEqual(['POST'], [method for method, _ in self.server.paths])
+
+
+if __name__ == '__main__':
+    unittest.main()
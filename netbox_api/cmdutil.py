@@ -1,70 +1,102 @@
-import subprocess
-
-import io
+import os
 import re
+import selectors
+import subprocess
 import time
 
-_GREEDY_WS_RE = re.compile('[\s]+')
+_GREEDY_WS_RE = re.compile(r'[\s]+')
+
+# Seconds a command may run before it is killed, None waits forever
+COMMAND_TIMEOUT = 30
+
+# Most bytes of output kept per stream, anything past this is read and dropped
+MAX_COMMAND_OUTPUT = 1024 * 1024
+
+# Bytes read from a pipe at a time
+_READ_SIZE = 64 * 1024
 
 
 class CommandResult(object):
-    def __init__(self, return_code, stdout, stderr):
+    def __init__(self, return_code, stdout, stderr, truncated=False):
         self.return_code = return_code
         self.stdout = stdout
         self.stderr = stderr
 
+        # Whether either stream produced more than the output limit
+        self.truncated = truncated
+
+
+def _remaining(deadline):
+    return None if deadline is None else max(0.0, deadline - time.monotonic())
+
 
-def do_exec(cmd):
-    args = _GREEDY_WS_RE.split(cmd)
+def do_exec(cmd, timeout=COMMAND_TIMEOUT, max_output=MAX_COMMAND_OUTPUT):
+    """
+    Run a command and collect its output. Both pipes are read as soon as the
+    selector reports data on them, so a command that fills one of them while
+    the other is quiet can't deadlock and the result is returned as soon as the
+    command exits.
 
-    # Buffers to hold output
-    stdout_buffer = io.StringIO()
-    stderr_buffer = io.StringIO()
+    :param cmd: the command line, split on whitespace
+    :param timeout: seconds the command may run for, None to wait forever
+    :param max_output: most bytes of stdout and of stderr kept
+    :raises subprocess.TimeoutExpired: the command didn't exit in time and was killed
+    :return: CommandResult
+    """
+    args = _GREEDY_WS_RE.split(cmd.strip())
+    deadline = None if timeout is None else time.monotonic() + timeout
 
     # Start the process
     process = subprocess.Popen(
         args=args,
+        stdin=subprocess.DEVNULL,
         stdout=subprocess.PIPE,
         stderr=subprocess.PIPE)
 
-    # Poll the process for its status and output while it runs
-    poll_result = process.poll()
-    while poll_result is None:
-        # Read STDOUT and STDERR
-        stdout_buffer.write(
-            process.stdout.read().decode('utf-8'))
-        stderr_buffer.write(
-            process.stderr.read().decode('utf-8'))
+    buffers = {
+        process.stdout: bytearray(),
+        process.stderr: bytearray()
+    }
+    truncated = False
 
-        # Sleep for 10ms
-        time.sleep(0.01)
+    try:
+        with selectors.DefaultSelector() as selector:
+            for pipe in buffers:
+                selector.register(pipe, selectors.EVENT_READ)
 
-        # Poll the process again
-        poll_result = process.poll()
+            # Read until both pipes are closed by the process exiting
+            while len(selector.get_map()) > 0:
+                remaining = _remaining(deadline)
+                if remaining == 0:
+                    raise subprocess.TimeoutExpired(cmd, timeout)
 
-    try:
-        # Flush and read the rest of the stdout buffer
-        process.stdout.flush()
-        stdout_buffer.write(
-            process.stdout.read().decode('utf-8'))
-    except OSError:
-        # We ignore this exception and simply close the fd
-        pass
-    finally:
-        process.stdout.close()
+                for key, _ in selector.select(remaining):
+                    chunk = os.read(key.fd, _READ_SIZE)
+                    if len(chunk) == 0:
+                        selector.unregister(key.fileobj)
+                        continue
 
-    try:
-        # Flush and read the rest of the stderr buffer
-        process.stderr.flush()
-        stderr_buffer.write(
-            process.stderr.read().decode('utf-8'))
-    except OSError:
-        # We ignore this exception and simply close the fd
-        pass
+                    # Keep draining a stream past the limit so the process isn't blocked on it
+                    buffer = buffers[key.fileobj]
+                    room = max(0, max_output - len(buffer))
+                    if len(chunk) > room:
+                        truncated = True
+
+                    buffer += chunk[:room]
+
+        process.wait(_remaining(deadline))
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+        raise subprocess.TimeoutExpired(
+            cmd, timeout, output=bytes(buffers[process.stdout]), stderr=bytes(buffers[process.stderr]))
     finally:
+        process.stdout.close()
         process.stderr.close()
 
     return CommandResult(
         return_code=process.returncode,
-        stdout=stdout_buffer.getvalue().strip(),
-        stderr=stderr_buffer.getvalue().strip())
+        stdout=buffers[process.stdout].decode('utf-8', errors='replace').strip(),
+        stderr=buffers[process.stderr].decode('utf-8', errors='replace').strip(),
+        truncated=truncated)
@@ -0,0 +1,57 @@
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+
+from netbox_api.cmdutil import do_exec
+
+
+class WhenExecutingCommands(unittest.TestCase):
+    def setUp(self):
+        self.scripts = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.scripts.cleanup()
+
+    def _script(self, source):
+        path = os.path.join(self.scripts.name, 'script_{}.py'.format(len(os.listdir(self.scripts.name))))
+        with open(path, 'w') as script:
+            script.write(source)
+
+        return '{} {}'.format(sys.executable, path)
+
+    def test_output_and_return_code(self):
+        result = do_exec(self._script('import sys\nprint("out")\nprint("err", file=sys.stderr)\nsys.exit(3)\n'))
+
+        self.assertEqual(3, result.return_code)
+        self.assertEqual('out', result.stdout)
+        self.assertEqual('err', result.stderr)
+        self.assertFalse(result.truncated)
+
+    def test_filling_stderr_does_not_deadlock(self):
+        result = do_exec(self._script('import sys\nsys.stderr.write("e" * 1000000)\nprint("done")\n'), timeout=10)
+
+        self.assertEqual('done', result.stdout)
+        self.assertEqual(1000000, len(result.stderr))
+
+    def test_output_is_bounded(self):
+        result = do_exec(self._script('print("x" * 100000)\n'), max_output=1000)
+
+        self.assertEqual(0, result.return_code)
+        self.assertEqual(1000, len(result.stdout))
+        self.assertTrue(result.truncated)
+
+    def test_timeout_kills_the_command(self):
+        started_at = time.monotonic()
+
+        with self.assertRaises(subprocess.TimeoutExpired) as raised:
+            do_exec(self._script('import time\nprint("started", flush=True)\ntime.sleep(30)\n'), timeout=0.5)
+
+        self.assertLess(time.monotonic() - started_at, 5)
+        self.assertEqual(b'started\n', raised.exception.output)
+
+
+if __name__ == '__main__':
+    unittest.main()
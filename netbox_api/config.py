@@ -29,6 +29,12 @@ class PynetboxConfig(object):
     def get(self, section, option, default=None):
         return self._config.get(section, option, fallback=default)
 
+    def getboolean(self, section, option, default=None):
+        return self._config.getboolean(section, option, fallback=default)
+
+    def items(self, section):
+        return self._config.items(section)
+
 
 def config_path():
     # Make sure the config file exists
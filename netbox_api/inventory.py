@@ -0,0 +1,396 @@
+"""
+Local snapshot of a Netbox inventory. Devices, interfaces, IP addresses, racks,
+sites and tenants are loaded once, concurrently, and indexed in memory so that
+lookups by id, name, slug, MAC address or owning device are answered without
+a round trip to the API. Reports that look up thousands of objects by name can
+then run against the snapshot instead of sending a filtered request per object.
+
+A loaded snapshot is kept current with refresh, which only fetches the objects
+modified since the last one and works out which were deleted by comparing the
+ids held locally against the ids the server still has.
+"""
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from itertools import islice
+
+from netbox_api.api.client import FILTER_CHUNK_SIZE
+from netbox_api.model import Device, Interface, IPAddress, Rack, Site, Tenant
+
+# Number of results requested per page when loading a snapshot
+SNAPSHOT_PAGE_SIZE = 1000
+
+# Number of ids requested per page when looking for deleted objects, Netbox
+# caps pages at its MAX_PAGE_SIZE which defaults to 1000
+ID_PAGE_SIZE = 1000
+
+# Seconds the modification window of a refresh reaches back before the newest
+# change already seen, so that objects changed while the previous listing was
+# being read aren't missed
+REFRESH_OVERLAP = 60
+
+# Format of the timestamps Netbox reports, the fraction and timezone (always UTC) are ignored
+TIMESTAMP_FMT = '%Y-%m-%dT%H:%M:%S'
+
+DEVICES = 'devices'
+INTERFACES = 'interfaces'
+IP_ADDRESSES = 'ip_addresses'
+RACKS = 'racks'
+SITES = 'sites'
+TENANTS = 'tenants'
+
+
+def _nested_id(obj, field):
+    nested = getattr(obj, field)
+    return nested.id if nested is not None else None
+
+
+def mac_key(mac_address):
+    """
+    Normalize a MAC address so that differently formatted spellings of it
+    compare equal.
+    """
+    if mac_address is None:
+        return None
+
+    return mac_address.replace('-', ':').lower()
+
+
+def _since(watermark, overlap):
+    since = datetime.strptime(watermark[:19], TIMESTAMP_FMT) - timedelta(seconds=overlap)
+    return since.strftime(TIMESTAMP_FMT)
+
+
+def _missing(ids, other_ids):
+    """
+    Yield the ids of the sorted array ids that aren't in the sorted array other_ids.
+    """
+    other_idx = 0
+
+    for obj_id in ids:
+        while other_idx < len(other_ids) and other_ids[other_idx] < obj_id:
+            other_idx += 1
+
+        if other_idx >= len(other_ids) or other_ids[other_idx] != obj_id:
+            yield obj_id
+
+
+def _chunks(values, size):
+    itr = iter(values)
+
+    chunk = list(islice(itr, size))
+    while len(chunk) > 0:
+        yield chunk
+        chunk = list(islice(itr, size))
+
+
+def _client_part(client, kind, verb):
+    return getattr(getattr(client, _SOURCES[kind][1]), '{}_{}'.format(verb, kind))
+
+
+# Kind -> (model, client part). Objects of a kind are listed by the list_<kind>
+# method of the client part.
+_SOURCES = {
+    DEVICES: (Device, 'dcim'),
+    INTERFACES: (Interface, 'dcim'),
+    IP_ADDRESSES: (IPAddress, 'ipam'),
+    RACKS: (Rack, 'dcim'),
+    SITES: (Site, 'dcim'),
+    TENANTS: (Tenant, 'tenancy')
+}
+
+# Kind -> secondary indexes as (index name, key function, unique). Objects whose
+# key is None aren't indexed. Unique indexes map a key to one object while the
+# others map it to the objects sharing it, by id, so that a single object can be
+# dropped from a large group without going through all of it.
+_INDEXES = {
+    DEVICES: (
+        ('name', lambda d: d.name, False),
+        ('site', lambda d: _nested_id(d, 'site'), False),
+        ('rack', lambda d: _nested_id(d, 'rack'), False)),
+    INTERFACES: (
+        ('device', lambda i: _nested_id(i, 'device'), False),
+        ('mac_address', lambda i: mac_key(i.mac_address), False),
+        ('device_name', lambda i: (_nested_id(i, 'device'), i.name), True)),
+    IP_ADDRESSES: (
+        ('interface', lambda ip: _nested_id(ip, 'interface'), False),
+        ('address', lambda ip: ip.address, False)),
+    RACKS: (
+        ('name', lambda r: r.name, False),
+        ('site', lambda r: _nested_id(r, 'site'), False)),
+    SITES: (
+        ('name', lambda s: s.name, True),
+        ('slug', lambda s: s.slug, True)),
+    TENANTS: (
+        ('name', lambda t: t.name, True),
+        ('slug', lambda t: t.slug, True))
+}
+
+
+class SnapshotChanges(object):
+    """
+    The ids of the objects of one kind that a refresh updated or deleted.
+    """
+
+    def __init__(self, kind):
+        self.kind = kind
+        self.updated = list()
+        self.deleted = list()
+
+    def __len__(self):
+        return len(self.updated) + len(self.deleted)
+
+
+class InventorySnapshot(object):
+    """
+    Objects of every kind indexed by id and by the secondary keys in _INDEXES.
+    Lookups that can match several objects return lists, which are empty when
+    nothing matches, while lookups of a single object return None instead.
+
+    A snapshot isn't updated by writes made through a client until it is
+    refreshed, objects handed out belong to the snapshot and must be treated
+    as read-only.
+    """
+
+    def __init__(self):
+        # Kind -> id -> object
+        self._by_id = dict((kind, dict()) for kind in _SOURCES)
+
+        # Kind -> last_updated of the most recently modified object, None when
+        # the server doesn't report modification times for the kind
+        self._watermarks = dict((kind, None) for kind in _SOURCES)
+
+        # Kind -> index name -> key -> object, or id -> object
+        self._indexes = dict((kind, dict((name, dict()) for name, _, _ in specs)) for kind, specs in _INDEXES.items())
+
+    @classmethod
+    def load(cls, client, page_size=SNAPSHOT_PAGE_SIZE, workers=len(_SOURCES)):
+        """
+        Load a snapshot through the client. Every kind is listed concurrently,
+        with each listing fetching pages as configured by the client's
+        page_workers.
+
+        :param client: NetboxClient
+        :param page_size: number of results requested per page
+        :param workers: number of kinds listed at the same time
+        :return:
+        """
+        snapshot = cls()
+
+        def list_kind(kind):
+            return kind, _client_part(client, kind, 'list')(limit=page_size)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for kind, objects in executor.map(list_kind, _SOURCES):
+                snapshot.add_all(kind, objects)
+
+        return snapshot
+
+    def refresh(self, client, page_size=SNAPSHOT_PAGE_SIZE, overlap=REFRESH_OVERLAP, workers=len(_SOURCES)):
+        """
+        Bring the snapshot up to date, patching its indexes in place. Objects
+        modified since the newest change already seen are fetched again and
+        objects the server no longer has are dropped.
+
+        Servers that don't filter on last_updated send every object, which
+        costs as much as a full load but leaves the snapshot just as current.
+
+        :param client: NetboxClient
+        :param page_size: number of results requested per page
+        :param overlap: seconds the modification window reaches back before the newest change seen
+        :param workers: number of kinds refreshed at the same time
+        :return: dict of kind to SnapshotChanges
+        """
+        def fetch_kind(kind):
+            return kind, self._fetch_changes(client, kind, page_size, overlap)
+
+        changes = dict()
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for kind, (modified, deleted_ids) in executor.map(fetch_kind, _SOURCES):
+                changes[kind] = self._apply_changes(kind, modified, deleted_ids)
+
+        return changes
+
+    def _fetch_changes(self, client, kind, page_size, overlap):
+        query = dict(limit=page_size)
+
+        watermark = self._watermarks[kind]
+        if watermark is not None:
+            query['last_updated__gte'] = _since(watermark, overlap)
+
+        # Every id the server still holds, deletions are worked out from these.
+        # Netbox 2.x ignores fields so ask for the brief representation, which
+        # leaves out the nested objects and custom fields.
+        remote_ids = array('q', sorted(r.id for r in _client_part(client, kind, 'list')(
+            limit=ID_PAGE_SIZE, brief=1, fields=['id'])))
+
+        modified = _client_part(client, kind, 'list')(**query)
+
+        # Objects the snapshot doesn't hold that weren't modified within the
+        # window, such as ones created while the previous load was under way
+        by_id = self._by_id[kind]
+        modified_ids = set(obj.id for obj in modified)
+
+        unseen_ids = [obj_id for obj_id in remote_ids if obj_id not in by_id and obj_id not in modified_ids]
+        for chunk in _chunks(unseen_ids, FILTER_CHUNK_SIZE):
+            modified.extend(_client_part(client, kind, 'list')(
+                limit=page_size, id__in=','.join(str(obj_id) for obj_id in chunk)))
+
+        local_ids = array('q', sorted(by_id))
+        return modified, list(_missing(local_ids, remote_ids))
+
+    def _apply_changes(self, kind, modified, deleted_ids):
+        changes = SnapshotChanges(kind)
+
+        for obj in modified:
+            self.add(kind, obj)
+            changes.updated.append(obj.id)
+
+        for obj_id in deleted_ids:
+            if self.remove(kind, obj_id) is not None:
+                changes.deleted.append(obj_id)
+
+        return changes
+
+    def __len__(self):
+        return sum(len(objects) for objects in self._by_id.values())
+
+    def count(self, kind):
+        return len(self._by_id[kind])
+
+    def all(self, kind):
+        return list(self._by_id[kind].values())
+
+    def get(self, kind, obj_id):
+        return self._by_id[kind].get(obj_id)
+
+    def watermark(self, kind):
+        return self._watermarks[kind]
+
+    def add_all(self, kind, objects):
+        for obj in objects:
+            self.add(kind, obj)
+
+    def add(self, kind, obj):
+        """
+        Add an object to the snapshot, replacing and unindexing any object of
+        the same kind with the same id.
+        """
+        self.remove(kind, obj.id)
+        self._by_id[kind][obj.id] = obj
+
+        last_updated = getattr(obj, 'last_updated', None)
+        if last_updated is not None and (self._watermarks[kind] is None or last_updated > self._watermarks[kind]):
+            self._watermarks[kind] = last_updated
+
+        for name, key_func, unique in _INDEXES[kind]:
+            key = key_func(obj)
+            if key is None:
+                continue
+
+            index = self._indexes[kind][name]
+            if unique:
+                index[key] = obj
+            else:
+                index.setdefault(key, dict())[obj.id] = obj
+
+    def remove(self, kind, obj_id):
+        """
+        Remove an object from the snapshot and its indexes, returning the
+        removed object or None if the snapshot didn't hold it.
+        """
+        obj = self._by_id[kind].pop(obj_id, None)
+        if obj is None:
+            return None
+
+        for name, key_func, unique in _INDEXES[kind]:
+            key = key_func(obj)
+            if key is None:
+                continue
+
+            index = self._indexes[kind][name]
+            if unique:
+                if index.get(key) is obj:
+                    del index[key]
+            else:
+                group = index[key]
+                del group[obj.id]
+
+                if len(group) == 0:
+                    del index[key]
+
+        return obj
+
+    def _lookup(self, kind, index, key):
+        return self._indexes[kind][index].get(key)
+
+    def _lookup_all(self, kind, index, key):
+        group = self._indexes[kind][index].get(key)
+        return list(group.values()) if group is not None else []
+
+    # Devices
+    def device(self, device_id):
+        return self.get(DEVICES, device_id)
+
+    def devices_named(self, name):
+        return self._lookup_all(DEVICES, 'name', name)
+
+    def devices_in_site(self, site_id):
+        return self._lookup_all(DEVICES, 'site', site_id)
+
+    def devices_in_rack(self, rack_id):
+        return self._lookup_all(DEVICES, 'rack', rack_id)
+
+    # Interfaces
+    def interface(self, interface_id):
+        return self.get(INTERFACES, interface_id)
+
+    def interfaces_of(self, device_id):
+        return self._lookup_all(INTERFACES, 'device', device_id)
+
+    def interface_named(self, device_id, name):
+        return self._lookup(INTERFACES, 'device_name', (device_id, name))
+
+    def interfaces_with_mac(self, mac_address):
+        return self._lookup_all(INTERFACES, 'mac_address', mac_key(mac_address))
+
+    # IP addresses
+    def ip_address(self, ip_address_id):
+        return self.get(IP_ADDRESSES, ip_address_id)
+
+    def ip_addresses_of(self, interface_id):
+        return self._lookup_all(IP_ADDRESSES, 'interface', interface_id)
+
+    def ip_addresses_matching(self, address):
+        return self._lookup_all(IP_ADDRESSES, 'address', address)
+
+    # Racks
+    def rack(self, rack_id):
+        return self.get(RACKS, rack_id)
+
+    def racks_named(self, name):
+        return self._lookup_all(RACKS, 'name', name)
+
+    def racks_in_site(self, site_id):
+        return self._lookup_all(RACKS, 'site', site_id)
+
+    # Sites
+    def site(self, site_id):
+        return self.get(SITES, site_id)
+
+    def site_named(self, name):
+        return self._lookup(SITES, 'name', name)
+
+    def site_by_slug(self, slug):
+        return self._lookup(SITES, 'slug', slug)
+
+    # Tenants
+    def tenant(self, tenant_id):
+        return self.get(TENANTS, tenant_id)
+
+    def tenant_named(self, name):
+        return self._lookup(TENANTS, 'name', name)
+
+    def tenant_by_slug(self, slug):
+        return self._lookup(TENANTS, 'slug', slug)
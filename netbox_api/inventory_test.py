@@ -0,0 +1,173 @@
+import unittest
+from array import array
+
+from netbox_api.inventory import DEVICES, ID_PAGE_SIZE, INTERFACES, SITES, InventorySnapshot, _missing, _since, \
+    _SOURCES
+from netbox_api.model import Device, Interface, Site
+
+
+def _interface(interface_id, device_id, name, mac_address):
+    return Interface.from_dict({
+        'id': interface_id,
+        'name': name,
+        'mac_address': mac_address,
+        'device': {'id': device_id, 'name': 'host-{}'.format(device_id)}
+    })
+
+
+class _FakeClient(object):
+    """
+    Answers the list_<kind> calls a snapshot makes from objects held as dicts,
+    filtering on last_updated__gte and id__in the way Netbox does.
+    """
+
+    def __init__(self):
+        self.objects = dict((kind, dict()) for kind in _SOURCES)
+        self.queries = list()
+        self.dcim = self.ipam = self.tenancy = self
+
+    def __getattr__(self, name):
+        if not name.startswith('list_'):
+            raise AttributeError(name)
+
+        return lambda fields=None, **query: self._list(name[len('list_'):], query)
+
+    def _list(self, kind, query):
+        self.queries.append((kind, query))
+        objects = [self.objects[kind][obj_id] for obj_id in sorted(self.objects[kind])]
+
+        if 'last_updated__gte' in query:
+            objects = [o for o in objects if o['last_updated'][:19] >= query['last_updated__gte']]
+
+        if 'id__in' in query:
+            ids = set(int(obj_id) for obj_id in query['id__in'].split(','))
+            objects = [o for o in objects if o['id'] in ids]
+
+        if 'brief' in query:
+            objects = [{'id': o['id']} for o in objects]
+
+        return [_SOURCES[kind][0].from_dict(o) for o in objects]
+
+    def add_device(self, device_id, name, last_updated):
+        self.objects[DEVICES][device_id] = {'id': device_id, 'name': name, 'last_updated': last_updated}
+
+
+class WhenIndexingASnapshot(unittest.TestCase):
+    def setUp(self):
+        self.snapshot = InventorySnapshot()
+        self.snapshot.add_all(SITES, [Site.from_dict({'id': 1, 'name': 'DC1', 'slug': 'dc1'})])
+        self.snapshot.add_all(DEVICES, [
+            Device.from_dict({'id': i, 'name': 'host-{}'.format(i), 'site': {'id': 1}}) for i in range(1, 4)])
+        self.snapshot.add_all(INTERFACES, [
+            _interface(1, 1, 'eth0', 'AA:BB:CC:00:00:01'),
+            _interface(2, 1, 'eth1', 'AA:BB:CC:00:00:02'),
+            _interface(3, 2, 'eth0', 'AA:BB:CC:00:00:03')])
+
+    def test_lookups(self):
+        self.assertEqual(1, self.snapshot.devices_named('host-1')[0].id)
+        self.assertEqual('dc1', self.snapshot.site_named('DC1').slug)
+        self.assertEqual(3, len(self.snapshot.devices_in_site(1)))
+        self.assertEqual(['eth0', 'eth1'], [i.name for i in self.snapshot.interfaces_of(1)])
+        self.assertEqual(3, self.snapshot.interface_named(2, 'eth0').id)
+        self.assertEqual(2, self.snapshot.interfaces_with_mac('aa-bb-cc-00-00-02')[0].id)
+
+    def test_missing_objects(self):
+        self.assertIsNone(self.snapshot.device(42))
+        self.assertIsNone(self.snapshot.tenant_by_slug('nope'))
+        self.assertEqual([], self.snapshot.devices_named('nope'))
+        self.assertEqual([], self.snapshot.interfaces_of(3))
+
+    def test_replacing_and_removing(self):
+        self.snapshot.add(INTERFACES, _interface(2, 2, 'eth1', 'AA:BB:CC:00:00:02'))
+
+        self.assertEqual(['eth0'], [i.name for i in self.snapshot.interfaces_of(1)])
+        self.assertEqual(['eth0', 'eth1'], [i.name for i in self.snapshot.interfaces_of(2)])
+        self.assertIsNone(self.snapshot.interface_named(1, 'eth1'))
+
+        self.assertEqual('host-3', self.snapshot.remove(DEVICES, 3).name)
+        self.assertEqual([], self.snapshot.devices_named('host-3'))
+        self.assertEqual(2, len(self.snapshot.devices_in_site(1)))
+        self.assertIsNone(self.snapshot.remove(DEVICES, 3))
+
+
+class WhenRefreshingASnapshot(unittest.TestCase):
+    def test_deleted_ids(self):
+        local_ids = array('q', [1, 2, 5, 7, 9, 12])
+        remote_ids = array('q', [2, 3, 7, 12, 15])
+
+        self.assertEqual([1, 5, 9], list(_missing(local_ids, remote_ids)))
+        self.assertEqual([], list(_missing(array('q'), remote_ids)))
+        self.assertEqual([1, 2], list(_missing(array('q', [1, 2]), array('q'))))
+
+    def test_watermark_follows_the_newest_change(self):
+        snapshot = InventorySnapshot()
+        self.assertIsNone(snapshot.watermark(DEVICES))
+
+        for device_id, last_updated in ((1, '2018-06-04T17:30:12.345678Z'), (2, '2018-06-05T09:00:00.000000Z'),
+                                        (3, '2018-06-01T00:00:00.000000Z')):
+            snapshot.add(DEVICES, Device.from_dict({'id': device_id, 'last_updated': last_updated}))
+
+        self.assertEqual('2018-06-05T09:00:00.000000Z', snapshot.watermark(DEVICES))
+        self.assertEqual('2018-06-05T08:59:00', _since(snapshot.watermark(DEVICES), 60))
+
+
+class WhenRefreshingAgainstAServer(unittest.TestCase):
+    def setUp(self):
+        self.client = _FakeClient()
+        for device_id in range(1, 4):
+            last_updated = '2018-06-0{}T12:00:00.000000Z'.format(device_id)
+            self.client.add_device(device_id, 'host-{}'.format(device_id), last_updated)
+
+        self.snapshot = InventorySnapshot.load(self.client)
+        del self.client.queries[:]
+
+    def _device_queries(self):
+        return [query for kind, query in self.client.queries if kind == DEVICES]
+
+    def test_nothing_changed(self):
+        changes = self.snapshot.refresh(self.client)
+
+        # Only the newest device falls within the overlap of the modification window
+        self.assertEqual([3], changes[DEVICES].updated)
+        self.assertEqual(1, sum(len(c) for c in changes.values()))
+        self.assertEqual(3, self.snapshot.count(DEVICES))
+
+    def test_additions_removals_and_updates(self):
+        del self.client.objects[DEVICES][2]
+        self.client.add_device(1, 'host-1-renamed', '2018-06-04T08:00:00.000000Z')
+        self.client.add_device(4, 'host-4', '2018-06-04T09:00:00.000000Z')
+
+        changes = self.snapshot.refresh(self.client)[DEVICES]
+
+        self.assertEqual([1, 3, 4], sorted(changes.updated))
+        self.assertEqual([2], changes.deleted)
+        self.assertEqual([], self.snapshot.devices_named('host-1'))
+        self.assertEqual(1, self.snapshot.devices_named('host-1-renamed')[0].id)
+        self.assertEqual('2018-06-04T09:00:00.000000Z', self.snapshot.watermark(DEVICES))
+
+    def test_only_objects_modified_since_the_watermark_are_fetched(self):
+        self.snapshot.refresh(self.client, overlap=60)
+
+        modified_queries = [q for q in self._device_queries() if 'brief' not in q]
+        self.assertEqual([{'limit': 1000, 'last_updated__gte': '2018-06-03T11:59:00'}], modified_queries)
+
+    def test_ids_are_listed_briefly_within_the_page_size_limit(self):
+        self.snapshot.refresh(self.client)
+
+        id_queries = [q for q in self._device_queries() if 'brief' in q]
+        self.assertEqual([{'limit': ID_PAGE_SIZE, 'brief': 1}], id_queries)
+        self.assertLessEqual(ID_PAGE_SIZE, 1000)
+
+    def test_objects_created_before_the_watermark_are_picked_up(self):
+        # Created while the previous load was being read so it sorts before the newest change
+        self.client.add_device(5, 'host-5', '2018-05-01T00:00:00.000000Z')
+
+        changes = self.snapshot.refresh(self.client)[DEVICES]
+
+        self.assertEqual([3, 5], changes.updated)
+        self.assertEqual('host-5', self.snapshot.device(5).name)
+        self.assertIn({'limit': 1000, 'id__in': '5'}, self._device_queries())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,8 +3,10 @@ import sys
 from tabulate import tabulate
 
 from netbox_api.api import new_api_client
-from netbox_api.sync import synchronize_host
-from netbox_api.util import parse_args
+from netbox_api.model import TAGS_FIELD, format_tags
+from netbox_api.reconcile import write_plan
+from netbox_api.sync import apply_plan_files, plan_host, synchronize_host, write_plan_file
+from netbox_api.util import halt, parse_args
 
 
 def _lookup_device(client, device_name):
@@ -20,7 +22,7 @@ def update_device_tags(client, device_name, tags):
 
     # Tags are stored as a custom field
     client.dcim.update_device(device.id, custom_fields={
-        'Tags': ','.join([t.strip() for t in tags])
+        TAGS_FIELD: format_tags(tags)
     })
 
     # Show the device last to reflect the update
@@ -38,42 +40,39 @@ def show_device(client, device_name):
         print('  {}: {}'.format(k, v))
 
 
-def _device_tags_match(device, tags):
-    for other_tag in tags:
-        if other_tag not in device.custom_fields['Tags']:
-            return False
-
-    return True
-
-
 def list_devices(client, tags, verbose, show_iface):
     if verbose:
         list_devices_table(client, tags, show_iface)
     else:
-        for device in client.dcim.list_devices(cf_Tags=tags[0]):
-            if _device_tags_match(device, tags) is False:
-                continue
-
+        for device in client.dcim.iter_devices_tagged(tags, fields=['id', 'name', 'custom_fields']):
             print(device.name)
 
 
 def list_devices_table(client, tags, show_iface):
-    table = list()
+    devices = client.dcim.list_devices_tagged(
+        tags, fields=['id', 'name', 'rack', 'position', 'device_type', 'custom_fields'])
 
-    for device in client.dcim.list_devices(cf_Tags=tags[0]):
-        if _device_tags_match(device, tags) is False:
-            continue
+    # Fetch the interfaces of every matching device in a handful of batched requests
+    device_interfaces = dict()
+    interfaces = client.dcim.list_interfaces_for_devices(
+        [d.id for d in devices], fields=['name', 'mac_address', 'device'])
 
+    for interface in interfaces:
+        device_interfaces.setdefault(interface.device.id, list()).append(interface)
+
+    table = list()
+
+    for device in devices:
         mac_addr = ''
-        device_interfaces = client.dcim.list_interfaces(device=device.name)
+        interfaces = device_interfaces.get(device.id, list())
 
         if show_iface is not None:
-            for interface in device_interfaces:
+            for interface in interfaces:
                 if interface.name == show_iface:
                     mac_addr = interface.mac_address
 
-        elif len(device_interfaces) > 0:
-            mac_addr = device_interfaces[0].mac_address
+        elif len(interfaces) > 0:
+            mac_addr = interfaces[0].mac_address
 
         table.append([
             device.rack.display_name,
@@ -81,11 +80,34 @@ def list_devices_table(client, tags, show_iface):
             device.name,
             device.device_type.model,
             mac_addr,
-            device.custom_fields['Tags']])
+            device.custom_fields.get(TAGS_FIELD)])
 
     print(tabulate(table, headers=['Rack', 'Rack Position', 'Name', 'Device Model', 'MAC Addr', 'Tags']))
 
 
+def sync_plan(client, output):
+    plan = plan_host(client)
+
+    if output == '-':
+        write_plan(plan, sys.stdout)
+        return
+
+    try:
+        write_plan_file(plan, output)
+    except ValueError as ex:
+        halt(str(ex), retcode=1)
+
+
+def sync_apply(client, plans, workers):
+    failures = apply_plan_files(client, plans, workers)
+
+    for path, ex in sorted(failures.items()):
+        print('Failed to apply {}: {}'.format(path, getattr(ex, 'msg', ex)))
+
+    if len(failures) > 0:
+        halt(retcode=1)
+
+
 def main():
     # Make sure we let the user know that this is Python 3 only
     if sys.version_info < (3, 5):
@@ -96,7 +118,14 @@ def main():
     client = new_api_client()
 
     if args.root_cmd == 'sync':
-        synchronize_host(client)
+        if args.sync_cmd == 'plan':
+            sync_plan(client, args.output)
+
+        elif args.sync_cmd == 'apply':
+            sync_apply(client, args.plans, args.workers)
+
+        else:
+            synchronize_host(client)
 
     elif args.root_cmd == 'devices':
         if args.devices_cmd == 'list':
@@ -1,4 +1,5 @@
-from .common import CustomFields
+from .common import CustomFields, IdentityMap, TAGS_FIELD, parse_tags, format_tags
+from .common import lazy_models, decode_scope, projection
 from .site import Site
 from .device import Device, RackFaceConstant, DeviceStatusConstant
 from .device_type import DeviceType, InterfaceOrderConstant, SubdeviceTypeConstant
@@ -1,6 +1,235 @@
+import threading
+from collections import OrderedDict, namedtuple
+from contextlib import contextmanager
+from contextvars import ContextVar
+from types import MemberDescriptorType
+
+# Name of the custom field that holds a comma separated list of tags
+TAGS_FIELD = 'Tags'
+
+
+def parse_tags(value):
+    """
+    Parse a comma separated tags value into a set of tag names.
+    """
+    if value is None:
+        return frozenset()
+
+    return frozenset(t.strip() for t in value.split(',') if len(t.strip()) > 0)
+
+
+def format_tags(tags):
+    return ','.join(t.strip() for t in tags)
+
+
+# Identity map that nested objects are interned into while one is in scope
+_current_identity_map = ContextVar('netbox_api_identity_map', default=None)
+
+# Whether models being built keep their nested objects as raw dicts until read
+_lazy_models = ContextVar('netbox_api_lazy_models', default=False)
+
+
+def _read_only(obj, *args):
+    raise AttributeError('{} is shared through an identity map and is read-only'.format(type(obj).__name__))
+
+
+# Model class -> read-only subclass that interned instances are switched to
+_read_only_classes = dict()
+
+
+def _read_only_class(cls):
+    read_only = _read_only_classes.get(cls)
+    if read_only is None:
+        read_only = _read_only_classes.setdefault(cls, type(cls.__name__, (cls,), {
+            '__slots__': (),
+            '__module__': cls.__module__,
+            '__setattr__': _read_only,
+            '__delattr__': _read_only
+        }))
+
+    return read_only
+
+
+class IdentityMap(object):
+    """
+    Interns nested objects by (type, id) so that the thousands of devices that
+    point at the same manufacturer, site or tenant share one instance of it.
+
+    An object is only shared with later payloads that carry the same contents,
+    a payload with different contents replaces it so that a map kept for the
+    lifetime of a client picks up renames and other changes. Objects already
+    handed out keep the contents they were built with. Interned instances are
+    read-only, assigning to them raises an AttributeError.
+    """
+
+    def __init__(self, max_entries=10000):
+        """
+        :param max_entries: number of objects kept before the least recently used is evicted
+        """
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+
+        # (type, id) -> (contents, object) in least to most recently used order
+        self._objects = OrderedDict()
+
+    def __len__(self):
+        return len(self._objects)
+
+    def intern(self, cls, contents):
+        key = (cls, contents.get('id') if contents is not None else None)
+
+        with self._lock:
+            entry = self._objects.get(key)
+            if entry is not None and entry[0] == contents:
+                self._objects.move_to_end(key)
+                return entry[1]
+
+        obj = cls() if contents is None else cls(**contents)
+        obj.__class__ = _read_only_class(cls)
+
+        with self._lock:
+            self._objects[key] = (contents, obj)
+            self._objects.move_to_end(key)
+
+            # Evict least recently used objects
+            while len(self._objects) > self._max_entries:
+                self._objects.popitem(last=False)
+
+        return obj
+
+    def clear(self):
+        with self._lock:
+            self._objects.clear()
+
+    @contextmanager
+    def scope(self):
+        """
+        Intern every nested object built through from_dict within this block.
+        """
+        token = _current_identity_map.set(self)
+        try:
+            yield self
+        finally:
+            _current_identity_map.reset(token)
+
+
+@contextmanager
+def lazy_models(enabled=True):
+    """
+    Build models within this block lazily: nested objects are kept as the raw
+    dicts they were decoded from and only turned into models the first time
+    they are read. Listings that only look at a few top-level fields skip the
+    cost of building every nested object.
+    """
+    token = _lazy_models.set(enabled)
+    try:
+        yield
+    finally:
+        _lazy_models.reset(token)
+
+
+@contextmanager
+def decode_scope(identity_map=None, lazy=False):
+    """
+    Build models within this block with the given identity map and laziness.
+    """
+    map_token = _current_identity_map.set(identity_map) if identity_map is not None else None
+    lazy_token = _lazy_models.set(lazy)
+    try:
+        yield
+    finally:
+        _lazy_models.reset(lazy_token)
+
+        if map_token is not None:
+            _current_identity_map.reset(map_token)
+
+
+class _Unbuilt(object):
+    """
+    The raw contents of a nested object that is built on first read, along
+    with the identity map that was in scope when the contents were assigned.
+    """
+    __slots__ = ('contents', 'identity_map')
+
+    def __init__(self, contents, identity_map):
+        self.contents = contents
+        self.identity_map = identity_map
+
+    def build(self, cls):
+        if self.identity_map is None:
+            return cls.from_dict(self.contents)
+
+        with self.identity_map.scope():
+            return cls.from_dict(self.contents)
+
+
+class Nested(object):
+    """
+    Descriptor for an attribute that holds a nested object. Assigned dicts, or
+    None, are built into instances of cls either straight away or, when models
+    are being built lazily, the first time the attribute is read. The value is
+    kept in the slot of the same name with a leading underscore.
+
+    Nested objects built on first read are interned into the identity map that
+    was in scope when they were assigned, so reading them after the response
+    was decoded still shares instances with the rest of the listing.
+    """
+
+    def __init__(self, cls):
+        self.cls = cls
+        self.slot = None
+
+    def __set_name__(self, owner, name):
+        self.slot = owner.__dict__['_' + name]
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+
+        value = self.slot.__get__(obj, owner)
+        if type(value) is _Unbuilt:
+            value = value.build(self.cls)
+            self.slot.__set__(obj, value)
+
+        return value
+
+    def __set__(self, obj, value):
+        if value is None or type(value) is dict:
+            if _lazy_models.get():
+                value = _Unbuilt(value, _current_identity_map.get())
+            else:
+                value = self.cls.from_dict(value)
+
+        self.slot.__set__(obj, value)
+
+
+class Model(object):
+    """
+    Base class of the Netbox entity models. Models declare their attributes in
+    __slots__ so that instances don't carry a per-object __dict__, which adds up
+    when a full inventory is held in memory.
+    """
+    __slots__ = ()
+
+    @classmethod
+    def from_dict(cls, contents):
+        # Share one instance per (type, id) while an identity map is in scope
+        identity_map = _current_identity_map.get()
+        if identity_map is not None and (contents is None or contents.get('id') is not None):
+            return identity_map.intern(cls, contents)
+
+        if contents is None:
+            return cls()
+
+        return cls(**contents)
+
+
 class CustomFields(object):
+    __slots__ = ('fields', '_tags')
+
     def __init__(self, fields=None):
         self.fields = fields
+        self._tags = None
 
     def items(self):
         return self.fields.items()
@@ -11,9 +240,77 @@ class CustomFields(object):
     def __getitem__(self, item):
         return self.fields[item]
 
+    @property
+    def tags(self):
+        """
+        The parsed set of tags held in the Tags custom field. The set is built
+        once so membership checks are constant time.
+        """
+        if self._tags is None:
+            self._tags = parse_tags(self.fields.get(TAGS_FIELD) if self.fields is not None else None)
+
+        return self._tags
+
+    def has_tags(self, tags):
+        return self.tags.issuperset(tags)
+
     @classmethod
     def from_dict(cls, contents):
         if contents is None:
             return cls()
 
         return cls(contents)
+
+
+# (model class, fields) -> record builder
+_projections = dict()
+
+
+def projection(cls, fields):
+    """
+    Return a callable that builds lightweight records in place of cls. Records
+    are named tuples holding only the given fields, fields missing from the
+    contents are None. Requested fields that hold nested objects are still
+    built into their models while every other field is never looked at.
+
+    A ValueError is raised for fields that cls doesn't have or that are
+    requested more than once.
+
+    :param cls: model class being projected
+    :param fields: names of the fields to keep
+    :return:
+    """
+    fields = tuple(fields)
+    key = (cls, fields)
+
+    builder = _projections.get(key)
+    if builder is None:
+        builder = _projections.setdefault(key, _record_builder(cls, fields))
+
+    return builder
+
+
+def _record_builder(cls, fields):
+    # Field -> nested class for the requested fields that hold nested objects
+    nested = dict()
+    for field in fields:
+        attribute = getattr(cls, field, None) if not field.startswith('_') else None
+        if not isinstance(attribute, (Nested, MemberDescriptorType)):
+            raise ValueError('{} has no field {!r}'.format(cls.__name__, field))
+
+        if isinstance(attribute, Nested):
+            nested[field] = attribute.cls
+
+    if len(set(fields)) != len(fields):
+        raise ValueError('Fields {} are requested more than once'.format(
+            ', '.join(sorted(set(f for f in fields if fields.count(f) > 1)))))
+
+    record_cls = namedtuple(cls.__name__ + 'Record', fields, defaults=(None,) * len(fields))
+
+    def build(**contents):
+        return record_cls._make(
+            nested[f].from_dict(contents.get(f)) if f in nested else contents.get(f) for f in fields)
+
+    build.record_cls = record_cls
+    return build
+
@@ -0,0 +1,114 @@
+import unittest
+
+from netbox_api.model import Device, IdentityMap, Site, decode_scope, projection
+from netbox_api.model.device import DeviceSite
+
+
+def _device(device_id, site_id=1, site_name='DC1'):
+    return {'id': device_id, 'name': 'host-{}'.format(device_id), 'site': {'id': site_id, 'name': site_name}}
+
+
+class WhenInterningNestedObjects(unittest.TestCase):
+    def setUp(self):
+        self.identity_map = IdentityMap()
+
+    def _decode(self, *devices):
+        with decode_scope(self.identity_map):
+            return [Device.from_dict(d) for d in devices]
+
+    def test_objects_with_the_same_contents_are_shared(self):
+        first, second = self._decode(_device(1), _device(2))
+
+        self.assertIs(first.site, second.site)
+        self.assertIs(first.site, self._decode(_device(3))[0].site)
+
+    def test_changed_contents_replace_the_shared_object(self):
+        before = self._decode(_device(1))[0]
+        after, other = self._decode(_device(1, site_name='DC2'), _device(2, site_name='DC2'))
+
+        self.assertEqual('DC1', before.site.name)
+        self.assertEqual('DC2', after.site.name)
+        self.assertIs(after.site, other.site)
+
+    def test_interned_objects_are_read_only(self):
+        device = self._decode(_device(1))[0]
+
+        with self.assertRaises(AttributeError):
+            device.site.name = 'DC2'
+
+        self.assertIsInstance(device.site, DeviceSite)
+        self.assertEqual('DC1', device.site.name)
+
+    def test_least_recently_used_objects_are_evicted(self):
+        identity_map = IdentityMap(max_entries=2)
+
+        first = identity_map.intern(Site, {'id': 1, 'name': 'DC1'})
+        second = identity_map.intern(Site, {'id': 2, 'name': 'DC2'})
+        self.assertIs(first, identity_map.intern(Site, {'id': 1, 'name': 'DC1'}))
+
+        # The second site is now the least recently used
+        identity_map.intern(Site, {'id': 3, 'name': 'DC3'})
+
+        self.assertEqual(2, len(identity_map))
+        self.assertIs(first, identity_map.intern(Site, {'id': 1, 'name': 'DC1'}))
+        self.assertIsNot(second, identity_map.intern(Site, {'id': 2, 'name': 'DC2'}))
+
+
+class WhenBuildingNestedObjectsLazily(unittest.TestCase):
+    def setUp(self):
+        self.identity_map = IdentityMap()
+
+        with decode_scope(self.identity_map, lazy=True):
+            self.devices = [Device.from_dict(_device(i)) for i in range(1, 4)]
+
+    def test_nested_objects_are_built_on_first_read(self):
+        # Only the devices themselves were interned while decoding
+        self.assertEqual(3, len(self.identity_map))
+
+        self.assertEqual('DC1', self.devices[0].site.name)
+        self.assertEqual(4, len(self.identity_map))
+
+    def test_nested_objects_read_after_decoding_share_the_identity_map(self):
+        sites = [d.site for d in self.devices]
+
+        self.assertIs(sites[0], sites[1])
+        self.assertIs(sites[0], sites[2])
+
+    def test_nested_objects_without_an_identity_map_are_built_per_object(self):
+        with decode_scope(lazy=True):
+            first, second = Device.from_dict(_device(1)), Device.from_dict(_device(2))
+
+        self.assertIsNot(first.site, second.site)
+        self.assertEqual(first.site.id, second.site.id)
+
+    def test_missing_nested_objects_are_built_empty(self):
+        with decode_scope(self.identity_map, lazy=True):
+            device = Device.from_dict({'id': 9, 'name': 'host-9'})
+
+        self.assertIsNone(device.rack.id)
+
+
+class WhenProjectingModels(unittest.TestCase):
+    def test_records_hold_only_the_requested_fields(self):
+        build = projection(Device, ['name', 'site'])
+        record = build(**_device(1))
+
+        self.assertEqual(('name', 'site'), record._fields)
+        self.assertEqual('host-1', record.name)
+        self.assertEqual('DC1', record.site.name)
+
+    def test_missing_fields_are_none(self):
+        self.assertIsNone(projection(Device, ['serial'])(id=1).serial)
+
+    def test_unknown_fields_are_refused(self):
+        for fields in (['nonexistent'], ['name', 'class'], ['_site']):
+            with self.assertRaisesRegex(ValueError, "Device has no field '{}'".format(fields[-1])):
+                projection(Device, fields)
+
+    def test_fields_requested_twice_are_refused(self):
+        with self.assertRaisesRegex(ValueError, 'name are requested more than once'):
+            projection(Device, ['name', 'id', 'name'])
+
+
+if __name__ == '__main__':
+    unittest.main()
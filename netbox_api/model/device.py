@@ -1,6 +1,6 @@
 from enum import Enum
 
-from netbox_api.model.common import CustomFields
+from netbox_api.model.common import CustomFields, Model, Nested
 
 
 class DeviceStatusConstant(Enum):
@@ -17,184 +17,148 @@ class RackFaceConstant(Enum):
     REAR = 1
 
 
-class Manufacturer(object):
+class Manufacturer(Model):
+    __slots__ = ('id', 'url', 'name', 'slug')
+
     def __init__(self, id=None, url=None, name=None, slug=None):
         self.id = id
         self.url = url
         self.name = name
         self.slug = slug
 
-    @classmethod
-    def from_dict(cls, contents):
-        if contents is None:
-            return cls()
 
-        return cls(**contents)
+class DeviceType(Model):
+    __slots__ = ('_manufacturer', 'id', 'url', 'model', 'slug')
 
+    manufacturer = Nested(Manufacturer)
 
-class DeviceType(object):
     def __init__(self, manufacturer=None, id=None, url=None, model=None, slug=None):
-        self.manufacturer = Manufacturer.from_dict(manufacturer)
+        self.manufacturer = manufacturer
         self.id = id
         self.url = url
         self.model = model
         self.slug = slug
 
-    @classmethod
-    def from_dict(cls, contents):
-        if contents is None:
-            return cls()
-
-        return cls(**contents)
 
+class DeviceRole(Model):
+    __slots__ = ('id', 'url', 'name', 'slug')
 
-class DeviceRole(object):
     def __init__(self, id=None, url=None, name=None, slug=None):
         self.id = id
         self.url = url
         self.name = name
         self.slug = slug
 
-    @classmethod
-    def from_dict(cls, contents):
-        if contents is None:
-            return cls()
 
-        return cls(**contents)
+class Tenant(Model):
+    __slots__ = ('id', 'url', 'name', 'slug')
 
-
-class Tenant(object):
     def __init__(self, id=None, url=None, name=None, slug=None):
         self.id = id
         self.url = url
         self.name = name
         self.slug = slug
 
-    @classmethod
-    def from_dict(cls, contents):
-        if contents is None:
-            return cls()
-
-        return cls(**contents)
 
+class Platform(Model):
+    __slots__ = ('id', 'url', 'name', 'slug')
 
-class Platform(object):
     def __init__(self, id=None, url=None, name=None, slug=None):
         self.id = id
         self.url = url
         self.name = name
         self.slug = slug
 
-    @classmethod
-    def from_dict(cls, contents):
-        if contents is None:
-            return cls()
 
-        return cls(**contents)
+class DeviceSite(Model):
+    __slots__ = ('id', 'url', 'name', 'slug')
 
-
-class DeviceSite(object):
     def __init__(self, id=None, url=None, name=None, slug=None):
         self.id = id
         self.url = url
         self.name = name
         self.slug = slug
 
-    @classmethod
-    def from_dict(cls, contents):
-        if contents is None:
-            return cls()
-
-        return cls(**contents)
 
+class Rack(Model):
+    __slots__ = ('id', 'url', 'name', 'display_name')
 
-class Rack(object):
     def __init__(self, id=None, url=None, name=None, display_name=None):
         self.id = id
         self.url = url
         self.name = name
         self.display_name = display_name
 
-    @classmethod
-    def from_dict(cls, contents):
-        if contents is None:
-            return cls()
-
-        return cls(**contents)
 
+class Face(Model):
+    __slots__ = ('value', 'label')
 
-class Face(object):
     def __init__(self, value=None, label=None):
         self.value = value
         self.label = label
 
-    @classmethod
-    def from_dict(cls, contents):
-        if contents is None:
-            return cls()
 
-        return cls(**contents)
+class Status(Model):
+    __slots__ = ('value', 'label')
 
-
-class Status(object):
     def __init__(self, value=None, label=None):
         self.value = value
         self.label = label
 
-    @classmethod
-    def from_dict(cls, contents):
-        if contents is None:
-            return cls()
-
-        return cls(**contents)
 
+class PrimaryIp(Model):
+    __slots__ = ('id', 'url', 'family', 'address')
 
-class PrimaryIp(object):
     def __init__(self, id=None, url=None, family=None, address=None):
         self.id = id
         self.url = url
         self.family = family
         self.address = address
 
-    @classmethod
-    def from_dict(cls, contents):
-        if contents is None:
-            return cls()
-
-        return cls(**contents)
 
+class PrimaryIp4(Model):
+    __slots__ = ('id', 'url', 'family', 'address')
 
-class PrimaryIp4(object):
     def __init__(self, id=None, url=None, family=None, address=None):
         self.id = id
         self.url = url
         self.family = family
         self.address = address
 
-    @classmethod
-    def from_dict(cls, contents):
-        if contents is None:
-            return cls()
 
-        return cls(**contents)
+class Device(Model):
+    __slots__ = (
+        '_device_type', '_device_role', '_tenant', '_platform', '_site', '_rack', '_face', '_status', '_primary_ip',
+        '_primary_ip4', '_custom_fields', 'id', 'name', 'display_name', 'serial', 'asset_tag', 'position',
+        'parent_device', 'primary_ip6', 'comments', 'created', 'last_updated')
+
+    device_type = Nested(DeviceType)
+    device_role = Nested(DeviceRole)
+    tenant = Nested(Tenant)
+    platform = Nested(Platform)
+    site = Nested(DeviceSite)
+    rack = Nested(Rack)
+    face = Nested(Face)
+    status = Nested(Status)
+    primary_ip = Nested(PrimaryIp)
+    primary_ip4 = Nested(PrimaryIp4)
+    custom_fields = Nested(CustomFields)
 
-
-class Device(object):
     def __init__(self, device_type=None, device_role=None, tenant=None, platform=None, site=None, rack=None, face=None,
                  status=None, primary_ip=None, primary_ip4=None, custom_fields=None, id=None, name=None,
                  display_name=None, serial=None, asset_tag=None, position=None, parent_device=None, primary_ip6=None,
-                 comments=None):
-        self.device_type = DeviceType.from_dict(device_type)
-        self.device_role = DeviceRole.from_dict(device_role)
-        self.tenant = Tenant.from_dict(tenant)
-        self.platform = Platform.from_dict(platform)
-        self.site = DeviceSite.from_dict(site)
-        self.rack = Rack.from_dict(rack)
-        self.face = Face.from_dict(face)
-        self.status = Status.from_dict(status)
-        self.primary_ip = PrimaryIp.from_dict(primary_ip)
-        self.primary_ip4 = PrimaryIp4.from_dict(primary_ip4)
-        self.custom_fields = CustomFields.from_dict(custom_fields)
+                 comments=None, created=None, last_updated=None):
+        self.device_type = device_type
+        self.device_role = device_role
+        self.tenant = tenant
+        self.platform = platform
+        self.site = site
+        self.rack = rack
+        self.face = face
+        self.status = status
+        self.primary_ip = primary_ip
+        self.primary_ip4 = primary_ip4
+        self.custom_fields = custom_fields
         self.id = id
         self.name = name
         self.display_name = display_name
@@ -204,10 +168,5 @@ class Device(object):
         self.parent_device = parent_device
         self.primary_ip6 = primary_ip6
         self.comments = comments
-
-    @classmethod
-    def from_dict(cls, contents):
-        if contents is None:
-            return cls()
-
-        return cls(**contents)
+        self.created = created
+        self.last_updated = last_updated
@@ -1,6 +1,6 @@
 from enum import Enum
 
-from netbox_api.model.common import CustomFields
+from netbox_api.model.common import CustomFields, Model, Nested
 
 
 class InterfaceOrderConstant(Enum):
@@ -14,41 +14,40 @@ class SubdeviceTypeConstant(Enum):
     CHILD = 'Child'
 
 
-class DeviceTypeManufacturer(object):
+class DeviceTypeManufacturer(Model):
+    __slots__ = ('id', 'url', 'name', 'slug')
+
     def __init__(self, id=None, url=None, name=None, slug=None):
         self.id = id
         self.url = url
         self.name = name
         self.slug = slug
 
-    @classmethod
-    def from_dict(cls, contents):
-        if contents is None:
-            return cls()
-
-        return cls(**contents)
 
+class InterfaceOrdering(Model):
+    __slots__ = ('label', 'value')
 
-class InterfaceOrdering(object):
     def __init__(self, label=None, value=None):
         self.label = label
         self.value = value
 
-    @classmethod
-    def from_dict(cls, contents):
-        if contents is None:
-            return cls()
 
-        return cls(**contents)
+class DeviceType(Model):
+    __slots__ = (
+        '_manufacturer', '_interface_ordering', '_custom_fields', 'id', 'model', 'slug', 'part_number', 'u_height',
+        'is_full_depth', 'is_console_server', 'is_pdu', 'is_network_device', 'subdevice_role', 'comments',
+        'instance_count')
 
+    manufacturer = Nested(DeviceTypeManufacturer)
+    interface_ordering = Nested(InterfaceOrdering)
+    custom_fields = Nested(CustomFields)
 
-class DeviceType(object):
     def __init__(self, manufacturer=None, interface_ordering=None, custom_fields=None, id=None, model=None, slug=None,
                  part_number=None, u_height=None, is_full_depth=None, is_console_server=None, is_pdu=None,
                  is_network_device=None, subdevice_role=None, comments=None, instance_count=None):
-        self.manufacturer = DeviceTypeManufacturer.from_dict(manufacturer)
-        self.interface_ordering = InterfaceOrdering.from_dict(interface_ordering)
-        self.custom_fields = CustomFields.from_dict(custom_fields)
+        self.manufacturer = manufacturer
+        self.interface_ordering = interface_ordering
+        self.custom_fields = custom_fields
         self.id = id
         self.model = model
         self.slug = slug
@@ -61,10 +60,3 @@ class DeviceType(object):
         self.subdevice_role = subdevice_role
         self.comments = comments
         self.instance_count = instance_count
-
-    @classmethod
-    def from_dict(cls, contents):
-        if contents is None:
-            return cls()
-
-        return cls(**contents)
@@ -1,5 +1,7 @@
 from enum import Enum
 
+from netbox_api.model.common import Model, Nested
+
 
 class FormFactorConstant(Enum):
     # Virtual interfaces
@@ -47,40 +49,37 @@ class FormFactorConstant(Enum):
     OTHER = 32767
 
 
-class InterfaceDevice(object):
+class InterfaceDevice(Model):
+    __slots__ = ('id', 'url', 'name', 'display_name')
+
     def __init__(self, id=None, url=None, name=None, display_name=None):
         self.id = id
         self.url = url
         self.name = name
         self.display_name = display_name
 
-    @classmethod
-    def from_dict(cls, contents):
-        if contents is None:
-            return cls()
-
-        return cls(**contents)
 
+class FormFactor(Model):
+    __slots__ = ('label', 'value')
 
-class FormFactor(object):
     def __init__(self, label=None, value=None):
         self.label = label
         self.value = value
 
-    @classmethod
-    def from_dict(cls, contents):
-        if contents is None:
-            return cls()
 
-        return cls(**contents)
+class Interface(Model):
+    __slots__ = (
+        '_device', '_form_factor', 'id', 'name', 'enabled', 'lag', 'mtu', 'mac_address', 'mgmt_only', 'description',
+        'is_connected', 'interface_connection', 'circuit_termination', 'created', 'last_updated')
 
+    device = Nested(InterfaceDevice)
+    form_factor = Nested(FormFactor)
 
-class Interface(object):
     def __init__(self, device=None, form_factor=None, id=None, name=None, enabled=None, lag=None, mtu=None,
                  mac_address=None, mgmt_only=None, description=None, is_connected=None, interface_connection=None,
-                 circuit_termination=None):
-        self.device = InterfaceDevice.from_dict(device)
-        self.form_factor = FormFactor.from_dict(form_factor)
+                 circuit_termination=None, created=None, last_updated=None):
+        self.device = device
+        self.form_factor = form_factor
         self.id = id
         self.name = name
         self.enabled = enabled
@@ -92,10 +91,5 @@ class Interface(object):
         self.is_connected = is_connected
         self.interface_connection = interface_connection
         self.circuit_termination = circuit_termination
-
-    @classmethod
-    def from_dict(cls, contents):
-        if contents is None:
-            return cls()
-
-        return cls(**contents)
+        self.created = created
+        self.last_updated = last_updated
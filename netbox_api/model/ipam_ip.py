@@ -1,4 +1,4 @@
-from netbox_api.model.common import CustomFields
+from netbox_api.model.common import CustomFields, Model, Nested
 from enum import Enum
 
 
@@ -19,96 +19,73 @@ class IPAddressRoleConstant(Enum):
     GLBP = 43
 
 
-class VRF(object):
+class VRF(Model):
+    __slots__ = ('id', 'url', 'name', 'rd')
+
     def __init__(self, id=None, url=None, name=None, rd=None):
         self.id = id
         self.url = url
         self.name = name
         self.rd = rd
 
-    @classmethod
-    def from_dict(cls, contents):
-        if contents is None:
-            return cls()
-
-        return cls(**contents)
 
+class Tenant(Model):
+    __slots__ = ('id', 'url', 'name', 'slug')
 
-class Tenant(object):
     def __init__(self, id=None, url=None, name=None, slug=None):
         self.id = id
         self.url = url
         self.name = name
         self.slug = slug
 
-    @classmethod
-    def from_dict(cls, contents):
-        if contents is None:
-            return cls()
 
-        return cls(**contents)
+class Status(Model):
+    __slots__ = ('label', 'value')
 
-
-class Status(object):
     def __init__(self, label=None, value=None):
         self.label = label
         self.value = value
 
-    @classmethod
-    def from_dict(cls, contents):
-        if contents is None:
-            return cls()
-
-        return cls(**contents)
 
+class Role(Model):
+    __slots__ = ('label', 'value')
 
-class Role(object):
     def __init__(self, label=None, value=None):
         self.label = label
         self.value = value
 
-    @classmethod
-    def from_dict(cls, contents):
-        if contents is None:
-            return cls()
 
-        return cls(**contents)
+class Device(Model):
+    __slots__ = ('id', 'url', 'name', 'display_name')
 
-
-class Device(object):
     def __init__(self, id=None, url=None, name=None, display_name=None):
         self.id = id
         self.url = url
         self.name = name
         self.display_name = display_name
 
-    @classmethod
-    def from_dict(cls, contents):
-        if contents is None:
-            return cls()
-
-        return cls(**contents)
 
+class FormFactor(Model):
+    __slots__ = ('label', 'value')
 
-class FormFactor(object):
     def __init__(self, label=None, value=None):
         self.label = label
         self.value = value
 
-    @classmethod
-    def from_dict(cls, contents):
-        if contents is None:
-            return cls()
 
-        return cls(**contents)
+class Interface(Model):
+    __slots__ = (
+        '_device', '_form_factor', 'id', 'name', 'enabled', 'lag', 'mtu', 'mac_address', 'mgmt_only', 'description',
+        'is_connected', 'interface_connection', 'circuit_termination')
 
+    device = Nested(Device)
+    form_factor = Nested(FormFactor)
 
-class Interface(object):
     def __init__(self, device=None, form_factor=None, id=None, name=None, enabled=None, lag=None, mtu=None,
                  mac_address=None, mgmt_only=None, description=None, is_connected=None, interface_connection=None,
                  circuit_termination=None):
-        self.device = Device.from_dict(device)
-        self.form_factor = FormFactor.from_dict(form_factor)
+        self.device = device
+        self.form_factor = form_factor
         self.id = id
         self.name = name
         self.enabled = enabled
@@ -121,33 +98,33 @@ class Interface(object):
         self.interface_connection = interface_connection
         self.circuit_termination = circuit_termination
 
-    @classmethod
-    def from_dict(cls, contents):
-        if contents is None:
-            return cls()
 
-        return cls(**contents)
+class IPAddress(Model):
+    __slots__ = (
+        '_vrf', '_tenant', '_status', '_role', '_interface', '_custom_fields', 'id', 'family', 'address', 'description',
+        'nat_inside', 'nat_outside', 'created', 'last_updated')
 
+    vrf = Nested(VRF)
+    tenant = Nested(Tenant)
+    status = Nested(Status)
+    role = Nested(Role)
+    interface = Nested(Interface)
+    custom_fields = Nested(CustomFields)
 
-class IPAddress(object):
     def __init__(self, vrf=None, tenant=None, status=None, role=None, interface=None, custom_fields=None, id=None,
-                 family=None, address=None, description=None, nat_inside=None, nat_outside=None):
-        self.vrf = VRF.from_dict(vrf)
-        self.tenant = Tenant.from_dict(tenant)
-        self.status = Status.from_dict(status)
-        self.role = Role.from_dict(role)
-        self.interface = Interface.from_dict(interface)
-        self.custom_fields = CustomFields.from_dict(custom_fields)
+                 family=None, address=None, description=None, nat_inside=None, nat_outside=None,
+                 created=None, last_updated=None):
+        self.vrf = vrf
+        self.tenant = tenant
+        self.status = status
+        self.role = role
+        self.interface = interface
+        self.custom_fields = custom_fields
         self.id = id
         self.family = family
         self.address = address
         self.description = description
         self.nat_inside = nat_inside
         self.nat_outside = nat_outside
-
-    @classmethod
-    def from_dict(cls, contents):
-        if contents is None:
-            return cls()
-
-        return cls(**contents)
+        self.created = created
+        self.last_updated = last_updated
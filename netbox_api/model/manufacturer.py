@@ -1,12 +1,10 @@
-class Manufacturer(object):
+from netbox_api.model.common import Model
+
+
+class Manufacturer(Model):
+    __slots__ = ('id', 'name', 'slug')
+
     def __init__(self, id=None, name=None, slug=None):
         self.id = id
         self.name = name
         self.slug = slug
-
-    @classmethod
-    def from_dict(cls, contents):
-        if contents is None:
-            return cls()
-
-        return cls(**contents)
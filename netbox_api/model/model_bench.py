@@ -0,0 +1,129 @@
+"""
+Memory benchmark for the model classes. Builds a synthetic inventory of 100k
+interfaces, IP addresses and devices and compares the memory held by the
+slotted models against the same object graph built from plain classes that
+keep a per-instance __dict__.
+
+Run with: python -m netbox_api.model.model_bench [num_objects]
+"""
+import sys
+import tracemalloc
+
+from netbox_api.model import Device, Interface, IPAddress
+from netbox_api.model.common import CustomFields, Model
+
+
+def _device_record(i):
+    return {
+        'id': i,
+        'name': 'host-{}'.format(i),
+        'display_name': 'host-{}'.format(i),
+        'serial': 'SN{:08d}'.format(i),
+        'position': i % 42,
+        'device_type': {'id': 1, 'url': None, 'model': 'R640', 'slug': 'r640',
+                        'manufacturer': {'id': 1, 'url': None, 'name': 'Dell', 'slug': 'dell'}},
+        'device_role': {'id': 1, 'url': None, 'name': 'Compute', 'slug': 'compute'},
+        'tenant': {'id': 1, 'url': None, 'name': 'Infrastructure', 'slug': 'infrastructure'},
+        'platform': {'id': 1, 'url': None, 'name': 'Linux', 'slug': 'linux'},
+        'site': {'id': 1, 'url': None, 'name': 'DC1', 'slug': 'dc1'},
+        'rack': {'id': i % 500, 'url': None, 'name': 'R{}'.format(i % 500), 'display_name': 'R{}'.format(i % 500)},
+        'face': {'value': 0, 'label': 'Front'},
+        'status': {'value': 1, 'label': 'Active'},
+        'custom_fields': {'Tags': 'prod,compute'}
+    }
+
+
+def _interface_record(i):
+    return {
+        'id': i,
+        'name': 'eth{}'.format(i % 4),
+        'mac_address': '00:00:00:{:02x}:{:02x}:{:02x}'.format((i >> 16) & 0xff, (i >> 8) & 0xff, i & 0xff),
+        'enabled': True,
+        'mtu': 9000,
+        'mgmt_only': False,
+        'device': {'id': i // 4, 'url': None, 'name': 'host-{}'.format(i // 4),
+                   'display_name': 'host-{}'.format(i // 4)},
+        'form_factor': {'value': 1000, 'label': '1000BASE-T (1GE)'}
+    }
+
+
+def _ip_record(i):
+    return {
+        'id': i,
+        'family': 4,
+        'address': '10.{}.{}.{}/24'.format((i >> 16) & 0xff, (i >> 8) & 0xff, i & 0xff),
+        'vrf': {'id': 1, 'url': None, 'name': 'global', 'rd': '65000:1'},
+        'tenant': {'id': 1, 'url': None, 'name': 'Infrastructure', 'slug': 'infrastructure'},
+        'status': {'value': 1, 'label': 'Active'},
+        'interface': _interface_record(i),
+        'custom_fields': {}
+    }
+
+
+def synthetic_inventory(num_objects):
+    """
+    Generate raw records for an inventory of num_objects top-level objects, half
+    interfaces, three tenths IP addresses and a fifth devices.
+    """
+    records = list()
+
+    for i in range(num_objects // 2):
+        records.append((Interface, _interface_record(i)))
+
+    for i in range(num_objects * 3 // 10):
+        records.append((IPAddress, _ip_record(i)))
+
+    for i in range(num_objects - len(records)):
+        records.append((Device, _device_record(i)))
+
+    return records
+
+
+_PLAIN_CLASSES = dict()
+
+
+def _as_plain(obj):
+    """
+    Rebuild a model graph from plain classes that keep a per-instance __dict__,
+    sharing every leaf value with the original graph.
+    """
+    if not isinstance(obj, (Model, CustomFields)):
+        return obj
+
+    cls = type(obj)
+    plain_cls = _PLAIN_CLASSES.get(cls)
+    if plain_cls is None:
+        plain_cls = _PLAIN_CLASSES[cls] = type(cls.__name__, (object,), dict())
+
+    plain = plain_cls()
+    for slot in cls.__slots__:
+        setattr(plain, slot, _as_plain(getattr(obj, slot)))
+
+    return plain
+
+
+def _measure(build):
+    tracemalloc.start()
+    try:
+        result = build()
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return result, size
+
+
+def run(num_objects=100000):
+    records = synthetic_inventory(num_objects)
+
+    models, slotted_size = _measure(lambda: [cls(**r) for cls, r in records])
+    _, plain_size = _measure(lambda: [_as_plain(m) for m in models])
+
+    print('objects:          {}'.format(len(models)))
+    print('__dict__ models:  {:>12,} bytes ({:.0f} bytes/object)'.format(plain_size, plain_size / len(models)))
+    print('__slots__ models: {:>12,} bytes ({:.0f} bytes/object)'.format(slotted_size, slotted_size / len(models)))
+    print('reduction:        {:.1%}'.format(1 - slotted_size / plain_size))
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
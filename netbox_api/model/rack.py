@@ -1,4 +1,4 @@
-from netbox_api.model.common import CustomFields
+from netbox_api.model.common import CustomFields, Model, Nested
 from enum import Enum
 
 
@@ -15,103 +15,85 @@ class RackTypeConstant(Enum):
     CABINET_WALL_MOUNTED = 1100
 
 
-class RackSite(object):
+class RackSite(Model):
+    __slots__ = ('id', 'url', 'name', 'slug')
+
     def __init__(self, id=None, url=None, name=None, slug=None):
         self.id = id
         self.url = url
         self.name = name
         self.slug = slug
 
-    @classmethod
-    def from_dict(cls, contents):
-        if contents is None:
-            return cls()
-
-        return cls(**contents)
 
+class RackGroup(Model):
+    __slots__ = ('id', 'url', 'name', 'slug')
 
-class RackGroup(object):
     def __init__(self, id=None, url=None, name=None, slug=None):
         self.id = id
         self.url = url
         self.name = name
         self.slug = slug
 
-    @classmethod
-    def from_dict(cls, contents):
-        if contents is None:
-            return cls()
 
-        return cls(**contents)
+class RackTenant(Model):
+    __slots__ = ('id', 'url', 'name', 'slug')
 
-
-class RackTenant(object):
     def __init__(self, id=None, url=None, name=None, slug=None):
         self.id = id
         self.url = url
         self.name = name
         self.slug = slug
 
-    @classmethod
-    def from_dict(cls, contents):
-        if contents is None:
-            return cls()
-
-        return cls(**contents)
 
+class RackRole(Model):
+    __slots__ = ('id', 'url', 'name', 'slug')
 
-class RackRole(object):
     def __init__(self, id=None, url=None, name=None, slug=None):
         self.id = id
         self.url = url
         self.name = name
         self.slug = slug
 
-    @classmethod
-    def from_dict(cls, contents):
-        if contents is None:
-            return cls()
 
-        return cls(**contents)
+class RackType(Model):
+    __slots__ = ('value', 'label')
 
-
-class RackType(object):
     def __init__(self, value=None, label=None):
         self.value = value
         self.label = label
 
-    @classmethod
-    def from_dict(cls, contents):
-        if contents is None:
-            return cls()
-
-        return cls(**contents)
 
+class RackWidth(Model):
+    __slots__ = ('value', 'label')
 
-class RackWidth(object):
     def __init__(self, value=None, label=None):
         self.value = value
         self.label = label
 
-    @classmethod
-    def from_dict(cls, contents):
-        if contents is None:
-            return cls()
 
-        return cls(**contents)
+class Rack(Model):
+    __slots__ = (
+        '_site', '_group', '_tenant', '_role', '_type', '_width', '_custom_fields', 'id', 'name', 'facility_id',
+        'display_name', 'u_height', 'desc_units', 'comments', 'created', 'last_updated')
 
+    site = Nested(RackSite)
+    group = Nested(RackGroup)
+    tenant = Nested(RackTenant)
+    role = Nested(RackRole)
+    type = Nested(RackType)
+    width = Nested(RackWidth)
+    custom_fields = Nested(CustomFields)
 
-class Rack(object):
     def __init__(self, site=None, group=None, tenant=None, role=None, type=None, width=None, custom_fields=None,
                  id=None, name=None, facility_id=None, display_name=None, u_height=None, desc_units=None,
-                 comments=None):
-        self.site = RackSite.from_dict(site)
-        self.group = RackGroup.from_dict(group)
-        self.tenant = RackTenant.from_dict(tenant)
-        self.role = RackRole.from_dict(role)
-        self.type = RackType.from_dict(type)
-        self.width = RackWidth.from_dict(width)
-        self.custom_fields = CustomFields.from_dict(custom_fields)
+                 comments=None, created=None, last_updated=None):
+        self.site = site
+        self.group = group
+        self.tenant = tenant
+        self.role = role
+        self.type = type
+        self.width = width
+        self.custom_fields = custom_fields
         self.id = id
         self.name = name
         self.facility_id = facility_id
@@ -119,10 +101,5 @@ class Rack(object):
         self.u_height = u_height
         self.desc_units = desc_units
         self.comments = comments
-
-    @classmethod
-    def from_dict(cls, contents):
-        if contents is None:
-            return cls()
-
-        return cls(**contents)
+        self.created = created
+        self.last_updated = last_updated
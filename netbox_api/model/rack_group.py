@@ -1,28 +1,23 @@
-class RackGroupSite(object):
+from netbox_api.model.common import Model, Nested
+
+
+class RackGroupSite(Model):
+    __slots__ = ('id', 'url', 'name', 'slug')
+
     def __init__(self, id=None, url=None, name=None, slug=None):
         self.id = id
         self.url = url
         self.name = name
         self.slug = slug
 
-    @classmethod
-    def from_dict(cls, contents):
-        if contents is None:
-            return cls()
 
-        return cls(**contents)
+class RackGroup(Model):
+    __slots__ = ('_site', 'id', 'name', 'slug')
 
+    site = Nested(RackGroupSite)
 
-class RackGroup(object):
     def __init__(self, site=None, id=None, name=None, slug=None):
-        self.site = RackGroupSite.from_dict(site)
+        self.site = site
         self.id = id
         self.name = name
         self.slug = slug
-
-    @classmethod
-    def from_dict(cls, contents):
-        if contents is None:
-            return cls()
-
-        return cls(**contents)
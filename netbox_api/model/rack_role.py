@@ -1,13 +1,11 @@
-class RackRole(object):
+from netbox_api.model.common import Model
+
+
+class RackRole(Model):
+    __slots__ = ('id', 'name', 'slug', 'color')
+
     def __init__(self, id=None, name=None, slug=None, color=None):
         self.id = id
         self.name = name
         self.slug = slug
         self.color = color
-
-    @classmethod
-    def from_dict(cls, contents):
-        if contents is None:
-            return cls()
-
-        return cls(**contents)
@@ -1,13 +1,11 @@
-class Region(object):
+from netbox_api.model.common import Model
+
+
+class Region(Model):
+    __slots__ = ('id', 'name', 'slug', 'parent')
+
     def __init__(self, id=None, name=None, slug=None, parent=None):
         self.id = id
         self.name = name
         self.slug = slug
         self.parent = parent
-
-    @classmethod
-    def from_dict(cls, contents):
-        if contents is None:
-            return cls()
-
-        return cls(**contents)
@@ -1,28 +1,31 @@
-from netbox_api.model.common import CustomFields
+from netbox_api.model.common import CustomFields, Model, Nested
 
 
-class SiteTenant(object):
+class SiteTenant(Model):
+    __slots__ = ('id', 'url', 'name', 'slug')
+
     def __init__(self, id=None, url=None, name=None, slug=None):
         self.id = id
         self.url = url
         self.name = name
         self.slug = slug
 
-    @classmethod
-    def from_dict(cls, contents):
-        if contents is None:
-            return cls()
 
-        return cls(**contents)
+class Site(Model):
+    __slots__ = (
+        '_tenant', '_custom_fields', 'id', 'name', 'slug', 'region', 'facility', 'asn', 'physical_address',
+        'shipping_address', 'contact_name', 'contact_phone', 'contact_email', 'comments', 'count_prefixes',
+        'count_vlans', 'count_racks', 'count_devices', 'count_circuits', 'created', 'last_updated')
 
+    tenant = Nested(SiteTenant)
+    custom_fields = Nested(CustomFields)
 
-class Site(object):
     def __init__(self, tenant=None, custom_fields=None, id=None, name=None, slug=None, region=None, facility=None,
                  asn=None, physical_address=None, shipping_address=None, contact_name=None, contact_phone=None,
                  contact_email=None, comments=None, count_prefixes=None, count_vlans=None, count_racks=None,
-                 count_devices=None, count_circuits=None):
-        self.tenant = SiteTenant.from_dict(tenant)
-        self.custom_fields = CustomFields.from_dict(custom_fields)
+                 count_devices=None, count_circuits=None, created=None, last_updated=None):
+        self.tenant = tenant
+        self.custom_fields = custom_fields
         self.id = id
         self.name = name
         self.slug = slug
@@ -40,10 +43,5 @@ class Site(object):
         self.count_racks = count_racks
         self.count_devices = count_devices
         self.count_circuits = count_circuits
-
-    @classmethod
-    def from_dict(cls, contents):
-        if contents is None:
-            return cls()
-
-        return cls(**contents)
+        self.created = created
+        self.last_updated = last_updated
@@ -1,34 +1,30 @@
-from netbox_api.model.common import CustomFields
+from netbox_api.model.common import CustomFields, Model, Nested
 
 
-class TenantGroup(object):
+class TenantGroup(Model):
+    __slots__ = ('id', 'url', 'name', 'slug')
+
     def __init__(self, id=None, url=None, name=None, slug=None):
         self.id = id
         self.url = url
         self.name = name
         self.slug = slug
 
-    @classmethod
-    def from_dict(cls, contents):
-        if contents is None:
-            return cls()
 
-        return cls(**contents)
+class Tenant(Model):
+    __slots__ = ('_group', '_custom_fields', 'id', 'name', 'slug', 'description', 'comments', 'created', 'last_updated')
 
+    group = Nested(TenantGroup)
+    custom_fields = Nested(CustomFields)
 
-class Tenant(object):
-    def __init__(self, group=None, custom_fields=None, id=None, name=None, slug=None, description=None, comments=None):
-        self.group = TenantGroup.from_dict(group)
-        self.custom_fields = CustomFields.from_dict(custom_fields)
+    def __init__(self, group=None, custom_fields=None, id=None, name=None, slug=None, description=None, comments=None,
+                 created=None, last_updated=None):
+        self.group = group
+        self.custom_fields = custom_fields
         self.id = id
         self.name = name
         self.slug = slug
         self.description = description
         self.comments = comments
-
-    @classmethod
-    def from_dict(cls, contents):
-        if contents is None:
-            return cls()
-
-        return cls(**contents)
+        self.created = created
+        self.last_updated = last_updated
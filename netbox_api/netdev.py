@@ -0,0 +1,105 @@
+"""
+Native reads of network interface details on Linux. Interface names and MAC
+addresses come from sysfs while IPv4 addresses and supported port types are
+asked of the kernel through the same ioctls that 'ip' and 'ethtool' use, so
+that discovery doesn't need to fork a process per interface.
+
+Every function raises OSError when the kernel can't answer, callers fall back
+to running the command line tools in that case.
+"""
+import errno
+import os
+import socket
+import struct
+import sys
+from array import array
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+SYSFS_NET = '/sys/class/net'
+
+# Whether interfaces can be inspected natively on this platform
+AVAILABLE = sys.platform.startswith('linux') and fcntl is not None
+
+# ioctl requests, see linux/sockios.h
+SIOCGIFADDR = 0x8915
+SIOCGIFNETMASK = 0x891b
+SIOCETHTOOL = 0x8946
+
+# ethtool command and supported port bits, see linux/ethtool.h
+ETHTOOL_GSET = 0x1
+SUPPORTED_TP = 1 << 7
+SUPPORTED_FIBRE = 1 << 10
+
+# Size of struct ethtool_cmd
+_ETHTOOL_CMD_SIZE = 44
+
+# Size of struct ifreq, a 16 byte name followed by a 24 byte union
+_IFREQ_SIZE = 40
+_IFNAMSIZ = 16
+
+
+def _ifreq_name(iface):
+    return iface.encode('utf-8')[:_IFNAMSIZ - 1]
+
+
+def list_interfaces():
+    return sorted(os.listdir(SYSFS_NET))
+
+
+def mac_address(iface):
+    with open(os.path.join(SYSFS_NET, iface, 'address'), 'r') as fin:
+        return fin.read().strip()
+
+
+def _inet_ioctl(sock, request, iface):
+    ifreq = fcntl.ioctl(sock.fileno(), request, struct.pack('{}s'.format(_IFREQ_SIZE), _ifreq_name(iface)))
+
+    # The address is the sin_addr of the sockaddr_in following the name
+    return socket.inet_ntoa(ifreq[_IFNAMSIZ + 4:_IFNAMSIZ + 8])
+
+
+def ip_address(iface):
+    """
+    The primary IPv4 address of an interface in CIDR notation, None when it
+    has no IPv4 address.
+    """
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        try:
+            address = _inet_ioctl(sock, SIOCGIFADDR, iface)
+        except OSError as ex:
+            if ex.errno == errno.EADDRNOTAVAIL:
+                return None
+
+            raise
+
+        netmask = _inet_ioctl(sock, SIOCGIFNETMASK, iface)
+
+    prefix_len = bin(struct.unpack('!I', socket.inet_aton(netmask))[0]).count('1')
+    return '{}/{}'.format(address, prefix_len)
+
+
+def port_type(iface):
+    """
+    The port type an interface supports as named by ethtool, 'tp' or 'fibre',
+    None when it supports neither.
+    """
+    ecmd = array('B', struct.pack('I', ETHTOOL_GSET) + bytes(_ETHTOOL_CMD_SIZE - 4))
+    ifreq = struct.pack('{}sP'.format(_IFNAMSIZ), _ifreq_name(iface), ecmd.buffer_info()[0])
+    ifreq += bytes(_IFREQ_SIZE - len(ifreq))
+
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        fcntl.ioctl(sock.fileno(), SIOCETHTOOL, ifreq)
+
+    supported = struct.unpack_from('I', ecmd, 4)[0]
+
+    if supported & SUPPORTED_TP:
+        return 'tp'
+
+    if supported & SUPPORTED_FIBRE:
+        return 'fibre'
+
+    return None
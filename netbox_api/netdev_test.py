@@ -0,0 +1,104 @@
+import ctypes
+import errno
+import socket
+import struct
+import unittest
+from unittest import mock
+
+from netbox_api import netdev
+
+
+def _ifreq(iface, address):
+    # struct ifreq holding a sockaddr_in, as answered to SIOCGIFADDR and SIOCGIFNETMASK
+    return struct.pack('16sH2s4s16x', iface.encode('utf-8'), socket.AF_INET, bytes(2), socket.inet_aton(address))
+
+
+class _FakeKernel(object):
+    """
+    Answers the ioctls netdev sends for a single interface the way Linux
+    does, or fails them with the given errno.
+    """
+
+    def __init__(self, address='10.0.0.5', netmask='255.255.252.0', supported=0, errors=None):
+        self.address = address
+        self.netmask = netmask
+        self.supported = supported
+        self.errors = errors or dict()
+        self.requests = list()
+
+    def ioctl(self, fd, request, arg):
+        name = struct.unpack_from('16s', arg)[0].rstrip(b'\0').decode('utf-8')
+        self.requests.append((request, name))
+
+        if request in self.errors:
+            raise OSError(self.errors[request], 'ioctl failed')
+
+        if request == netdev.SIOCGIFADDR:
+            return _ifreq(name, self.address)
+
+        if request == netdev.SIOCGIFNETMASK:
+            return _ifreq(name, self.netmask)
+
+        # The ifreq points at a struct ethtool_cmd, whose supported bits follow the command
+        pointer = struct.unpack_from('16sP', arg)[1]
+        if struct.unpack('I', ctypes.string_at(pointer, 4))[0] != netdev.ETHTOOL_GSET:
+            raise OSError(errno.EINVAL, 'unknown ethtool command')
+
+        ctypes.memmove(pointer + 4, struct.pack('I', self.supported), 4)
+        return 0
+
+
+@unittest.skipIf(not netdev.AVAILABLE, 'interfaces can only be read natively on Linux')
+class WhenReadingInterfacesNatively(unittest.TestCase):
+    def _kernel(self, **kwargs):
+        kernel = _FakeKernel(**kwargs)
+
+        patcher = mock.patch.object(netdev, 'fcntl', kernel)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        return kernel
+
+    def test_ip_address_with_its_prefix_length(self):
+        kernel = self._kernel()
+
+        self.assertEqual('10.0.0.5/22', netdev.ip_address('eth0'))
+        self.assertEqual([(netdev.SIOCGIFADDR, 'eth0'), (netdev.SIOCGIFNETMASK, 'eth0')], kernel.requests)
+
+    def test_netmasks_convert_to_prefix_lengths(self):
+        for netmask, prefix_len in (('255.255.255.255', 32), ('255.255.255.0', 24), ('255.128.0.0', 9),
+                                    ('0.0.0.0', 0)):
+            self._kernel(netmask=netmask)
+            self.assertEqual('10.0.0.5/{}'.format(prefix_len), netdev.ip_address('eth0'))
+
+    def test_interfaces_without_an_ipv4_address(self):
+        self._kernel(errors={netdev.SIOCGIFADDR: errno.EADDRNOTAVAIL})
+        self.assertIsNone(netdev.ip_address('eth0'))
+
+    def test_other_address_errors_are_raised(self):
+        self._kernel(errors={netdev.SIOCGIFADDR: errno.ENODEV})
+
+        with self.assertRaises(OSError):
+            netdev.ip_address('eth0')
+
+    def test_port_types(self):
+        for supported, port_type in ((netdev.SUPPORTED_TP, 'tp'), (netdev.SUPPORTED_FIBRE, 'fibre'),
+                                     (netdev.SUPPORTED_TP | netdev.SUPPORTED_FIBRE, 'tp'), (0, None)):
+            self._kernel(supported=supported)
+            self.assertEqual(port_type, netdev.port_type('eth0'))
+
+    def test_drivers_without_ethtool_support(self):
+        self._kernel(errors={netdev.SIOCETHTOOL: errno.EOPNOTSUPP})
+
+        with self.assertRaises(OSError):
+            netdev.port_type('eth0')
+
+    def test_long_names_are_truncated_to_fit(self):
+        kernel = self._kernel()
+        netdev.port_type('a-very-long-interface-name')
+
+        self.assertEqual([(netdev.SIOCETHTOOL, 'a-very-long-int')], kernel.requests)
+
+
+if __name__ == '__main__':
+    unittest.main()
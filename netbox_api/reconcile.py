@@ -0,0 +1,535 @@
+"""
+Reconciliation of a host's interfaces with what NetBox holds for its device.
+The interfaces and IP addresses NetBox has for the device are compared with
+the ones discovered on the host and only the differences are written, in bulk,
+so that a host that hasn't changed costs two listings and no writes. Netbox
+before 2.10 refuses bulk updates and deletes, those are then sent one object
+at a time by the client. Interfaces keep their IDs, and with them their
+connections, across syncs.
+
+Interfaces are matched by name first and then by MAC address, an interface
+matched by MAC address alone is renamed.
+
+A diff can be turned into a plan, a JSON document listing every write as an
+operation, so that what a sync would do can be reviewed before it is applied.
+Operations that need the ID of an interface created by the same plan refer to
+the operation creating it. Applying a plan records every operation that went
+through in a journal, applying it again with the same journal resumes where a
+failed attempt left off and applying a plan the journal marks as complete does
+nothing.
+"""
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from netbox_api.api.client import BULK_CHUNK_SIZE
+from netbox_api.inventory import mac_key
+
+# Version of the plan format
+PLAN_VERSION = 1
+
+# Plan actions in the order they are applied. Whatever goes away is cleared
+# out first so that renamed and created interfaces don't clash with it.
+DELETE_IP_ADDRESS = 'delete_ip_address'
+DELETE_INTERFACE = 'delete_interface'
+UPDATE_INTERFACE = 'update_interface'
+CREATE_INTERFACE = 'create_interface'
+ASSIGN_IP = 'assign_ip'
+
+ACTIONS = (DELETE_IP_ADDRESS, DELETE_INTERFACE, UPDATE_INTERFACE, CREATE_INTERFACE, ASSIGN_IP)
+
+# Name of the tenant that IP addresses assigned during a sync belong to
+SYNC_TENANT = 'Infrastructure'
+
+
+class HostDiff(object):
+    """
+    The writes that bring a device's interfaces and IP addresses in line with
+    what was discovered on its host.
+
+    IP addresses to assign are (interface name, address) pairs since the
+    interface may only be created when the diff is applied.
+    """
+
+    def __init__(self, device_name, device_id=None):
+        self.device_name = device_name
+
+        # Known from the device's existing interfaces, looked up on apply otherwise
+        self.device_id = device_id
+
+        self.create_interfaces = list()
+        self.update_interfaces = list()
+        self.delete_interfaces = list()
+        self.assign_ips = list()
+        self.delete_ips = list()
+
+        # Interface name -> ID of the existing interface it was matched with
+        self.interface_ids = dict()
+
+    def __len__(self):
+        return (len(self.create_interfaces) + len(self.update_interfaces) + len(self.delete_interfaces) +
+                len(self.assign_ips) + len(self.delete_ips))
+
+    @property
+    def empty(self):
+        return len(self) == 0
+
+
+def fetch_host_state(netbox_client, device_name, snapshot=None):
+    """
+    List the interfaces and IP addresses NetBox holds for a device.
+
+    :param netbox_client:
+    :param device_name:
+    :param snapshot: optional InventorySnapshot to read them from instead of the API
+    :return: (interfaces, ip_addresses)
+    """
+    if snapshot is not None:
+        interfaces = list()
+        for device in snapshot.devices_named(device_name):
+            interfaces.extend(snapshot.interfaces_of(device.id))
+
+        ip_addresses = list()
+        for interface in interfaces:
+            ip_addresses.extend(snapshot.ip_addresses_of(interface.id))
+
+        return interfaces, ip_addresses
+
+    interfaces = netbox_client.dcim.list_interfaces(device=device_name)
+    ip_addresses = netbox_client.ipam.list_ip_addresses(device=device_name)
+
+    return interfaces, ip_addresses
+
+
+def _match_interfaces(discovered, interfaces):
+    by_name = dict((i.name, i) for i in interfaces)
+    by_mac = dict((mac_key(i.mac_address), i) for i in interfaces if i.mac_address is not None)
+    discovered_names = set(d.name for d in discovered)
+
+    matches = dict()
+    matched_ids = set()
+
+    # Names win over MAC addresses so that match every name first
+    for wanted in discovered:
+        existing = by_name.get(wanted.name)
+        if existing is not None:
+            matches[wanted.name] = existing
+            matched_ids.add(existing.id)
+
+    for wanted in discovered:
+        if wanted.name in matches or wanted.mac_address is None:
+            continue
+
+        # Only take over an interface whose name isn't wanted by another discovered interface
+        existing = by_mac.get(mac_key(wanted.mac_address))
+        if existing is not None and existing.id not in matched_ids and existing.name not in discovered_names:
+            matches[wanted.name] = existing
+            matched_ids.add(existing.id)
+
+    return matches
+
+
+def _interface_update(wanted, existing):
+    update = dict()
+
+    if existing.name != wanted.name:
+        update['name'] = wanted.name
+
+    if mac_key(existing.mac_address) != mac_key(wanted.mac_address):
+        update['mac_address'] = wanted.mac_address
+
+    form_factor = wanted.form_factor.value if wanted.form_factor is not None else None
+    if existing.form_factor.value != form_factor:
+        update['form_factor'] = form_factor
+
+    if len(update) > 0:
+        update['id'] = existing.id
+
+    return update
+
+
+def diff_host(device_name, discovered, interfaces, ip_addresses):
+    """
+    Work out the writes that make NetBox match the discovered interfaces.
+
+    :param device_name:
+    :param discovered: list of DiscoveredInterface
+    :param interfaces: the device's interfaces in NetBox
+    :param ip_addresses: the IP addresses assigned to the device's interfaces in NetBox
+    :return: HostDiff
+    """
+    device_id = interfaces[0].device.id if len(interfaces) > 0 else None
+    diff = HostDiff(device_name, device_id)
+
+    matches = _match_interfaces(discovered, interfaces)
+    matched_ids = set(i.id for i in matches.values())
+
+    # Interface ID -> IP addresses assigned to it
+    ips_by_interface = dict()
+    for ip_address in ip_addresses:
+        ips_by_interface.setdefault(ip_address.interface.id, list()).append(ip_address)
+
+    for wanted in discovered:
+        existing = matches.get(wanted.name)
+
+        if existing is None:
+            diff.create_interfaces.append(wanted)
+
+            if wanted.ip_address is not None:
+                diff.assign_ips.append((wanted.name, wanted.ip_address))
+
+            continue
+
+        diff.interface_ids[wanted.name] = existing.id
+
+        update = _interface_update(wanted, existing)
+        if len(update) > 0:
+            diff.update_interfaces.append(update)
+
+        # Drop whatever else is assigned to the interface
+        assigned = ips_by_interface.get(existing.id, list())
+        for ip_address in assigned:
+            if ip_address.address != wanted.ip_address:
+                diff.delete_ips.append(ip_address.id)
+
+        if wanted.ip_address is not None and wanted.ip_address not in [a.address for a in assigned]:
+            diff.assign_ips.append((wanted.name, wanted.ip_address))
+
+    for existing in interfaces:
+        if existing.id not in matched_ids:
+            diff.delete_interfaces.append(existing.id)
+            diff.delete_ips.extend(a.id for a in ips_by_interface.get(existing.id, list()))
+
+    return diff
+
+
+def make_plan(diff, tenant_name=SYNC_TENANT):
+    """
+    Turn a HostDiff into a plan that can be serialised as JSON.
+
+    :param diff:
+    :param tenant_name: name of the tenant assigned IP addresses belong to
+    :return: dict
+    """
+    ops = list()
+
+    def add(action, **fields):
+        ops.append(dict(fields, op=len(ops), action=action))
+        return ops[-1]['op']
+
+    for ip_address_id in diff.delete_ips:
+        add(DELETE_IP_ADDRESS, id=ip_address_id)
+
+    for interface_id in diff.delete_interfaces:
+        add(DELETE_INTERFACE, id=interface_id)
+
+    for update in diff.update_interfaces:
+        add(UPDATE_INTERFACE, id=update['id'], changes=dict((k, v) for k, v in update.items() if k != 'id'))
+
+    # Interface name -> existing interface ID or reference to the operation creating it
+    interface_refs = dict(diff.interface_ids)
+
+    for interface in diff.create_interfaces:
+        interface_refs[interface.name] = {'op': add(
+            CREATE_INTERFACE,
+            name=interface.name,
+            form_factor=interface.form_factor.value if interface.form_factor is not None else None,
+            mac_address=interface.mac_address)}
+
+    for name, address in diff.assign_ips:
+        add(ASSIGN_IP, address=address, interface=interface_refs[name])
+
+    return {
+        'version': PLAN_VERSION,
+        'device': diff.device_name,
+        'device_id': diff.device_id,
+        'tenant': tenant_name,
+        'ops': ops
+    }
+
+
+def write_plan(plan, fout):
+    json.dump(plan, fout, indent=2, sort_keys=True)
+    fout.write('\n')
+
+
+def read_plan(fin):
+    plan = json.load(fin)
+
+    if plan.get('version') != PLAN_VERSION:
+        raise ValueError('Unsupported plan version: {}'.format(plan.get('version')))
+
+    return plan
+
+
+def plan_digest(plan):
+    return hashlib.sha256(json.dumps(plan, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def read_journal(path):
+    """
+    Read a journal without opening it for writing.
+
+    :param path:
+    :return: (digest of the plan it belongs to, dict of operation to ID, whether the plan was applied in full),
+             None when there is no journal at path
+    """
+    if not os.path.exists(path):
+        return None
+
+    with open(path, 'r') as fin:
+        lines = [line for line in fin.read().splitlines() if len(line) > 0]
+
+    if len(lines) == 0:
+        return None
+
+    applied = dict()
+    completed = False
+
+    for line in lines[1:]:
+        entry = json.loads(line)
+        if entry.get('complete'):
+            completed = True
+        else:
+            applied[entry['op']] = entry['id']
+
+    return json.loads(lines[0]).get('plan'), applied, completed
+
+
+class Journal(object):
+    """
+    Append-only record of the operations of a plan that were applied, with
+    the ID of the object each one created or touched. Every entry is flushed
+    to disk before the next chunk of operations is sent so that a journal
+    survives the process dying part way through a plan. A last line marks
+    the plan as applied in full.
+
+    The first line names the plan the journal belongs to, opening a journal
+    with a different plan raises a ValueError.
+    """
+
+    def __init__(self, path, plan):
+        self.path = path
+        self.applied = dict()
+        self.completed = False
+        self._lock = threading.Lock()
+
+        # Whether an earlier attempt at the plan wrote this journal
+        self.resumed = False
+
+        digest = plan_digest(plan)
+
+        existing = read_journal(path)
+        if existing is not None:
+            if existing[0] != digest:
+                raise ValueError('Journal {} was written for a different plan'.format(path))
+
+            self.resumed = True
+            self.applied, self.completed = existing[1], existing[2]
+
+        self._fout = open(path, 'a')
+        if self._fout.tell() == 0:
+            self._write({'plan': digest})
+
+    def _write(self, entry):
+        self._fout.write(json.dumps(entry) + '\n')
+        self._fout.flush()
+        os.fsync(self._fout.fileno())
+
+    def record(self, op, obj_id):
+        with self._lock:
+            self.applied[op] = obj_id
+            self._write({'op': op, 'id': obj_id})
+
+    def complete(self):
+        with self._lock:
+            self.completed = True
+            self._write({'complete': True})
+
+    def close(self):
+        self._fout.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class _MemoryJournal(object):
+    def __init__(self):
+        self.applied = dict()
+        self.completed = False
+        self.resumed = False
+        self._lock = threading.Lock()
+
+    def record(self, op, obj_id):
+        with self._lock:
+            self.applied[op] = obj_id
+
+    def complete(self):
+        self.completed = True
+
+
+def _resolve(ref, journal):
+    # Either an existing ID or a reference to the operation creating the object
+    return journal.applied[ref['op']] if isinstance(ref, dict) else ref
+
+
+def _recover(netbox_client, plan, journal):
+    """
+    Record the operations an earlier attempt got through without journaling
+    them, as happens when it died between a bulk request being answered and
+    its results being recorded. Sending those again would fail on deleted
+    objects and create duplicates. Updates are left to be sent again since
+    they change nothing the second time.
+    """
+    pending = [o for o in plan['ops'] if o['op'] not in journal.applied and o['action'] != UPDATE_INTERFACE]
+    if len(pending) == 0:
+        return
+
+    interfaces, ip_addresses = fetch_host_state(netbox_client, plan['device'])
+
+    interface_ids = dict((i.name, i.id) for i in interfaces)
+    ip_address_ids = dict(((a.address, a.interface.id), a.id) for a in ip_addresses)
+
+    existing = {
+        DELETE_IP_ADDRESS: set(a.id for a in ip_addresses),
+        DELETE_INTERFACE: set(i.id for i in interfaces)
+    }
+
+    # Operations are in the order they're applied so interfaces are recovered before the IPs assigned to them
+    for op in pending:
+        action = op['action']
+
+        if action in existing:
+            if op['id'] not in existing[action]:
+                journal.record(op['op'], op['id'])
+
+        elif action == CREATE_INTERFACE:
+            if op['name'] in interface_ids:
+                journal.record(op['op'], interface_ids[op['name']])
+
+        else:
+            ref = op['interface']
+            if isinstance(ref, dict) and ref['op'] not in journal.applied:
+                continue
+
+            ip_address_id = ip_address_ids.get((op['address'], _resolve(ref, journal)))
+            if ip_address_id is not None:
+                journal.record(op['op'], ip_address_id)
+
+
+def _bodies(netbox_client, action, ops, plan, journal, lookups):
+    if action in (DELETE_IP_ADDRESS, DELETE_INTERFACE):
+        return [o['id'] for o in ops]
+
+    if action == UPDATE_INTERFACE:
+        return [dict(o['changes'], id=o['id']) for o in ops]
+
+    if action == CREATE_INTERFACE:
+        if 'device_id' not in lookups:
+            lookups['device_id'] = plan['device_id']
+            if lookups['device_id'] is None:
+                lookups['device_id'] = netbox_client.dcim.list_devices(name=plan['device'])[0].id
+
+        return [{
+            'name': o['name'],
+            'form_factor': o['form_factor'],
+            'device_id': lookups['device_id'],
+            'mac_address': o['mac_address']
+        } for o in ops]
+
+    if 'tenant_id' not in lookups:
+        lookups['tenant_id'] = netbox_client.tenancy.list_tenants(name=plan['tenant'])[0].id
+
+    return [{
+        'address': o['address'],
+        'interface_id': _resolve(o['interface'], journal),
+        'tenant_id': lookups['tenant_id']
+    } for o in ops]
+
+
+def _bulk_method(netbox_client, action):
+    return {
+        DELETE_IP_ADDRESS: netbox_client.ipam.bulk_delete_ip_addresses,
+        DELETE_INTERFACE: netbox_client.dcim.bulk_delete_interfaces,
+        UPDATE_INTERFACE: netbox_client.dcim.bulk_update_interfaces,
+        CREATE_INTERFACE: netbox_client.dcim.bulk_create_interfaces,
+        ASSIGN_IP: netbox_client.ipam.bulk_assign_ips
+    }[action]
+
+
+def apply_plan(netbox_client, plan, journal=None, workers=1, chunk_size=BULK_CHUNK_SIZE):
+    """
+    Apply the operations of a plan that the journal doesn't hold yet, action
+    by action. The operations of an action are sent in bulk requests of
+    chunk_size, up to workers of them at a time. Once an action has a failed
+    operation the ones after it aren't attempted and the first failure is
+    raised. The device and the tenant are only looked up when interfaces are
+    created or IP addresses assigned.
+
+    Nothing is sent for a plan the journal marks as complete. When resuming
+    from the journal of an earlier attempt, the device's interfaces and IP
+    addresses are listed first to find operations that went through without
+    being recorded.
+
+    :param netbox_client:
+    :param plan:
+    :param journal: Journal to resume from and record to, None to keep no record
+    :param workers: number of bulk requests sent at the same time
+    :param chunk_size: number of operations per bulk request
+    :raises HTTPException: an operation failed
+    :return: dict of operation to the ID of the object it created or touched, for every operation of the plan
+    """
+    if journal is None:
+        journal = _MemoryJournal()
+
+    if journal.completed:
+        return dict(journal.applied)
+
+    if journal.resumed:
+        _recover(netbox_client, plan, journal)
+
+    # Device and tenant IDs, looked up on first use
+    lookups = dict()
+
+    for action in ACTIONS:
+        ops = [o for o in plan['ops'] if o['action'] == action and o['op'] not in journal.applied]
+        if len(ops) == 0:
+            continue
+
+        bodies = _bodies(netbox_client, action, ops, plan, journal, lookups)
+        bulk_method = _bulk_method(netbox_client, action)
+
+        def send(offset):
+            results = bulk_method(bodies[offset:offset + chunk_size], chunk_size=chunk_size)
+
+            for op, result in zip(ops[offset:offset + chunk_size], results):
+                if result.ok:
+                    journal.record(op['op'], result.id)
+
+            return [r.error for r in results if not r.ok]
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            errors = [e for chunk_errors in executor.map(send, range(0, len(ops), chunk_size)) for e in chunk_errors]
+
+        if len(errors) > 0:
+            raise errors[0]
+
+    journal.complete()
+    return dict(journal.applied)
+
+
+def apply_diff(netbox_client, diff, tenant_name=SYNC_TENANT):
+    """
+    Apply a HostDiff straight away, without keeping a journal.
+
+    :param netbox_client:
+    :param diff:
+    :param tenant_name: name of the tenant assigned IP addresses belong to
+    :return: dict of operation to the ID of the object it created or touched
+    """
+    return apply_plan(netbox_client, make_plan(diff, tenant_name))
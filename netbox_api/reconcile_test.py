@@ -0,0 +1,328 @@
+import json
+import os
+import tempfile
+import unittest
+from collections import defaultdict
+from unittest import mock
+
+from netbox_api.api.testing import FakeBulkNetbox, ServerTestCase
+from netbox_api.model import FormFactorConstant, Interface, IPAddress
+from netbox_api.reconcile import ASSIGN_IP, CREATE_INTERFACE, DELETE_IP_ADDRESS, Journal, apply_plan, diff_host, \
+    make_plan, read_plan, write_plan
+from netbox_api import sync
+from netbox_api.sync import DiscoveredInterface, apply_plan_file, plan_host, write_plan_file
+
+
+def _interface(interface_id, name, mac_address, form_factor=FormFactorConstant.BASE_T_1GE):
+    return Interface.from_dict({
+        'id': interface_id,
+        'name': name,
+        'mac_address': mac_address,
+        'device': {'id': 5, 'name': 'host-5'},
+        'form_factor': {'value': form_factor.value, 'label': form_factor.name}
+    })
+
+
+def _ip_address(ip_address_id, address, interface_id):
+    return IPAddress.from_dict({'id': ip_address_id, 'address': address, 'interface': {'id': interface_id}})
+
+
+class _CrashingJournal(Journal):
+    """
+    A journal that fails to record the first operation of an action, as if
+    the process died right after NetBox answered.
+    """
+
+    def __init__(self, path, plan, action):
+        super(_CrashingJournal, self).__init__(path, plan)
+        self._crash_on = set(o['op'] for o in plan['ops'] if o['action'] == action)
+
+    def record(self, op, obj_id):
+        if op in self._crash_on:
+            self._crash_on.clear()
+            raise RuntimeError('crashed')
+
+        super(_CrashingJournal, self).record(op, obj_id)
+
+
+class WhenDiffingAHost(unittest.TestCase):
+    def setUp(self):
+        self.interfaces = [
+            _interface(1, 'eth0', 'AA:00:00:00:00:01'),
+            _interface(2, 'old1', 'AA:00:00:00:00:02'),
+            _interface(3, 'eth9', 'AA:00:00:00:00:09')]
+
+        self.ip_addresses = [
+            _ip_address(11, '10.0.0.1/24', 1),
+            _ip_address(12, '10.0.0.9/24', 3)]
+
+    def test_unchanged_host_needs_no_writes(self):
+        discovered = [DiscoveredInterface('eth0', 'aa:00:00:00:00:01', '10.0.0.1/24', FormFactorConstant.BASE_T_1GE)]
+        diff = diff_host('host-5', discovered, self.interfaces[:1], self.ip_addresses[:1])
+
+        self.assertTrue(diff.empty)
+        self.assertEqual(5, diff.device_id)
+        self.assertEqual({'eth0': 1}, diff.interface_ids)
+
+    def test_minimal_writes(self):
+        discovered = [
+            DiscoveredInterface('eth0', 'AA:00:00:00:00:01', '10.0.0.5/24', FormFactorConstant.BASE_T_1GE),
+            DiscoveredInterface('eth1', 'AA:00:00:00:00:02', None, FormFactorConstant.SFP_PLUS_10GE),
+            DiscoveredInterface('eth2', 'AA:00:00:00:00:03', '10.0.0.3/24', FormFactorConstant.BASE_T_1GE)]
+
+        diff = diff_host('host-5', discovered, self.interfaces, self.ip_addresses)
+
+        # old1 is matched by its MAC address and renamed rather than replaced
+        self.assertEqual(['eth2'], [i.name for i in diff.create_interfaces])
+        self.assertEqual([{'id': 2, 'name': 'eth1', 'form_factor': FormFactorConstant.SFP_PLUS_10GE.value}],
+                         diff.update_interfaces)
+        self.assertEqual([3], diff.delete_interfaces)
+
+        self.assertEqual([('eth0', '10.0.0.5/24'), ('eth2', '10.0.0.3/24')], diff.assign_ips)
+        self.assertEqual([11, 12], diff.delete_ips)
+
+
+class WhenPlanningAHost(unittest.TestCase):
+    def setUp(self):
+        discovered = [
+            DiscoveredInterface('eth0', 'AA:00:00:00:00:01', '10.0.0.5/24', FormFactorConstant.BASE_T_1GE),
+            DiscoveredInterface('eth1', 'AA:00:00:00:00:02', '10.0.0.6/24', FormFactorConstant.BASE_T_1GE)]
+
+        interfaces = [_interface(1, 'eth0', 'AA:00:00:00:00:01')]
+        self.plan = make_plan(diff_host('host-5', discovered, interfaces, list()))
+
+        self.journals = tempfile.TemporaryDirectory()
+        self.journal_path = os.path.join(self.journals.name, 'plan.json.journal')
+
+    def tearDown(self):
+        self.journals.cleanup()
+
+    def test_plan_refers_to_created_interfaces(self):
+        ops = dict((o['action'], list()) for o in self.plan['ops'])
+        for op in self.plan['ops']:
+            ops[op['action']].append(op)
+
+        create_op = ops[CREATE_INTERFACE][0]['op']
+        self.assertEqual([1, {'op': create_op}], [o['interface'] for o in ops[ASSIGN_IP]])
+
+    def test_plan_round_trips_through_json(self):
+        with tempfile.TemporaryFile('w+') as plan_file:
+            write_plan(self.plan, plan_file)
+            plan_file.seek(0)
+
+            self.assertEqual(self.plan, read_plan(plan_file))
+
+    def test_journal_resumes(self):
+        with Journal(self.journal_path, self.plan) as journal:
+            journal.record(0, 1001)
+
+        with Journal(self.journal_path, self.plan) as journal:
+            self.assertEqual({0: 1001}, journal.applied)
+
+    def test_journal_of_another_plan_is_refused(self):
+        with Journal(self.journal_path, self.plan):
+            pass
+
+        other_plan = json.loads(json.dumps(self.plan))
+        other_plan['device'] = 'host-6'
+
+        with self.assertRaises(ValueError):
+            Journal(self.journal_path, other_plan)
+
+    def test_journal_remembers_completion(self):
+        with Journal(self.journal_path, self.plan) as journal:
+            self.assertFalse(journal.resumed)
+            journal.record(0, 1001)
+            journal.complete()
+
+        with Journal(self.journal_path, self.plan) as journal:
+            self.assertTrue(journal.resumed)
+            self.assertTrue(journal.completed)
+            self.assertEqual({0: 1001}, journal.applied)
+
+
+class WhenApplyingAPlan(ServerTestCase):
+    handler = FakeBulkNetbox
+
+    def setUp(self):
+        super(WhenApplyingAPlan, self).setUp()
+        self.server.objects = defaultdict(dict)
+        self.server.objects['tenants'][1] = {'id': 1, 'name': 'Infrastructure', 'slug': 'infrastructure'}
+
+        interfaces = [
+            _interface(1, 'eth0', 'AA:00:00:00:00:01'),
+            _interface(2, 'old1', 'AA:00:00:00:00:02'),
+            _interface(3, 'eth9', 'AA:00:00:00:00:09')]
+        ip_addresses = [_ip_address(11, '10.0.0.1/24', 1), _ip_address(12, '10.0.0.9/24', 3)]
+
+        device = {'id': 5, 'name': 'host-5'}
+        self.server.objects['devices'][5] = device
+
+        for interface in interfaces:
+            self.server.objects['interfaces'][interface.id] = {'id': interface.id, 'name': interface.name,
+                                                               'device': device}
+
+        for ip_address in ip_addresses:
+            self.server.objects['ip-addresses'][ip_address.id] = {
+                'id': ip_address.id,
+                'address': ip_address.address,
+                'interface': self.server.objects['interfaces'][ip_address.interface.id]
+            }
+
+        self.server.last_ids.update({'interfaces': 3, 'ip-addresses': 12})
+
+        discovered = [
+            DiscoveredInterface('eth0', 'AA:00:00:00:00:01', '10.0.0.5/24', FormFactorConstant.BASE_T_1GE),
+            DiscoveredInterface('eth1', 'AA:00:00:00:00:02', None, FormFactorConstant.SFP_PLUS_10GE),
+            DiscoveredInterface('eth2', 'AA:00:00:00:00:03', '10.0.0.3/24', FormFactorConstant.BASE_T_1GE)]
+
+        self.plan = make_plan(diff_host('host-5', discovered, interfaces, ip_addresses))
+
+        self.netbox = self.client()
+
+        self.journals = tempfile.TemporaryDirectory()
+        self.addCleanup(self.journals.cleanup)
+        self.journal_path = os.path.join(self.journals.name, 'plan.json.journal')
+
+    def _writes(self):
+        return [(method, path) for method, path, _ in self.server.paths if method != 'GET']
+
+    def _check_applied(self):
+        interfaces = self.server.objects['interfaces']
+        self.assertEqual({1: 'eth0', 2: 'eth1', 4: 'eth2'}, dict((k, v['name']) for k, v in interfaces.items()))
+        self.assertEqual(FormFactorConstant.SFP_PLUS_10GE.value, interfaces[2]['form_factor']['value'])
+
+        ip_addresses = self.server.objects['ip-addresses'].values()
+        self.assertEqual([('10.0.0.3/24', 4, 1), ('10.0.0.5/24', 1, 1)],
+                         sorted((a['address'], a['interface']['id'], a['tenant']['id']) for a in ip_addresses))
+
+    def test_bulk_endpoints(self):
+        self.server.bulk = True
+        apply_plan(self.netbox, self.plan)
+
+        self._check_applied()
+        self.assertEqual(
+            ['DELETE ip-addresses', 'DELETE interfaces', 'PATCH interfaces', 'POST interfaces', 'GET tenants',
+             'POST ip-addresses'],
+            ['{} {}'.format(method, path.split('?')[0].strip('/').split('/')[-1])
+             for method, path, _ in self.server.paths])
+
+    def test_servers_without_bulk_updates_and_deletes(self):
+        self.server.bulk = False
+        applied = apply_plan(self.netbox, self.plan)
+
+        self._check_applied()
+        self.assertEqual(len(self.plan['ops']), len(applied))
+
+        # Each refused bulk request is followed by one request per object
+        self.assertEqual(
+            ['DELETE', 'DELETE', 'DELETE', 'DELETE', 'DELETE', 'PATCH', 'PATCH'],
+            [method for method, path, _ in self.server.paths if method in ('PATCH', 'DELETE')])
+
+    def test_completed_plans_are_not_applied_again(self):
+        self.server.bulk = True
+        with Journal(self.journal_path, self.plan) as journal:
+            applied = apply_plan(self.netbox, self.plan, journal)
+
+        del self.server.paths[:]
+
+        with Journal(self.journal_path, self.plan) as journal:
+            self.assertEqual(applied, apply_plan(self.netbox, self.plan, journal))
+
+        self.assertEqual([], self.server.paths)
+        self._check_applied()
+
+    def _resume_after_crash(self, action):
+        with _CrashingJournal(self.journal_path, self.plan, action) as journal:
+            with self.assertRaises(RuntimeError):
+                apply_plan(self.netbox, self.plan, journal)
+
+        with Journal(self.journal_path, self.plan) as journal:
+            applied = apply_plan(self.netbox, self.plan, journal)
+
+        self._check_applied()
+        self.assertEqual(len(self.plan['ops']), len(applied))
+
+    def test_unrecorded_creates_are_not_repeated(self):
+        self.server.bulk = True
+        self._resume_after_crash(CREATE_INTERFACE)
+
+        posts = [path for method, path in self._writes() if method == 'POST']
+        self.assertEqual(['interfaces', 'ip-addresses'], [p.strip('/').split('/')[-1] for p in posts])
+
+    def test_unrecorded_deletes_are_not_repeated(self):
+        self.server.bulk = False
+        self._resume_after_crash(DELETE_IP_ADDRESS)
+
+        # One request per object deleted, none of them sent twice
+        deletes = [path for method, path in self._writes() if method == 'DELETE' and path.strip('/')[-1].isdigit()]
+        self.assertEqual(3, len(deletes))
+        self.assertEqual(len(deletes), len(set(deletes)))
+
+    def test_plan_files_keep_their_journal(self):
+        self.server.bulk = True
+        plan_path = os.path.join(self.journals.name, 'plan.json')
+        with open(plan_path, 'w') as fout:
+            write_plan(self.plan, fout)
+
+        apply_plan_file(self.netbox, plan_path)
+        writes = len(self._writes())
+
+        apply_plan_file(self.netbox, plan_path)
+
+        self.assertTrue(os.path.exists(plan_path + '.journal'))
+        self.assertEqual(writes, len(self._writes()))
+        self._check_applied()
+
+    def _plan_file(self, discovered):
+        plan_path = os.path.join(self.journals.name, 'plan.json')
+
+        with mock.patch.object(sync, 'discover_interfaces', lambda: discovered), \
+                mock.patch.object(sync, '_simple_hostname', lambda: 'host-5'):
+            write_plan_file(plan_host(self.netbox), plan_path)
+
+        return plan_path
+
+    def test_plans_written_again_once_applied(self):
+        self.server.bulk = True
+        discovered = [
+            DiscoveredInterface('eth0', 'AA:00:00:00:00:01', '10.0.0.5/24', FormFactorConstant.BASE_T_1GE),
+            DiscoveredInterface('eth1', 'AA:00:00:00:00:02', None, FormFactorConstant.SFP_PLUS_10GE)]
+
+        apply_plan_file(self.netbox, self._plan_file(discovered))
+
+        discovered.append(
+            DiscoveredInterface('eth2', 'AA:00:00:00:00:03', '10.0.0.3/24', FormFactorConstant.BASE_T_1GE))
+        plan_path = self._plan_file(discovered)
+
+        self.assertFalse(os.path.exists(plan_path + '.journal'))
+
+        apply_plan_file(self.netbox, plan_path)
+
+        self.assertEqual({'eth0', 'eth1', 'eth2'}, set(i['name'] for i in self.server.objects['interfaces'].values()))
+        self.assertEqual({'10.0.0.3/24', '10.0.0.5/24'},
+                         set(a['address'] for a in self.server.objects['ip-addresses'].values()))
+
+    def test_plans_applied_in_part_are_not_overwritten(self):
+        self.server.bulk = True
+        discovered = [DiscoveredInterface('eth0', 'AA:00:00:00:00:01', '10.0.0.5/24', FormFactorConstant.BASE_T_1GE)]
+        plan_path = self._plan_file(discovered)
+
+        with open(plan_path, 'r') as fin:
+            plan = read_plan(fin)
+
+        with _CrashingJournal(plan_path + '.journal', plan, DELETE_IP_ADDRESS) as journal:
+            with self.assertRaises(RuntimeError):
+                apply_plan(self.netbox, plan, journal)
+
+        discovered.append(DiscoveredInterface('eth2', 'AA:00:00:00:00:03', None, FormFactorConstant.BASE_T_1GE))
+
+        with self.assertRaisesRegex(ValueError, 'applied in part'):
+            self._plan_file(discovered)
+
+        with open(plan_path, 'r') as fin:
+            self.assertEqual(plan, read_plan(fin))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -10,14 +10,30 @@ TODO
 Currently Supported Features
 ============================
 
-  * Interface discovery and registration
+  * Interface discovery and registration, writing only what changed since the last sync
 
 """
 
+import json
+import os
 import re
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 
+from netbox_api import netdev
 from netbox_api.cmdutil import do_exec
 from netbox_api.model import Interface, FormFactorConstant
+from netbox_api.reconcile import Journal, apply_plan, diff_host, fetch_host_state, make_plan, plan_digest, \
+    read_journal, read_plan, write_plan
+
+# Number of interfaces inspected at the same time during discovery
+DISCOVERY_WORKERS = 8
+
+# Number of plans applied at the same time
+APPLY_WORKERS = 4
+
+# Suffix of the journal kept next to a plan file while it is applied
+JOURNAL_SUFFIX = '.journal'
 
 # Regex for pulling out the IP address from the output of the CLI tool 'ip'
 _IP_TOOL_RE = re.compile('inet\\s+([^\\s]+)')
@@ -31,6 +47,9 @@ _PORT_TYPES = {
     'fibre': FormFactorConstant.SFP_PLUS_10GE
 }
 
+# What discovery found out about one of the host's interfaces
+DiscoveredInterface = namedtuple('DiscoveredInterface', ('name', 'mac_address', 'ip_address', 'form_factor'))
+
 
 def _parse_interface_info(output):
     interfaces = list()
@@ -68,6 +87,34 @@ def _iface_ip_addr(iface):
     return None
 
 
+def _ip_addresses():
+    """
+    Read the first IPv4 address, in CIDR notation, and the MAC address of every
+    interface from a single call to 'ip'. Returns None when the installed 'ip'
+    can't output JSON.
+    """
+    result = do_exec('ip -j addr show')
+    if result.return_code != 0:
+        return None
+
+    try:
+        links = json.loads(result.stdout)
+    except ValueError:
+        return None
+
+    addresses = dict()
+    for link in links:
+        ip_addr = None
+        for addr_info in link.get('addr_info', list()):
+            if addr_info.get('family') == 'inet':
+                ip_addr = '{}/{}'.format(addr_info['local'], addr_info['prefixlen'])
+                break
+
+        addresses[link['ifname']] = (ip_addr, link.get('address'))
+
+    return addresses
+
+
 def _iface_mac_addr(iface):
     with open('/sys/class/net/{}/address'.format(iface), 'r') as fin:
         return fin.read().strip()
@@ -90,50 +137,190 @@ def _iface_port_type(iface):
 
             port_type = match.group(1).strip().lower()
 
+    return _form_factor(port_type)
+
+
+def _form_factor(port_type):
     if port_type is not None:
         return _PORT_TYPES[port_type]
 
     return None
 
 
+def _inspect_iface(iface, addresses):
+    if addresses is not None:
+        ip_addr, mac_addr = addresses.get(iface, (None, None))
+    else:
+        ip_addr, mac_addr = _iface_ip_addr(iface), None
+
+    if mac_addr is None:
+        mac_addr = _iface_mac_addr(iface)
+
+    return DiscoveredInterface(
+        name=iface,
+        mac_address=mac_addr,
+        ip_address=ip_addr,
+        form_factor=_iface_port_type(iface))
+
+
+def _inspect_iface_natively(iface):
+    # Anything the kernel can't tell us is looked up with the command line tools instead
+    try:
+        ip_addr = netdev.ip_address(iface)
+    except OSError:
+        ip_addr = _iface_ip_addr(iface)
+
+    try:
+        form_factor = _form_factor(netdev.port_type(iface))
+    except OSError:
+        form_factor = _iface_port_type(iface)
+
+    return DiscoveredInterface(
+        name=iface,
+        mac_address=netdev.mac_address(iface),
+        ip_address=ip_addr,
+        form_factor=form_factor)
+
+
+def discover_interfaces(workers=DISCOVERY_WORKERS, native=None):
+    """
+    Inspect every interface that matters on this host, a bounded number at a
+    time. Every interface is checked before anything is returned so that a
+    sync can fail before it has made any changes.
+
+    :param workers: number of interfaces inspected at the same time
+    :param native: read interface details from sysfs and the kernel rather than running 'ip' and 'ethtool',
+                   None to do so wherever netdev is available
+    :return: list of DiscoveredInterface
+    """
+    if native is None:
+        native = netdev.AVAILABLE
+
+    if native:
+        iface_names = netdev.list_interfaces()
+        inspect = _inspect_iface_natively
+    else:
+        iface_names = _list_interfaces()
+        addresses = _ip_addresses()
+
+        def inspect(iface):
+            return _inspect_iface(iface, addresses)
+
+    # Ignore devices that don't matter to us
+    iface_names = [i for i in iface_names if i not in ['lo'] and 'tun' not in i]
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        interfaces = list(executor.map(inspect, iface_names))
+
+    for interface in interfaces:
+        # We can not continue without a form_factor so bail here if it's None
+        if interface.form_factor is None:
+            raise Exception('Unable to determine port type for interface: {}'.format(interface.name))
+
+    return interfaces
+
+
 def _hostname():
     result = do_exec('hostname -f')
     return result.stdout
 
 
-def synchronize_host(netbox_client):
-    # Get the hostname
+def _simple_hostname():
     hostname = _hostname()
 
     # The simple hostname (left most component) is the device name key
-    simple_hostname = hostname if '.' not in hostname else hostname.split('.')[0]
+    return hostname if '.' not in hostname else hostname.split('.')[0]
 
-    # Look up the device definition
-    tenant = netbox_client.tenancy.list_tenants(name='Infrastructure')[0]
-    device = netbox_client.dcim.list_devices(name=simple_hostname)[0]
 
-    # Clear old interfaces if we can
-    for interface in netbox_client.dcim.list_interfaces(device=simple_hostname):
-        netbox_client.delete_interface(interface.id)
+def plan_host(netbox_client, snapshot=None):
+    """
+    Work out what a sync of this host would write without writing anything.
 
-    # Iterate through the real HW devices
-    for iface_name in _list_interfaces():
-        # Ignore devices that don't matter to us
-        if iface_name in ['lo'] or 'tun' in iface_name:
-            continue
+    :param netbox_client:
+    :param snapshot: optional InventorySnapshot to compare against instead of listing the device from the API
+    :return: plan, see netbox_api.reconcile.make_plan
+    """
+    # Find out everything about the real HW devices before touching NetBox
+    interfaces = discover_interfaces()
 
-        # Gather information related to the interface in question
-        ip_addr = _iface_ip_addr(iface_name)
-        mac_addr = _iface_mac_addr(iface_name)
-        form_factor = _iface_port_type(iface_name)
+    # Compare them with what NetBox has so that only the differences are written
+    device_name = _simple_hostname()
+    current_interfaces, current_ips = fetch_host_state(netbox_client, device_name, snapshot)
 
-        # We can not continue without a form_factor so bail here if it's None
-        if form_factor is None:
-            raise Exception('Unable to determine port type for interface: {}'.format(iface_name))
+    return make_plan(diff_host(device_name, interfaces, current_interfaces, current_ips))
+
+
+def write_plan_file(plan, path):
+    """
+    Write a plan file for apply_plan_file. The journal of a plan applied in
+    full at the same path is removed so that the new plan can be applied.
+    Overwriting a different plan that was only applied in part raises a
+    ValueError, it has to be applied in full or its journal removed first.
+
+    :param plan:
+    :param path:
+    :return:
+    """
+    journal_path = path + JOURNAL_SUFFIX
+    journal = read_journal(journal_path)
+
+    if journal is not None:
+        digest, _, completed = journal
+
+        if not completed and digest != plan_digest(plan):
+            raise ValueError('Plan {} has only been applied in part, apply it again or remove {} first'.format(
+                path, journal_path))
+
+        if completed:
+            os.remove(journal_path)
+
+    with open(path, 'w') as fout:
+        write_plan(plan, fout)
+
+
+def apply_plan_file(netbox_client, path):
+    """
+    Apply a plan file, keeping a journal next to it. Applying a plan again
+    after a failure resumes from its journal, which is kept once the plan has
+    been applied in full so that applying it again does nothing.
+
+    :param netbox_client:
+    :param path:
+    :return: dict of operation to the ID of the object it created or touched
+    """
+    with open(path, 'r') as fin:
+        plan = read_plan(fin)
+
+    with Journal(path + JOURNAL_SUFFIX, plan) as journal:
+        return apply_plan(netbox_client, plan, journal)
+
+
+def apply_plan_files(netbox_client, paths, workers=APPLY_WORKERS):
+    """
+    Apply many plan files, up to workers at a time. Every plan is attempted
+    even if others fail.
+
+    :param netbox_client:
+    :param paths:
+    :param workers: number of plans applied at the same time
+    :return: dict of path to the exception that failed its plan, for the plans that failed
+    """
+    def apply(path):
+        try:
+            apply_plan_file(netbox_client, path)
+        except Exception as ex:
+            return path, ex
+
+        return path, None
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return dict((path, ex) for path, ex in executor.map(apply, paths) if ex is not None)
+
+
+def synchronize_host(netbox_client):
+    plan = plan_host(netbox_client)
 
-        # Add this interface definition to the device
-        iface_id = netbox_client.dcim.create_interface(iface_name, form_factor, device.id, mac_addr)
+    if len(plan['ops']) > 0:
+        apply_plan(netbox_client, plan)
 
-        # If there's an IP address, assign it to the device as well
-        if ip_addr is not None:
-            netbox_client.ipam.assign_ip(ip_addr, iface_id, tenant.id)
+    return plan
@@ -0,0 +1,161 @@
+import errno
+import json
+import unittest
+from unittest import mock
+
+from netbox_api import netdev, sync
+from netbox_api.cmdutil import CommandResult
+from netbox_api.model import FormFactorConstant
+from netbox_api.sync import DiscoveredInterface, discover_interfaces, synchronize_host
+
+_IP_JSON = json.dumps([
+    {'ifname': 'lo', 'address': '00:00:00:00:00:00',
+     'addr_info': [{'family': 'inet', 'local': '127.0.0.1', 'prefixlen': 8}]},
+    {'ifname': 'eth0', 'address': 'aa:00:00:00:00:01',
+     'addr_info': [
+         {'family': 'inet6', 'local': 'fe80::1', 'prefixlen': 64},
+         {'family': 'inet', 'local': '10.0.0.5', 'prefixlen': 24},
+         {'family': 'inet', 'local': '10.0.0.6', 'prefixlen': 24}]},
+    {'ifname': 'eth1', 'address': 'aa:00:00:00:00:02', 'addr_info': []}])
+
+_ETHTOOL = {
+    'eth0': 'Settings for eth0:\n\tSupported ports: [ TP ]\n\tSpeed: 1000Mb/s\n',
+    'eth1': 'Settings for eth1:\n\tSupported ports: [ FIBRE ]\n\tSpeed: 10000Mb/s\n'
+}
+
+
+class _FakeCommands(object):
+    """
+    Answers the commands discovery runs from canned output and records them.
+    """
+
+    def __init__(self, ip_json=_IP_JSON, ip_json_code=0, ethtool=None):
+        self.ip_json = ip_json
+        self.ip_json_code = ip_json_code
+        self.ethtool = ethtool if ethtool is not None else _ETHTOOL
+        self.commands = list()
+
+    def __call__(self, cmd):
+        self.commands.append(cmd)
+
+        if cmd == 'ls -1 /sys/class/net/':
+            return CommandResult(0, 'eth0\neth1\nlo\ntun0', '')
+
+        if cmd == 'ip -j addr show':
+            return CommandResult(self.ip_json_code, self.ip_json, '')
+
+        if cmd.startswith('ip -4 addr show '):
+            address = '10.0.0.5/24' if cmd.endswith('eth0') else None
+            output = '    inet {} brd 10.0.0.255 scope global eth0'.format(address) if address is not None else ''
+            return CommandResult(0, output, '')
+
+        if cmd.startswith('ethtool '):
+            return CommandResult(0, self.ethtool[cmd.split()[-1]], '')
+
+        if cmd == 'hostname -f':
+            return CommandResult(0, 'host-5.example.com', '')
+
+        raise AssertionError('Unexpected command: {}'.format(cmd))
+
+
+class WhenReadingAddressesWithIp(unittest.TestCase):
+    def _ip_addresses(self, commands):
+        with mock.patch.object(sync, 'do_exec', commands):
+            return sync._ip_addresses()
+
+    def test_first_ipv4_address_and_mac_of_every_link(self):
+        addresses = self._ip_addresses(_FakeCommands())
+
+        self.assertEqual(('10.0.0.5/24', 'aa:00:00:00:00:01'), addresses['eth0'])
+        self.assertEqual((None, 'aa:00:00:00:00:02'), addresses['eth1'])
+
+    def test_ip_without_json_support(self):
+        self.assertIsNone(self._ip_addresses(_FakeCommands(ip_json='Option "-j" is unknown', ip_json_code=255)))
+
+    def test_output_that_is_not_json(self):
+        self.assertIsNone(self._ip_addresses(_FakeCommands(ip_json='1: lo: <LOOPBACK,UP,LOWER_UP>')))
+
+
+class WhenDiscoveringInterfacesWithCommandLineTools(unittest.TestCase):
+    def _discover(self, commands):
+        with mock.patch.object(sync, 'do_exec', commands), \
+                mock.patch.object(sync, '_iface_mac_addr', lambda iface: 'bb:00:00:00:00:0{}'.format(iface[-1])):
+            return discover_interfaces(workers=2, native=False)
+
+    def test_interfaces_are_read_from_a_single_ip_call(self):
+        commands = _FakeCommands()
+
+        self.assertEqual([
+            DiscoveredInterface('eth0', 'aa:00:00:00:00:01', '10.0.0.5/24', FormFactorConstant.BASE_T_1GE),
+            DiscoveredInterface('eth1', 'aa:00:00:00:00:02', None, FormFactorConstant.SFP_PLUS_10GE)],
+            self._discover(commands))
+
+        # Loopback and tunnel devices are skipped
+        self.assertEqual(
+            ['ls -1 /sys/class/net/', 'ip -j addr show'], [c for c in commands.commands if not c.startswith('ethtool')])
+
+    def test_interfaces_are_read_one_at_a_time_without_json_support(self):
+        commands = _FakeCommands(ip_json_code=255)
+
+        self.assertEqual([
+            DiscoveredInterface('eth0', 'bb:00:00:00:00:00', '10.0.0.5/24', FormFactorConstant.BASE_T_1GE),
+            DiscoveredInterface('eth1', 'bb:00:00:00:00:01', None, FormFactorConstant.SFP_PLUS_10GE)],
+            self._discover(commands))
+
+        self.assertIn('ip -4 addr show eth0', commands.commands)
+
+    def test_missing_port_types_fail_before_netbox_is_called(self):
+        commands = _FakeCommands(ethtool=dict(_ETHTOOL, eth1='Settings for eth1:\n\tLink detected: yes\n'))
+        netbox = mock.Mock()
+
+        with mock.patch.object(netdev, 'AVAILABLE', False), mock.patch.object(sync, 'do_exec', commands), \
+                self.assertRaisesRegex(Exception, 'interface: eth1'):
+            synchronize_host(netbox)
+
+        self.assertEqual([], netbox.mock_calls)
+
+
+class WhenDiscoveringInterfacesNatively(unittest.TestCase):
+    def setUp(self):
+        self.commands = _FakeCommands()
+
+        def unsupported(iface):
+            raise OSError(errno.EOPNOTSUPP, 'Operation not supported')
+
+        patchers = [
+            mock.patch.object(sync, 'do_exec', self.commands),
+            mock.patch.object(netdev, 'list_interfaces', lambda: ['eth0', 'eth1', 'lo']),
+            mock.patch.object(netdev, 'mac_address', lambda iface: 'cc:00:00:00:00:0{}'.format(iface[-1])),
+            mock.patch.object(netdev, 'ip_address', lambda iface: '10.0.0.7/24' if iface == 'eth0' else None),
+            mock.patch.object(netdev, 'port_type', lambda iface: 'tp' if iface == 'eth0' else unsupported(iface))]
+
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_no_commands_are_run_when_the_kernel_answers(self):
+        interfaces = discover_interfaces(native=True)
+
+        self.assertEqual(
+            DiscoveredInterface('eth0', 'cc:00:00:00:00:00', '10.0.0.7/24', FormFactorConstant.BASE_T_1GE),
+            interfaces[0])
+        self.assertNotIn('ethtool eth0', self.commands.commands)
+        self.assertFalse(any(c.startswith('ip ') for c in self.commands.commands))
+
+    def test_unsupported_ioctls_fall_back_to_ethtool(self):
+        interfaces = discover_interfaces(native=True)
+
+        self.assertEqual(
+            DiscoveredInterface('eth1', 'cc:00:00:00:00:01', None, FormFactorConstant.SFP_PLUS_10GE), interfaces[1])
+        self.assertEqual(['ethtool eth1'], self.commands.commands)
+
+    def test_unreadable_addresses_fall_back_to_ip(self):
+        with mock.patch.object(netdev, 'ip_address', mock.Mock(side_effect=OSError(errno.ENODEV, 'No such device'))):
+            interfaces = discover_interfaces(native=True)
+
+        self.assertEqual(['10.0.0.5/24', None], [i.ip_address for i in interfaces])
+        self.assertIn('ip -4 addr show eth0', self.commands.commands)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -18,8 +18,34 @@ def _gen_argparser():
         dest='root_cmd')
     root_cmds.required = True
 
-    # netbox devices
-    root_cmds.add_parser('sync', help='Synchronize infrastructure information for this machine.')
+    # netbox sync
+    sync_cmd = root_cmds.add_parser('sync', help='Synchronize infrastructure information for this machine.')
+    sync_cmds = sync_cmd.add_subparsers(
+        title='Available Commands',
+        dest='sync_cmd')
+
+    # netbox sync plan
+    sync_plan_cmd = sync_cmds.add_parser('plan', help='Output the changes a sync would make as a JSON plan.')
+    sync_plan_cmd.add_argument(
+        '--output', '-o',
+        default='-',
+        dest='output',
+        help='File to write the plan to, - for stdout.')
+
+    # netbox sync apply
+    sync_apply_cmd = sync_cmds.add_parser(
+        'apply', help='Apply plans, resuming from the journal kept next to each plan after a failure.')
+    sync_apply_cmd.add_argument(
+        '--workers', '-w',
+        type=int,
+        default=4,
+        dest='workers',
+        help='Number of plans applied at the same time.')
+
+    sync_apply_cmd.add_argument(
+        dest='plans',
+        nargs='+',
+        help='Plan files to apply.')
 
     # netbox devices
     devices_cmd = root_cmds.add_parser('devices', help='Manage and inspect devices.')
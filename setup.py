@@ -9,6 +9,8 @@ install_requires = [
 
 # Additional feature sets and their requirements
 extras_require = {
+    'async': ['aiohttp>=3.0'],
+    'fast': ['orjson']
 }
 
 setup(